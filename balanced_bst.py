@@ -0,0 +1,144 @@
+""" Weight-balanced Binary Search Tree ADT.
+    A drop-in replacement for BinarySearchTree that keeps itself balanced
+    using the subtree_size field every node already carries, so sorted or
+    nearly sorted input no longer degenerates into a linked list.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+from typing import Optional, TypeVar
+from bst import BinarySearchTree
+from node import TreeNode
+
+
+K = TypeVar('K')
+I = TypeVar('I')
+
+
+class WeightBalancedTree(BinarySearchTree[K, I]):
+    """
+        Weight-balanced (BB[alpha]) binary search tree.
+
+        The weight of a subtree is its subtree_size + 1. A node is balanced
+        when neither child is more than DELTA times heavier than the other,
+        which bounds the depth by O(log n). Rotations keep subtree_size
+        correct, so kth_smallest stays O(log n) regardless of insert order.
+        DELTA and GAMMA are the parameters proven correct by Hirai and
+        Yamamoto for single-pass insertion and deletion.
+        In multiset mode the weights include the counts, so keys with many
+        copies sit closer to the root and depth is bounded by O(log n) in the
+        total number of elements.
+    """
+
+    DELTA = 3
+    GAMMA = 2
+
+    @staticmethod
+    def weight(current: Optional[TreeNode]) -> int:
+        """
+            Returns the weight (size + 1) of the subtree rooted at current.
+            :complexity: O(1)
+        """
+        return (current.subtree_size if current else 0) + 1
+
+    def rebalance(self, current: TreeNode) -> TreeNode:
+        """
+            Refreshes subtree_size of current and performs at most one single
+            or double rotation to restore the weight balance of the subtree.
+            :complexity: O(1)
+        """
+        left_weight = self.weight(current.left)
+        right_weight = self.weight(current.right)
+
+        if right_weight > self.DELTA * left_weight:
+            right = current.right
+            if self.weight(right.left) >= self.GAMMA * self.weight(right.right):
+                current.right = self.rotate_right(right)
+            return self.rotate_left(current)
+        elif left_weight > self.DELTA * right_weight:
+            left = current.left
+            if self.weight(left.right) >= self.GAMMA * self.weight(left.left):
+                current.left = self.rotate_left(left)
+            return self.rotate_right(current)
+
+        self.update_size(current)
+        return current
+
+    def rotate_left(self, current: TreeNode) -> TreeNode:
+        """
+            Rotates the subtree rooted at current to the left and returns the new root.
+            :pre: current.right is not None
+            :complexity: O(1)
+        """
+        current = self.touch(current)
+        pivot = self.touch(current.right)
+        current.right = pivot.left
+        self.update_size(current)
+        pivot.left = current
+        self.update_size(pivot)
+        return pivot
+
+    def rotate_right(self, current: TreeNode) -> TreeNode:
+        """
+            Rotates the subtree rooted at current to the right and returns the new root.
+            :pre: current.left is not None
+            :complexity: O(1)
+        """
+        current = self.touch(current)
+        pivot = self.touch(current.left)
+        current.left = pivot.right
+        self.update_size(current)
+        pivot.right = current
+        self.update_size(pivot)
+        return pivot
+
+    def join_aux(self, left: Optional[TreeNode], mid: TreeNode, right: Optional[TreeNode]) -> TreeNode:
+        """
+            Joins two subtrees around mid. If one side is too heavy, mid and
+            the lighter side are joined into the heavier side's inner spine,
+            rebalancing on the way back up, so split, join and union inherit
+            the logarithmic bounds of the weight-balanced tree.
+            :complexity: O(|log(weight(left) / weight(right))|)
+        """
+        if self.weight(left) > self.DELTA * self.weight(right):
+            left = self.touch(left)
+            left.right = self.join_aux(left.right, mid, right)
+            return self.rebalance(left)
+        elif self.weight(right) > self.DELTA * self.weight(left):
+            right = self.touch(right)
+            right.left = self.join_aux(left, mid, right.left)
+            return self.rebalance(right)
+        return super().join_aux(left, mid, right)
+
+    def is_balanced(self, current: Optional[TreeNode]) -> bool:
+        """
+            Checks the weight-balance and subtree_size invariants of the whole
+            subtree rooted at current. Intended for testing; in multiset mode
+            heavily repeated keys can legitimately leave the weights uneven.
+            A subtree holding tombstones is exempt from the weight check:
+            dead nodes weigh nothing but still take up their place, and
+            compaction, not rotation, is what bounds the depth around them.
+            :complexity: O(N) where N is the size of the subtree
+        """
+        return self.is_balanced_aux(current)[0]
+
+    def is_balanced_aux(self, current: Optional[TreeNode]) -> tuple[bool, bool]:
+        """
+            Checks the subtree rooted at current as is_balanced does, and
+            returns whether it passed and whether it holds a dead node.
+            :complexity: O(N) where N is the size of the subtree
+        """
+        if current is None:
+            return True, False
+        left_ok, left_dead = self.is_balanced_aux(current.left)
+        right_ok, right_dead = self.is_balanced_aux(current.right)
+        dead = left_dead or right_dead or current.count == 0
+        left_weight = self.weight(current.left)
+        right_weight = self.weight(current.right)
+        if current.subtree_size != current.count + left_weight + right_weight - 2:
+            return False, dead
+        if not dead and (left_weight > self.DELTA * right_weight or right_weight > self.DELTA * left_weight):
+            return False, dead
+        return left_ok and right_ok, dead
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from heap import MaxHeap
+from heap import IndexedMaxHeap
 
 @dataclass
 class Beehive:
@@ -21,6 +21,10 @@ class Beehive:
     def __eq__(self, other):
         return min(self.capacity, self.volume)*self.nutrient_factor == min(other.capacity, other.volume)*other.nutrient_factor
 
+    def harvest_value(self) -> int:
+        """The emeralds the next harvest of this hive yields, which is what hives are ordered by"""
+        return min(self.capacity, self.volume)*self.nutrient_factor
+
     x: int
     y: int
     z: int
@@ -31,27 +35,36 @@ class Beehive:
 
 class BeehiveSelector:
 
-    def __init__(self, max_beehives: int):
+    def __init__(self, max_beehives: 'int | None' = None):
         """
+        Without max_beehives the heap grows and shrinks with the number of beehives.
+        The heap caches each hive's harvest_value, so a hive changed outside
+        of a harvest must be passed to update_beehive before the next one.
+
         Best Case -  O(N), where n is the size of the beehive
             
         Worst case - same as best case
 
         """
         # Use a heap to store 
-        self.store = MaxHeap(max_beehives)
+        self.store = IndexedMaxHeap(max_beehives, key=Beehive.harvest_value)
         self.max_elements = max_beehives
+        # heap handle of every hive, by id since beehives are unhashable
+        self.handles = {}
 
     def set_all_beehives(self, hive_list: 'list[Beehive]'):
         """
-        Best Case -  O(D*N), where D is the depth of the heap and N is the size of the input list
+        Replaces every beehive with those in hive_list, heapifying them bottom-up
+
+        Best Case -  O(N), where N is the size of the input list
             
         Worst case - same as best case
 
         """
-        self.store.length = 0
-        for beehive in hive_list:
-            self.add_beehive(beehive)
+        if len({id(hive) for hive in hive_list}) < len(hive_list):
+            raise ValueError('A beehive appears more than once in hive_list')
+        handles = self.store.heapify(hive_list)
+        self.handles = {id(handle.item): handle for handle in handles}
 
     
     def add_beehive(self, hive: Beehive):
@@ -60,34 +73,111 @@ class BeehiveSelector:
             
         Worst case - O(D), where D is the depth of the heap, when element added is the largest element
 
+        amortised, when an unsized selector has to grow its heap
+
+        Raises ValueError if the hive is already in the selector, since a second
+        heap entry would keep a stale cached value once the first is harvested
+
+        """
+        if id(hive) in self.handles:
+            raise ValueError('Beehive already added: {0}'.format(hive))
+        self.handles[id(hive)] = self.store.add(hive)
+
+    def handle(self, hive: Beehive):
+        """
+        Returns the heap handle of hive, raising ValueError if it is not in the selector
+
+        Best Case -  O(1)
+
+        Worst case - same as best case
+
         """
+        if id(hive) not in self.handles:
+            raise ValueError('Beehive not in the selector: {0}'.format(hive))
+        return self.handles[id(hive)]
+
+    def update_beehive(self, hive: Beehive):
+        """
+        Moves a hive whose volume (or other stats) changed outside of a harvest to its new place
+
+        Best Case -  O(1), when its priority is still between its parent and children
+            
+        Worst case - O(D), where D is the depth of the heap
 
-        self.store.add(hive)
+        """
+        self.store.update(self.handle(hive))
+
+    def remove_beehive(self, hive: Beehive):
+        """
+        Takes a hive out of the selection
+
+        Best Case -  O(1), when the last hive of the heap fits where it was
+            
+        Worst case - O(D), where D is the depth of the heap
+
+        """
+        self.store.remove(self.handle(hive))
+        del self.handles[id(hive)]
     
 
     def harvest_best_beehive(self):
         """
-        Best Case -  O(D), where D is the depth of the heap, when the new root is the minimum element so should sink to the bottom
+        The hive is put back with replace_max, a single sink from the root, and keeps its handle
+
+        Best Case -  O(1), when the hive is still the best after its harvest
             
-        Worst case - same as best case
+        Worst case - O(D), where D is the depth of the heap, when it sinks to the bottom
 
         """
-        max_beehive = self.store.get_max()  
-        emeralds = min(max_beehive.capacity, max_beehive.volume)*max_beehive.nutrient_factor
+        max_beehive = self.store.peek().item
+        emeralds = self.store.max_key()
         if max_beehive.volume > max_beehive.capacity:
-            max_beehive.volume -= max_beehive.capacity
+            volume = max_beehive.volume - max_beehive.capacity
         else:
-            max_beehive.volume = 0
-        self.add_beehive(max_beehive)
+            volume = 0
+        # an unchanged volume keeps the cached key, and the hive stays on top
+        if volume != max_beehive.volume:
+            max_beehive.volume = volume
+            self.store.replace_max(max_beehive)
         return emeralds
 
+    def harvest_many(self, n: int, total: bool = False):
+        """
+        Harvests n times, returning the emeralds of each harvest in order (or
+        their sum when total is True), exactly as n calls to harvest_best_beehive would
 
-        
-
-
-        
-        
-
+        The best hive yields capacity*nutrient_factor for volume//capacity
+        harvests in a row, and while its value holds it stays ahead of every
+        other hive, so those rounds are applied in one step and the hive is
+        only re-placed in the heap once. A round that empties a hive is done
+        singly, and once the best hive is worth nothing every remaining
+        harvest is 0.
 
+        Best Case -  O(D), where D is the depth of the heap, when one hive wins every round
 
+        Worst case - O(L*D + n) where L is the number of times the best hive changes, or O(L*D) when total is True
 
+        """
+        emeralds = 0 if total else []
+        remaining = n
+        while remaining > 0:
+            handle = self.store.peek()
+            hive, value = handle.item, self.store.max_key()
+            if value == 0:
+                if not total:
+                    emeralds.extend([0] * remaining)
+                break
+            rounds = min(remaining, hive.volume // hive.capacity)
+            if rounds:
+                hive.volume -= rounds * hive.capacity
+                self.store.update(handle)
+            else:
+                # the last, partial harvest of this hive
+                rounds = 1
+                value = self.harvest_best_beehive()
+            if total:
+                emeralds += value * rounds
+            else:
+                emeralds.extend([value] * rounds)
+            remaining -= rounds
+        return emeralds
@@ -0,0 +1,70 @@
+""" Sorted-input ingest: plain BinarySearchTree vs WeightBalancedTree.
+
+    python -m benchmarks.bench_balanced_bst [--keys 1000000] [--plain-keys 900]
+
+    The plain tree degenerates into a linked list on sorted input, so each
+    insert walks the whole list and ingest is quadratic; it is measured on
+    a much smaller prefix to keep the run short. Per-key figures are
+    directly comparable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from balanced_bst import WeightBalancedTree
+from bst import BinarySearchTree
+from ratio import Percentiles
+
+
+def height(node) -> int:
+    depth, level = 0, [node] if node else []
+    while level:
+        depth += 1
+        level = [child for n in level for child in (n.left, n.right) if child]
+    return depth
+
+
+def ingest(tree: BinarySearchTree, n: int) -> float:
+    start = time.perf_counter()
+    for key in range(n):
+        tree[key] = key
+    return time.perf_counter() - start
+
+
+def queries(tree: BinarySearchTree, rounds: int = 1000) -> float:
+    n = len(tree)
+    start = time.perf_counter()
+    for i in range(rounds):
+        tree.kth_smallest(1 + (i * 7919) % n, tree.root)
+    return (time.perf_counter() - start) / rounds
+
+
+def report(name: str, tree: BinarySearchTree, n: int) -> None:
+    elapsed = ingest(tree, n)
+    print(f'{name:>20}: {n:>9} keys  ingest {elapsed:8.3f}s  '
+          f'({elapsed / n * 1e6:7.2f} us/key)  height {height(tree.root):>6}  '
+          f'kth_smallest {queries(tree) * 1e6:8.2f} us')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=1_000_000)
+    parser.add_argument('--plain-keys', type=int, default=900)
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * args.plain_keys + 100))
+    report('BinarySearchTree', BinarySearchTree(), args.plain_keys)
+    report('WeightBalancedTree', WeightBalancedTree(), args.keys)
+
+    p = Percentiles(WeightBalancedTree())
+    ingest(p.items, min(args.keys, 100_000))
+    start = time.perf_counter()
+    p.ratio(49, 49)
+    print(f'{"ratio(49, 49)":>20}: {len(p.items):>9} keys  {time.perf_counter() - start:8.4f}s')
+
+
+if __name__ == '__main__':
+    main()
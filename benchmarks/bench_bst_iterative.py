@@ -0,0 +1,127 @@
+""" Microbenchmarks: iterative BinarySearchTree paths vs the old recursive ones.
+
+    python -m benchmarks.bench_bst_iterative [--keys 50000] [--repeat 3]
+
+    RecursiveBinarySearchTree below is the previous implementation of the
+    four hot paths, kept here verbatim as the baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from bst import BinarySearchTree
+from node import TreeNode
+
+
+class RecursiveBinarySearchTree(BinarySearchTree):
+
+    def get_tree_node_by_key_aux(self, current, key):
+        if current is None:
+            raise KeyError('Key not found: {0}'.format(key))
+        elif key == current.key:
+            return current
+        elif key < current.key:
+            return self.get_tree_node_by_key_aux(current.left, key)
+        else:
+            return self.get_tree_node_by_key_aux(current.right, key)
+
+    def insert_aux(self, current, key, item):
+        if current is None:
+            self.length += 1
+            return TreeNode(key, item=item, subtree_size=1)
+        if key < current.key:
+            current.left = self.insert_aux(current.left, key, item)
+        elif key > current.key:
+            current.right = self.insert_aux(current.right, key, item)
+        else:
+            raise ValueError('Inserting duplicate item')
+        return self.rebalance(current)
+
+    def delete_aux(self, current, key):
+        if current is None:
+            raise ValueError('Deleting non-existent item')
+        if key < current.key:
+            current.left = self.delete_aux(current.left, key)
+        elif key > current.key:
+            current.right = self.delete_aux(current.right, key)
+        else:
+            if self.is_leaf(current):
+                self.length -= 1
+                return None
+            elif current.left is None:
+                self.length -= 1
+                return current.right
+            elif current.right is None:
+                self.length -= 1
+                return current.left
+            succ = self.get_successor(current)
+            current.key = succ.key
+            current.item = succ.item
+            current.right = self.delete_aux(current.right, succ.key)
+        return self.rebalance(current)
+
+    def kth_smallest(self, k, current):
+        if current is None:
+            return None
+        left_size = current.left.subtree_size if current.left else 0
+        if k == left_size + 1:
+            return current
+        elif k <= left_size:
+            return self.kth_smallest(k, current.left)
+        else:
+            return self.kth_smallest(k - left_size - 1, current.right)
+
+
+def run(cls: type, keys: list[int]) -> dict[str, float]:
+    tree = cls()
+    timings = {}
+
+    start = time.perf_counter()
+    for key in keys:
+        tree[key] = key
+    timings['insert'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        tree[key]
+    timings['lookup'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for k in range(1, len(keys) + 1):
+        tree.kth_smallest(k, tree.root)
+    timings['kth_smallest'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        del tree[key]
+    timings['delete'] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    keys = random.sample(range(10 * args.keys), args.keys)
+    best = {}
+    for cls in (RecursiveBinarySearchTree, BinarySearchTree):
+        for _ in range(args.repeat):
+            for op, elapsed in run(cls, keys).items():
+                best[cls, op] = min(best.get((cls, op), float('inf')), elapsed)
+
+    print(f'{args.keys} random keys, best of {args.repeat} (us/op)')
+    print(f'{"operation":>14} {"recursive":>10} {"iterative":>10} {"speedup":>8}')
+    for op in ('insert', 'lookup', 'kth_smallest', 'delete'):
+        rec = best[RecursiveBinarySearchTree, op] / args.keys * 1e6
+        it = best[BinarySearchTree, op] / args.keys * 1e6
+        print(f'{op:>14} {rec:>10.2f} {it:>10.2f} {rec / it:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+""" Percentiles throughput by backend: binary trees vs BTree at several fanouts.
+
+    python -m benchmarks.bench_btree [--points 200000] [--fanouts 8 16 32 64 128 256]
+
+    Each backend ingests the same random integer points through add_point,
+    answers a batch of ratio queries, then removes half of the points.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from balanced_bst import WeightBalancedTree
+from bst import BinarySearchTree
+from btree import BTree
+from ratio import Percentiles
+
+
+def run(store, points: list[int], removals: list[int], bands: list[tuple[int, int]]) -> tuple[float, float, float]:
+    p = Percentiles(store)
+
+    start = time.perf_counter()
+    for point in points:
+        p.add_point(point)
+    insert = len(points) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for x, y in bands:
+        p.ratio(x, y)
+    ratio = len(bands) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for point in removals:
+        p.remove_point(point)
+    delete = len(removals) / (time.perf_counter() - start)
+    return insert, delete, ratio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=200_000)
+    parser.add_argument('--fanouts', type=int, nargs='+', default=[8, 16, 32, 64, 128, 256])
+    args = parser.parse_args()
+
+    random.seed(0)
+    points = random.sample(range(50 * args.points), args.points)
+    removals = random.sample(points, args.points // 2)
+    # narrow bands so the query cost is dominated by the descent, not the output
+    bands = [(x, 99 - x - 0.01) for x in (random.uniform(1, 98) for _ in range(2000))]
+
+    backends = [('BinarySearchTree', BinarySearchTree), ('WeightBalancedTree', WeightBalancedTree)]
+    backends += [(f'BTree(fanout={fanout})', lambda fanout=fanout: BTree(fanout)) for fanout in args.fanouts]
+
+    print(f'{args.points} points, {len(bands)} ratio queries (operations per second)')
+    print(f'{"backend":>22} {"insert":>10} {"delete":>10} {"ratio":>10}')
+    for name, make in backends:
+        insert, delete, ratio = run(make(), points, removals, bands)
+        print(f'{name:>22} {insert:>10.0f} {delete:>10.0f} {ratio:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+""" Warm-starting Percentiles: add_point one by one vs add_points in bulk.
+
+    python -m benchmarks.bench_bulk_load [--points 1000000] [--single-points 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from balanced_bst import WeightBalancedTree
+from ratio import Percentiles
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--single-points', type=int, default=200_000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    points = random.sample(range(20 * args.points), args.points)
+    single = points[:args.single_points]
+
+    for name, store in (('BinarySearchTree', None), ('WeightBalancedTree', WeightBalancedTree)):
+        p = Percentiles(store() if store else None)
+        start = time.perf_counter()
+        for point in single:
+            p.add_point(point)
+        elapsed = time.perf_counter() - start
+        print(f'{"add_point x" + str(len(single)):>22} ({name}): {elapsed:8.3f}s  '
+              f'({elapsed / len(single) * 1e6:6.2f} us/point)')
+
+    p = Percentiles()
+    start = time.perf_counter()
+    p.add_points(points)
+    elapsed = time.perf_counter() - start
+    print(f'{"add_points x" + str(len(points)):>22} (bulk load): {elapsed:8.3f}s  '
+          f'({elapsed / len(points) * 1e6:6.2f} us/point)')
+
+    half = len(points) // 2
+    p = Percentiles()
+    p.add_points(points[:half])
+    start = time.perf_counter()
+    p.add_points(points[half:])
+    elapsed = time.perf_counter() - start
+    print(f'{"add_points x" + str(len(points) - half):>22} (merge into {half}): {elapsed:8.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+""" Bounded integer domain: Percentiles(domain=...) (Fenwick tree) vs tree backends.
+
+    python -m benchmarks.bench_fenwick [--points 200000] [--domain 10001]
+
+    Points are drawn with repetition allowed out of range(0, domain), as
+    in the 0..10000 coordinates of tests/test_balancing.py, so every
+    backend runs in multiset mode. Each backend ingests the points through
+    add_point, answers narrow ratio queries, then removes half of them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from balanced_bst import WeightBalancedTree
+from bst import BinarySearchTree
+from fenwick import FenwickTree
+from ratio import Percentiles
+
+
+def run(p, points: list[int], removals: list[int], bands: list[tuple[float, float]]) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    for point in points:
+        p.add_point(point)
+    insert = len(points) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for x, y in bands:
+        p.ratio(x, y)
+    ratio = len(bands) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for point in removals:
+        p.remove_point(point)
+    delete = len(removals) / (time.perf_counter() - start)
+    return insert, delete, ratio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=200_000)
+    parser.add_argument('--domain', type=int, default=10001)
+    args = parser.parse_args()
+
+    random.seed(0)
+    points = [random.randrange(args.domain) for _ in range(args.points)]
+    removals = random.sample(points, args.points // 2)
+    bands = [(x, 99 - x - 0.01) for x in (random.uniform(1, 98) for _ in range(2000))]
+
+    backends = [
+        ('BinarySearchTree', lambda: BinarySearchTree(multiset=True)),
+        ('WeightBalancedTree', lambda: WeightBalancedTree(multiset=True)),
+        ('FenwickTree', lambda: FenwickTree(range(args.domain), multiset=True)),
+    ]
+    print(f'{args.points} points from a domain of {args.domain}, {len(bands)} ratio queries (operations per second)')
+    print(f'{"backend":>22} {"insert":>10} {"delete":>10} {"ratio":>10}')
+    for name, make in backends:
+        insert, delete, ratio = run(Percentiles(make(), cache_size=0), points, removals, bands)
+        print(f'{name:>22} {insert:>10.0f} {delete:>10.0f} {ratio:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+""" BeehiveSelector with a fixed-capacity heap vs a growable one.
+
+    python -m benchmarks.bench_heap_resize [--hives 100000] [--rounds 2]
+
+    steady: the selector holds a constant number of hives while harvests,
+    adds and removals of the best hive alternate. burst: rounds of filling
+    to --hives and draining back to empty with remove_beehive. The fixed
+    selector is sized for the peak up front.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from beehive import Beehive, BeehiveSelector
+
+
+def drop_best(selector: BeehiveSelector) -> None:
+    selector.remove_beehive(selector.store.peek().item)
+
+
+def steady(selector: BeehiveSelector, hives: list[Beehive]) -> int:
+    for hive in hives[:len(hives) // 10]:
+        selector.add_beehive(hive)
+    for hive in hives[len(hives) // 10:]:
+        selector.harvest_best_beehive()
+        selector.add_beehive(hive)
+        drop_best(selector)
+    return selector.store.capacity()
+
+
+def burst(selector: BeehiveSelector, hives: list[Beehive], rounds: int) -> int:
+    for _ in range(rounds):
+        for hive in hives:
+            selector.add_beehive(hive)
+        for _ in hives:
+            drop_best(selector)
+    return selector.store.capacity()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hives', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=2)
+    args = parser.parse_args()
+
+    random.seed(0)
+    hives = [Beehive(i, i, i, capacity=random.randint(1, 1000), nutrient_factor=random.randint(1, 100),
+                     volume=random.randint(0, 2000)) for i in range(args.hives)]
+
+    print(f'{args.hives} hives, {args.rounds} burst rounds (seconds, final capacity)')
+    for workload, run in [('steady', lambda s: steady(s, hives)), ('burst', lambda s: burst(s, hives, args.rounds))]:
+        for name, make in [('fixed', lambda: BeehiveSelector(args.hives)), ('growable', BeehiveSelector)]:
+            start = time.perf_counter()
+            capacity = run(make())
+            print(f'{workload:>7} {name:>9}: {time.perf_counter() - start:7.3f}s  capacity {capacity}')
+
+
+if __name__ == '__main__':
+    main()
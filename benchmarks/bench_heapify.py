@@ -0,0 +1,60 @@
+""" Reloading a BeehiveSelector: n calls to add_beehive vs set_all_beehives (heapify).
+
+    python -m benchmarks.bench_heapify [--hives 1000000]
+
+    Each load is timed with the selector's own key, then repeated with the
+    harvest value wrapped in an int that counts the comparisons rise and
+    sink make on the cached keys. Hives are loaded in random order, where
+    an add rises O(1) levels on average, and in increasing order of value,
+    where every add rises to the root and the loop costs O(n log n).
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from beehive import Beehive, BeehiveSelector
+from benchmarks.bench_replace_max import Counted, counted_value
+from heap import IndexedMaxHeap
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hives', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    hives = [Beehive(i, i, i, capacity=random.randint(1, 1000), nutrient_factor=random.randint(1, 100),
+                     volume=random.randint(0, 2000)) for i in range(args.hives)]
+
+    def selector(counting: bool) -> BeehiveSelector:
+        selector = BeehiveSelector(args.hives)
+        if counting:
+            selector.store = IndexedMaxHeap(args.hives, key=counted_value)
+        return selector
+
+    def one_by_one(counting: bool) -> None:
+        loaded = selector(counting)
+        for hive in hives:
+            loaded.add_beehive(hive)
+
+    def all_at_once(counting: bool) -> None:
+        selector(counting).set_all_beehives(hives)
+
+    print(f'{args.hives} hives')
+    for order in ('random', 'increasing'):
+        if order == 'increasing':
+            hives.sort(key=Beehive.harvest_value)
+        for name, load in [('add_beehive loop', one_by_one), ('set_all_beehives', all_at_once)]:
+            start = time.perf_counter()
+            load(False)
+            elapsed = time.perf_counter() - start
+            Counted.comparisons = 0
+            load(True)
+            print(f'{order:>10} {name:>18}: {elapsed:7.3f}s  {Counted.comparisons:>10} comparisons')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+""" Memory per key: TreeNode-linked BinarySearchTree vs PooledBinarySearchTree.
+
+    python -m benchmarks.bench_pooled_bst [--keys 1000000]
+
+    Keys and items are created before measuring, so the figures are the
+    structural overhead of each layout (as seen by tracemalloc), not the
+    cost of the key objects themselves. Build times include tracemalloc
+    overhead and are only comparable with each other.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from bst import BinarySearchTree
+from pooled_bst import PooledBinarySearchTree
+
+
+def measure(name: str, build) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(tree)
+    print(f'{name:>40}: {current / n:7.1f} bytes/key (peak {peak / n:7.1f})  build {elapsed:7.3f}s')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    keys = random.sample(range(10 * args.keys), args.keys)
+    pairs = sorted((key, key) for key in keys)
+
+    def insert_all(tree):
+        for key in keys:
+            tree[key] = key
+        return tree
+
+    measure('BinarySearchTree (inserts)', lambda: insert_all(BinarySearchTree()))
+    measure('PooledBinarySearchTree (inserts)', lambda: insert_all(PooledBinarySearchTree()))
+    measure('BinarySearchTree.from_sorted', lambda: BinarySearchTree.from_sorted(pairs))
+    measure('PooledBinarySearchTree.from_sorted', lambda: PooledBinarySearchTree.from_sorted(pairs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+""" 50 percentile bands per tick: a loop of ratio calls vs one ratio_many call.
+
+    python -m benchmarks.bench_ratio_many [--points 200000] [--bands 50] [--ticks 5]
+
+    The result cache is turned off and one point is added between ticks,
+    so every tick is answered from the tree.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from balanced_bst import WeightBalancedTree
+from ratio import Percentiles
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=200_000)
+    parser.add_argument('--bands', type=int, default=50)
+    parser.add_argument('--ticks', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    p = Percentiles(WeightBalancedTree(), cache_size=0)
+    p.add_points(random.sample(range(10 * args.points), args.points))
+    bands = [(random.uniform(0, 45), random.uniform(0, 45)) for _ in range(args.bands)]
+    fresh = iter(range(-1, -args.ticks * 10, -1))
+
+    print(f'{args.points} points, {args.bands} bands, {args.ticks} ticks (seconds per tick)')
+    for name, query in [
+        ('ratio loop', lambda: [p.ratio(x, y) for x, y in bands]),
+        ('ratio_many', lambda: p.ratio_many(bands)),
+        ('ratio_count loop', lambda: [p.ratio_count(x, y) for x, y in bands]),
+        ("ratio_many(kind='count')", lambda: p.ratio_many(bands, kind='count')),
+    ]:
+        elapsed = 0.0
+        for _ in range(args.ticks):
+            p.add_point(next(fresh))
+            start = time.perf_counter()
+            query()
+            elapsed += time.perf_counter() - start
+        print(f'{name:>26}: {elapsed / args.ticks:.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+""" Comparisons per harvest: get_max then add vs a single replace_max.
+
+    python -m benchmarks.bench_replace_max [--hives 100000] [--harvests 100000]
+
+    Both selectors start from the same hives, ordered by harvest_value
+    wrapped in an int that counts the comparisons rise and sink make.
+    The get_max + add run reproduces harvest_best_beehive before it
+    switched to replace_max.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from beehive import Beehive, BeehiveSelector
+from heap import IndexedMaxHeap
+
+
+class Counted(int):
+    comparisons = 0
+
+    def __gt__(self, other):
+        Counted.comparisons += 1
+        return int.__gt__(self, other)
+
+    def __le__(self, other):
+        Counted.comparisons += 1
+        return int.__le__(self, other)
+
+
+def counted_value(hive: Beehive) -> Counted:
+    return Counted(hive.harvest_value())
+
+
+def get_max_then_add(selector: BeehiveSelector) -> int:
+    max_beehive = selector.store.peek().item
+    emeralds = selector.store.max_key()
+    if max_beehive.volume > max_beehive.capacity:
+        volume = max_beehive.volume - max_beehive.capacity
+    else:
+        volume = 0
+    if volume != max_beehive.volume:
+        selector.remove_beehive(max_beehive)
+        max_beehive.volume = volume
+        selector.add_beehive(max_beehive)
+    return emeralds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hives', type=int, default=100_000)
+    parser.add_argument('--harvests', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f'{args.hives} hives, {args.harvests} harvests')
+    results = []
+    for name, harvest in [('get_max + add', get_max_then_add), ('replace_max', BeehiveSelector.harvest_best_beehive)]:
+        random.seed(0)
+        selector = BeehiveSelector()
+        selector.store = IndexedMaxHeap(key=counted_value)
+        selector.set_all_beehives([Beehive(i, i, i, capacity=random.randint(1, 1000),
+                                           nutrient_factor=random.randint(1, 100),
+                                           volume=random.randint(0, 2000)) for i in range(args.hives)])
+        Counted.comparisons = 0
+        start = time.perf_counter()
+        results.append([harvest(selector) for _ in range(args.harvests)])
+        elapsed = time.perf_counter() - start
+        print(f'{name:>14}: {elapsed:7.3f}s  {Counted.comparisons / args.harvests:6.2f} comparisons per harvest')
+    assert results[0] == results[1]
+
+
+if __name__ == '__main__':
+    main()
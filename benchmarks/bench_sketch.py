@@ -0,0 +1,68 @@
+""" Accuracy versus memory: ApproxPercentiles (KLL sketch) against the exact tree.
+
+    python -m benchmarks.bench_sketch [--points 500000] [--epsilons 0.05 0.01 0.005 0.001]
+
+    Every backend ingests the same random points through add_point. Memory
+    is the structural overhead seen by tracemalloc (the point objects are
+    created beforehand). Error is the largest distance, as a fraction of
+    the number of points, between the true rank of a ratio band's end
+    points and the rank ratio aims for.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from bisect import bisect_left
+
+from balanced_bst import WeightBalancedTree
+from ratio import Percentiles
+from sketch import ApproxPercentiles
+
+
+def run(p, points: list[float], ordered: list[float], bands: list[tuple[int, int]]) -> tuple[float, float, float]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for point in points:
+        p.add_point(point)
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n = len(points)
+    error = 0
+    for x, y in bands:
+        band = p.ratio(x, y)
+        first, last = p.threshold_ranks(x, y)
+        error = max(error, abs(bisect_left(ordered, band[0]) + 1 - first), abs(bisect_left(ordered, band[-1]) + 1 - last))
+    return memory, n / elapsed, error / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=500_000)
+    parser.add_argument('--epsilons', type=float, nargs='+', default=[0.05, 0.01, 0.005, 0.001])
+    args = parser.parse_args()
+
+    random.seed(0)
+    points = [random.random() for _ in range(args.points)]
+    ordered = sorted(points)
+    bands = [(x, y) for x in (1, 10, 25, 50) for y in (1, 10, 25, 40)]
+
+    backends = [('Percentiles(WeightBalancedTree)', lambda: Percentiles(WeightBalancedTree()))]
+    backends += [(f'ApproxPercentiles({epsilon})', lambda epsilon=epsilon: ApproxPercentiles(epsilon, seed=0))
+                 for epsilon in args.epsilons]
+
+    print(f'{args.points} points, {len(bands)} ratio bands')
+    print(f'{"backend":>32} {"memory":>12} {"inserts/s":>10} {"max error":>10}')
+    for name, make in backends:
+        memory, rate, error = run(make(), points, ordered, bands)
+        print(f'{name:>32} {memory / 1024:>10.0f}KB {rate:>10.0f} {error:>10.4%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+""" Batch workloads: ArrayPercentiles (NumPy sorted blocks) vs tree-backed Percentiles.
+
+    python -m benchmarks.bench_sorted_blocks [--points 1000000] [--batches 10]
+
+    Points arrive and leave in equal batches; after each batch a set of
+    ratio queries is answered. Needs numpy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from balanced_bst import WeightBalancedTree
+from ratio import Percentiles
+from sorted_blocks import ArrayPercentiles, SortedBlocks
+
+
+def run(p, batches: list[np.ndarray], bands: list[tuple[float, float]], as_list: bool) -> tuple[float, float, float]:
+    add = remove = query = 0.0
+    for batch in batches:
+        points = batch.tolist() if as_list else batch
+        start = time.perf_counter()
+        p.add_points(points)
+        add += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for x, y in bands:
+            p.ratio(x, y)
+        query += time.perf_counter() - start
+
+    for batch in batches[::2]:
+        points = batch.tolist() if as_list else batch
+        start = time.perf_counter()
+        p.remove_points(points)
+        remove += time.perf_counter() - start
+    return add, remove, query
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--batches', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    points = rng.permutation(10 * args.points)[:args.points]
+    batches = np.array_split(points, args.batches)
+    # narrow bands, so the tree is not charged for building long lists
+    bands = [(x, 99 - x - 0.01) for x in rng.uniform(1, 98, 100)]
+
+    print(f'{args.points} points in {args.batches} batches, {len(bands)} ratio queries per batch (seconds)')
+    print(f'{"backend":>34} {"add":>8} {"remove":>8} {"ratio":>8}')
+    for name, make, as_list in [
+        ('Percentiles(WeightBalancedTree)', lambda: Percentiles(WeightBalancedTree()), True),
+        ('ArrayPercentiles(SortedBlocks)', lambda: ArrayPercentiles(SortedBlocks(dtype=np.int64)), False),
+    ]:
+        add, remove, query = run(make(), batches, bands, as_list)
+        print(f'{name:>34} {add:>8.3f} {remove:>8.3f} {query:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+""" Delete-heavy churn: eager deletion vs tombstones with compaction.
+
+    python -m benchmarks.bench_tombstones [--points 200000] [--rounds 3]
+
+    Each round removes three quarters of the points through remove_point
+    and adds them back, so the tree keeps its size while most of the work
+    is deletion. Compaction time is included in the tombstone figures.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from balanced_bst import WeightBalancedTree
+from bst import BinarySearchTree
+from ratio import Percentiles
+
+
+def run(store, points: list[int], rounds: int) -> tuple[float, float]:
+    p = Percentiles(store, cache_size=0)
+    p.add_points(points)
+    churn = points[:len(points) * 3 // 4]
+    delete = insert = 0.0
+    for _ in range(rounds):
+        random.shuffle(churn)
+        start = time.perf_counter()
+        for point in churn:
+            p.remove_point(point)
+        delete += time.perf_counter() - start
+        start = time.perf_counter()
+        for point in churn:
+            p.add_point(point)
+        insert += time.perf_counter() - start
+    operations = rounds * len(churn)
+    return operations / delete, operations / insert
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=200_000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    points = random.sample(range(10 * args.points), args.points)
+
+    print(f'{args.points} points, {args.rounds} rounds (operations per second)')
+    print(f'{"backend":>40} {"delete":>10} {"insert":>10}')
+    for name, make in [
+        ('BinarySearchTree', lambda: BinarySearchTree()),
+        ('BinarySearchTree(tombstones=True)', lambda: BinarySearchTree(tombstones=True)),
+        ('WeightBalancedTree', lambda: WeightBalancedTree()),
+        ('WeightBalancedTree(tombstones=True)', lambda: WeightBalancedTree(tombstones=True)),
+    ]:
+        delete, insert = run(make(), points, args.rounds)
+        print(f'{name:>40} {delete:>10.0f} {insert:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
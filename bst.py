@@ -10,8 +10,9 @@ from typing import Optional
 __author__ = 'Brendon Taylor, modified by Alexey Ignatiev, further modified by Jackson Goerner'
 __docformat__ = 'reStructuredText'
 
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Iterable, Iterator
 from node import TreeNode
+import copy
 import sys
 
 
@@ -24,14 +25,121 @@ T = TypeVar('T')
 class BinarySearchTree(Generic[K, I]):
     """ Basic binary search tree. """
 
-    def __init__(self) -> None:
+    # in tombstone mode, the share of dead nodes beyond which the tree is rebuilt
+    MAX_DEAD_FRACTION = 0.5
+
+    def __init__(self, persistent: bool = False, multiset: bool = False, tombstones: bool = False) -> None:
         """
             Initialises an empty Binary Search Tree
+            In persistent mode no node is ever modified once it is reachable
+            from a published root: every mutation copies the O(D) nodes on its
+            path and then swaps in the new root, so snapshot() is O(1).
+            In multiset mode a duplicate key increments the count of its node
+            instead of raising, and subtree_size and the length sum the counts.
+            In tombstone mode a delete only drops the count of its node to 0,
+            leaving it in place as a dead node that every query skips and a
+            later insert of the key revives. Once dead nodes make up more than
+            MAX_DEAD_FRACTION of the nodes it is rebuilt perfectly balanced.
             :complexity: O(1)
         """
 
         self.root = None
         self.length = 0
+        self.persistent = persistent
+        self.multiset = multiset
+        self.tombstones = tombstones
+        self.dead = 0
+        # live and dead nodes; None when unknown after a split or union
+        self.nodes = 0
+
+    @classmethod
+    def from_sorted(cls, pairs: Iterable[tuple[K, I]]) -> BinarySearchTree[K, I]:
+        """
+            Builds a perfectly balanced tree from (key, item) pairs given in
+            strictly increasing key order.
+            :complexity: O(N) where N is the number of pairs
+            :raises ValueError: if the keys are not strictly increasing
+        """
+        tree = cls()
+        tree.load_sorted(pairs)
+        return tree
+
+    @classmethod
+    def from_iterable(cls, pairs: Iterable[tuple[K, I]]) -> BinarySearchTree[K, I]:
+        """
+            Builds a perfectly balanced tree from (key, item) pairs in any order.
+            :complexity: O(N log N) for the sort, then O(N) to build
+            :raises ValueError: if a key appears more than once
+        """
+        return cls.from_sorted(sorted(pairs, key=lambda pair: pair[0]))
+
+    def load_sorted(self, pairs: Iterable[tuple[K, I]]) -> None:
+        """
+            Replaces the contents of the tree with a perfectly balanced tree
+            built from (key, item) pairs in strictly increasing key order.
+            Every subtree_size is set directly, with no per-key descent.
+            In multiset mode keys only need to be non-decreasing; repeats of
+            a key are folded into the count of a single node.
+            :complexity: O(N) where N is the number of pairs
+            :raises ValueError: if the keys are not strictly increasing
+        """
+        keys, items, counts = [], [], []
+        for key, item in pairs:
+            if keys and not keys[-1] < key:
+                if not (self.multiset and keys[-1] == key):
+                    raise ValueError('Keys must be unique and sorted')
+                counts[-1] += 1
+                continue
+            keys.append(key)
+            items.append(item)
+            counts.append(1)
+
+        self.root = self.build_balanced(keys, items, counts, 0, len(keys))
+        self.length = sum(counts)
+        self.dead = 0
+        self.nodes = len(keys)
+
+    def build_balanced(self, keys: list[K], items: list[I], counts: list[int], lo: int, hi: int) -> Optional[TreeNode]:
+        """
+            Builds a perfectly balanced subtree over keys[lo:hi], with the
+            matching items and counts.
+            :complexity: O(hi - lo)
+        """
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        current = TreeNode(keys[mid], item=items[mid], count=counts[mid])
+        current.left = self.build_balanced(keys, items, counts, lo, mid)
+        current.right = self.build_balanced(keys, items, counts, mid + 1, hi)
+        self.update_size(current)
+        return current
+
+    def in_order(self) -> Iterator[TreeNode]:
+        """
+            Yields every live node of the tree in increasing key order, using
+            an explicit stack rather than recursion.
+            :complexity: O(N) for the whole traversal, O(D) extra space
+        """
+        stack = []
+        current = self.root
+        while stack or current is not None:
+            while current is not None:
+                stack.append(current)
+                current = current.left
+            current = stack.pop()
+            if current.count:
+                yield current
+            current = current.right
+
+    def iter_pairs(self) -> Iterator[tuple[K, I]]:
+        """
+            Yields (key, item) for every element in increasing key order,
+            repeating a key once per unit of its count.
+            :complexity: O(N) for the whole traversal, O(D) extra space
+        """
+        for node in self.in_order():
+            for _ in range(node.count):
+                yield node.key, node.item
 
     def is_empty(self) -> bool:
         """
@@ -70,73 +178,215 @@ class BinarySearchTree(Generic[K, I]):
         return self.get_tree_node_by_key_aux(self.root, key)
 
     def get_tree_node_by_key_aux(self, current: TreeNode, key: K) -> TreeNode:
-        if current is None:
-            raise KeyError('Key not found: {0}'.format(key))
-        elif key == current.key:
-            return current
-        elif key < current.key:
-            return self.get_tree_node_by_key_aux(current.left, key)
-        else:  # key > current.key
-            return self.get_tree_node_by_key_aux(current.right, key)
+        """
+            Walks down from current to the node holding key.
+            :complexity: O(CompK * D) where D is the depth of the tree
+            :raises KeyError: if the key is not in the subtree
+        """
+        while current is not None:
+            if key == current.key:
+                if current.count == 0:  # a tombstone
+                    break
+                return current
+            elif key < current.key:
+                current = current.left
+            else:  # key > current.key
+                current = current.right
+        raise KeyError('Key not found: {0}'.format(key))
 
     def __setitem__(self, key: K, item: I) -> None:
         self.root = self.insert_aux(self.root, key, item)
 
     def insert_aux(self, current: TreeNode, key: K, item: I) -> TreeNode:
         """
-            Overriding the method to maintain subtree_size field
+            Inserts key below current and returns the new subtree root,
+            maintaining subtree_size on the way back up. In multiset mode a
+            duplicate key increments the count of its node instead, and in
+            tombstone mode the dead node of a key is revived.
+            The descent is iterative: the path is kept on an explicit stack,
+            so degenerate trees cannot exhaust the recursion limit.
+            :complexity: O(CompK * D) where D is the depth of the tree
         """
-        if current is None:
-            self.length += 1
-            return TreeNode(key, item=item, subtree_size=1)
-
-        if key < current.key:
-            current.left = self.insert_aux(current.left, key, item)
-        elif key > current.key:
-            current.right = self.insert_aux(current.right, key, item)
-        else:
-            raise ValueError('Inserting duplicate item')
-
-        current.subtree_size = 1 + (current.left.subtree_size if current.left else 0) + \
-                            (current.right.subtree_size if current.right else 0)
-
-        return current
+        path = []
+        while current is not None:
+            path.append(current)
+            if key < current.key:
+                current = current.left
+            elif key > current.key:
+                current = current.right
+            elif self.multiset or current.count == 0:
+                path.pop()
+                current = self.touch(current)
+                if current.count == 0:
+                    # reviving a tombstone
+                    self.dead -= 1
+                    current.item = item
+                current.count += 1
+                self.length += 1
+                return self.relink(path, key, self.rebalance(current))
+            else:
+                raise ValueError('Inserting duplicate item')
+
+        self.length += 1
+        if self.nodes is not None:
+            self.nodes += 1
+        return self.relink(path, key, TreeNode(key, item=item, subtree_size=1))
 
     def __delitem__(self, key: K) -> None:
         self.root = self.delete_aux(self.root, key)
+        # dead counts nodes, so it is weighed against nodes: in multiset
+        # mode a live node can hold many elements of length
+        if self.dead and self.dead > self.MAX_DEAD_FRACTION * self.node_count():
+            self.compact()
+
+    def node_count(self) -> int:
+        """
+            Returns the number of nodes, live and dead, counting them once
+            after a split or union left the number unknown.
+            :complexity: O(1), O(N) the first time after a split or union
+        """
+        if self.nodes is None:
+            self.nodes = 0
+            stack = [self.root] if self.root is not None else []
+            while stack:
+                current = stack.pop()
+                self.nodes += 1
+                stack.extend(child for child in (current.left, current.right) if child is not None)
+        return self.nodes
 
     def delete_aux(self, current: TreeNode, key: K) -> TreeNode:
         """
-            Overriding the method to maintain subtree_size field
+            Deletes key below current and returns the new subtree root,
+            maintaining subtree_size on the way back up.
+            A node with two children takes over the key, item and count of
+            its successor, which is then spliced out of the right subtree.
+            In multiset mode only one copy of key is removed. In tombstone
+            mode the node is only marked dead and the sizes on the path are
+            decremented in place: nothing is spliced out or rotated, so the
+            balance of the tree is only restored by the next compaction.
+            :complexity: O(CompK * D) where D is the depth of the tree
         """
-        if current is None:
+        path = []
+        while current is not None and key != current.key:
+            path.append(current)
+            if key < current.key:
+                current = current.left
+            else:
+                current = current.right
+
+        if current is None or current.count == 0:
             raise ValueError('Deleting non-existent item')
 
-        if key < current.key:
-            current.left = self.delete_aux(current.left, key)
-        elif key > current.key:
-            current.right = self.delete_aux(current.right, key)
+        self.length -= 1
+        # whether a node leaves the tree, rather than losing one copy
+        spliced = current.count == 1 and not self.tombstones
+        if self.tombstones and not self.persistent:
+            # nothing moves, so the sizes on the path are patched in place
+            for node in path:
+                node.subtree_size -= 1
+            current.subtree_size -= 1
+            current.count -= 1
+            if current.count == 0:
+                self.dead += 1
+            return path[0] if path else current
+        elif current.count > 1 or self.tombstones:
+            current = self.touch(current)
+            current.count -= 1
+            if current.count == 0:
+                self.dead += 1
+            replacement = self.rebalance(current)
+        elif current.left is None:
+            replacement = current.right
+        elif current.right is None:
+            replacement = current.left
         else:
-            if self.is_leaf(current):
-                self.length -= 1
-                return None
-            elif current.left is None:
-                self.length -= 1
-                return current.right
-            elif current.right is None:
-                self.length -= 1
-                return current.left
-
-            succ = self.get_successor(current)
+            succ_path = []
+            succ = current.right
+            while succ.left is not None:
+                succ_path.append(succ)
+                succ = succ.left
+            current = self.touch(current)
             current.key  = succ.key
             current.item = succ.item
-            current.right = self.delete_aux(current.right, succ.key)
+            current.count = succ.count
+            current.right = self.relink(succ_path, succ.key, succ.right)
+            replacement = self.rebalance(current)
 
-        current.subtree_size = 1 + (current.left.subtree_size if current.left else 0) + \
-                            (current.right.subtree_size if current.right else 0)
+        if self.nodes is not None and spliced:
+            self.nodes -= 1
+        return self.relink(path, key, replacement)
 
+    def relink(self, path: list[TreeNode], key: K, child: Optional[TreeNode]) -> Optional[TreeNode]:
+        """
+            Walks a root-to-leaf search path for key bottom-up, hanging child
+            (the new subtree) back under its parent and rebalancing every node
+            on the way. Returns the new root of the topmost node on the path.
+            In persistent mode the path nodes are copied rather than modified.
+            :complexity: O(D) where D is the length of the path
+        """
+        rebalance = self.rebalance
+        persistent = self.persistent
+        for node in reversed(path):
+            if persistent:
+                node = node.copy()
+            if key < node.key:
+                node.left = child
+            else:
+                node.right = child
+            child = rebalance(node)
+        return child
+
+    def rebalance(self, current: TreeNode) -> TreeNode:
+        """
+            Restores the invariants of the subtree rooted at current after one of
+            its children changed, and returns the (possibly new) subtree root.
+            A plain BST never restructures, so this only refreshes subtree_size;
+            balanced subclasses override it to rotate as well.
+            :pre: current has already been passed through touch
+            :complexity: O(1)
+        """
+        self.update_size(current)
         return current
 
+    def touch(self, current: TreeNode) -> TreeNode:
+        """
+            Returns the node to write to in place of current: current itself,
+            or in persistent mode a fresh copy, so that nodes shared with
+            snapshots are never modified. Every method that modifies an
+            existing node must go through this.
+            :complexity: O(1)
+        """
+        return current.copy() if self.persistent else current
+
+    def compact(self) -> None:
+        """
+            Rebuilds the tree perfectly balanced from its live nodes, dropping
+            every tombstone.
+            :complexity: O(N) where N is the number of nodes
+        """
+        self.load_sorted(self.iter_pairs())
+
+    def snapshot(self) -> BinarySearchTree[K, I]:
+        """
+            Returns an independent tree holding the current contents.
+            In persistent mode the snapshot shares every node with this tree
+            and is safe to read from other threads while this one is being
+            modified; otherwise the contents are copied.
+            :complexity: O(1) in persistent mode, O(N) otherwise
+        """
+        if self.persistent:
+            return self.with_root(self.root)
+        tree = self.with_root(None)
+        tree.load_sorted(self.iter_pairs())
+        return tree
+
+    def update_size(self, current: TreeNode) -> None:
+        """
+            Recomputes subtree_size of current from its count and its children.
+            :complexity: O(1)
+        """
+        current.subtree_size = current.count + (current.left.subtree_size if current.left else 0) + \
+                            (current.right.subtree_size if current.right else 0)
 
     def get_successor(self, node: Optional[TreeNode]) -> Optional[TreeNode]:
         """
@@ -194,6 +444,22 @@ class BinarySearchTree(Generic[K, I]):
         return current
 
 
+    def get_maximal(self, current: Optional[TreeNode]) -> Optional[TreeNode]:
+        """
+        Get the node with the largest key in the current sub-tree, i.e. the
+        rightmost node. If the current node is None, it returns None.
+
+        :complexity: O(h), where h is the height of the tree.
+        """
+        if current is None:
+            return None
+
+        while current.right is not None:
+            current = current.right
+
+        return current
+
+
     def is_leaf(self, current: TreeNode) -> bool:
         """ Simple check whether or not the node is a leaf. """
 
@@ -223,7 +489,7 @@ class BinarySearchTree(Generic[K, I]):
         """
         Finds the kth smallest node by key in the subtree rooted at the current node.
 
-        The function takes in an integer k and a TreeNode current. It then recursively 
+        The function takes in an integer k and a TreeNode current. It then iteratively 
         searches for the kth smallest node in the subtree with 'current' as the root. 
         If current is None or if k is larger than the size of the tree rooted at current, 
         it returns None.
@@ -240,14 +506,427 @@ class BinarySearchTree(Generic[K, I]):
         of the tree to find the kth smallest node. This assumes that the subtree_size 
         field is being properly maintained.
         """
-        if current is None:
+        while current is not None:
+            left_size = current.left.subtree_size if current.left else 0
+
+            if k <= left_size:  # the kth node is in the left subtree
+                current = current.left
+            elif k <= left_size + current.count:  # current is the kth node
+                return current
+            else:  # the kth node is in the right subtree
+                k -= left_size + current.count
+                current = current.right
+        return None
+
+    def rank(self, key: K) -> int:
+        """
+            Returns the number of keys in the tree that are less than or equal
+            to key. For a key in the tree this is the inverse of kth_smallest:
+            kth_smallest(rank(key), root).key == key.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        return self.rank_aux(key, inclusive=True)
+
+    def count_range(self, lo: K, hi: K) -> int:
+        """
+            Returns the number of keys k with lo <= k <= hi, using subtree_size
+            rather than visiting the keys themselves.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        if hi < lo:
+            return 0
+        return self.rank_aux(hi, inclusive=True) - self.rank_aux(lo, inclusive=False)
+
+    def rank_aux(self, key: K, inclusive: bool) -> int:
+        """
+            Counts the keys below key (and equal to it when inclusive) by
+            summing the left subtree sizes passed on the way down.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        count = 0
+        current = self.root
+        while current is not None:
+            if key < current.key or (key == current.key and not inclusive):
+                current = current.left
+            else:
+                count += (current.left.subtree_size if current.left else 0) + current.count
+                if key == current.key:
+                    break
+                current = current.right
+        return count
+
+    def iter_range(self, lo: K, hi: K) -> Iterator[K]:
+        """
+            Lazily yields the keys k with lo <= k <= hi in increasing order,
+            each as many times as its count.
+            Only the O(D) nodes on the current path are held at any time.
+            :complexity: O(CompK * D) to reach the first key, then O(1) amortised per key
+        """
+        stack = []
+        current = self.root
+        while True:
+            while current is not None:
+                if current.key < lo:
+                    current = current.right
+                else:
+                    stack.append(current)
+                    current = current.left
+            if not stack:
+                return
+            current = stack.pop()
+            if hi < current.key:
+                return
+            for _ in range(current.count):
+                yield current.key
+            current = current.right
+
+    def join_aux(self, left: Optional[TreeNode], mid: TreeNode, right: Optional[TreeNode]) -> TreeNode:
+        """
+            Joins two subtrees around mid, where every key in left is smaller
+            than mid.key and every key in right is larger. This is the only
+            operation split, join and union need from the tree; a plain BST
+            just hangs both sides under mid, balanced subclasses restructure.
+            :complexity: O(1)
+        """
+        mid = self.touch(mid)
+        mid.left = left
+        mid.right = right
+        self.update_size(mid)
+        return mid
+
+    def split_aux(self, current: Optional[TreeNode], key: K) -> tuple[Optional[TreeNode], Optional[TreeNode], Optional[TreeNode]]:
+        """
+            Splits the subtree rooted at current into the keys smaller than
+            key, the node holding key (if any, detached) and the keys larger.
+            The search path is kept on an explicit stack and the two halves
+            are assembled bottom-up along it, so degenerate trees cannot
+            exhaust the recursion limit.
+            :complexity: O(D) calls to join_aux, where D is the depth of the tree
+        """
+        path = []
+        while current is not None and current.key != key:
+            path.append(current)
+            current = current.left if key < current.key else current.right
+
+        smaller = found = larger = None
+        if current is not None:
+            smaller, larger = current.left, current.right
+            found = self.touch(current)
+            found.left = found.right = None
+            self.update_size(found)
+        for node in reversed(path):
+            if key < node.key:
+                larger = self.join_aux(larger, node, node.right)
+            else:
+                smaller = self.join_aux(node.left, node, smaller)
+        return smaller, found, larger
+
+    def split_last(self, current: TreeNode) -> tuple[Optional[TreeNode], TreeNode]:
+        """
+            Detaches the largest node of the subtree rooted at current and
+            returns the remaining subtree together with that node.
+            The right spine is walked iteratively.
+            :complexity: O(D) calls to join_aux, where D is the depth of the tree
+        """
+        path = []
+        while current.right is not None:
+            path.append(current)
+            current = current.right
+        rest = current.left
+        last = self.touch(current)
+        last.left = None
+        self.update_size(last)
+        for node in reversed(path):
+            rest = self.join_aux(node.left, node, rest)
+        return rest, last
+
+    def join2(self, left: Optional[TreeNode], right: Optional[TreeNode]) -> Optional[TreeNode]:
+        """
+            Joins two subtrees where every key in left is smaller than every key in right.
+            :complexity: O(D) calls to join_aux, where D is the depth of the tree
+        """
+        if left is None:
+            return right
+        rest, last = self.split_last(left)
+        return self.join_aux(rest, last, right)
+
+    def union_aux(self, current: Optional[TreeNode], other: Optional[TreeNode]) -> Optional[TreeNode]:
+        """
+            Merges two subtrees by splitting other around the root of current
+            and merging both halves. A key present in both keeps the
+            node from current; in multiset mode the counts are added.
+            The divide and conquer runs on an explicit stack of pending
+            merges and joins, so degenerate trees cannot exhaust the
+            recursion limit.
+            :complexity: O(m log(n/m + 1)) on a balanced tree, for sizes m <= n
+        """
+        # ('merge', current, other) merges two subtrees onto results;
+        # ('join', node) joins the two topmost results around node
+        tasks = [('merge', current, other)]
+        results = []
+        while tasks:
+            task = tasks.pop()
+            if task[0] == 'join':
+                right = results.pop()
+                left = results.pop()
+                results.append(self.join_aux(left, task[1], right))
+                continue
+            _, current, other = task
+            if current is None or other is None:
+                results.append(other if current is None else current)
+                continue
+            smaller, found, larger = self.split_aux(other, current.key)
+            if found is not None and self.multiset:
+                current = self.touch(current)
+                current.count += found.count
+            # the left half is merged first, so it lands below the right half
+            tasks.append(('join', current))
+            tasks.append(('merge', current.right, larger))
+            tasks.append(('merge', current.left, smaller))
+        return results.pop()
+
+    def split(self, key: K) -> tuple[BinarySearchTree[K, I], BinarySearchTree[K, I]]:
+        """
+            Splits the tree into two trees of the same kind, holding the keys
+            smaller than key and the keys greater than or equal to key.
+            The nodes are moved, not copied: this tree is left empty.
+            In tombstone mode the tree is compacted first.
+            :complexity: O(D) calls to join_aux, where D is the depth of the tree
+        """
+        if self.dead:
+            self.compact()
+        smaller, found, larger = self.split_aux(self.root, key)
+        if found is not None:
+            larger = self.join_aux(None, found, larger)
+        self.root, self.length, self.nodes = None, 0, 0
+        return self.with_root(smaller), self.with_root(larger)
+
+    def join(self, other: BinarySearchTree[K, I]) -> None:
+        """
+            Appends every node of other, whose keys must all be larger than
+            the keys of this tree, and leaves other empty.
+            :complexity: O(D) calls to join_aux, where D is the depth of the taller tree
+            :raises ValueError: if the key ranges overlap
+        """
+        for tree in (self, other):
+            if tree.dead:
+                tree.compact()
+        if self.root is not None and other.root is not None and \
+                not self.get_maximal(self.root).key < other.get_minimal(other.root).key:
+            raise ValueError('Joined trees must not overlap')
+        self.root = self.join2(self.root, other.root)
+        self.length += other.length
+        self.nodes = None if self.nodes is None or other.nodes is None else self.nodes + other.nodes
+        other.root, other.length, other.nodes = None, 0, 0
+
+    def union(self, other: BinarySearchTree[K, I]) -> None:
+        """
+            Merges every node of other into this tree and leaves other empty.
+            When both trees hold a key, the item of this tree is kept (and in
+            multiset mode the counts are added). Tombstones are compacted away first.
+            :complexity: O(m log(n/m + 1)) on a balanced tree, for sizes m <= n
+        """
+        for tree in (self, other):
+            if tree.dead:
+                tree.compact()
+        self.root = self.union_aux(self.root, other.root)
+        self.length = self.root.subtree_size if self.root else 0
+        self.nodes = None
+        other.root, other.length, other.nodes = None, 0, 0
+
+    def with_root(self, root: Optional[TreeNode]) -> BinarySearchTree[K, I]:
+        """
+            Returns a new tree of the same kind and configuration as this one,
+            holding the subtree rooted at root.
+            :complexity: O(1)
+        """
+        tree = copy.copy(self)
+        if root is not self.root:
+            tree.nodes = None if root is not None else 0
+        tree.root = root
+        tree.length = root.subtree_size if root else 0
+        return tree
+
+    def cursor(self) -> BSTCursor[K, I]:
+        """
+            Returns an unpositioned in-order cursor over this tree.
+            :complexity: O(1)
+        """
+        return BSTCursor(self)
+
+
+class BSTCursor(Generic[K, I]):
+    """
+        Bidirectional in-order cursor over a BinarySearchTree.
+
+        The cursor keeps the path from the root to its current node on an
+        explicit stack, which is all it needs to find the in-order successor
+        or predecessor of any node, so next() and prev() cost O(1) amortised.
+        Stepping past either end leaves the cursor unpositioned until the next
+        seek, and tombstones are stepped over. Any mutation of the tree
+        invalidates the cursor.
+    """
+
+    def __init__(self, tree: BinarySearchTree[K, I]) -> None:
+        """
+            Creates an unpositioned cursor over tree.
+            :complexity: O(1)
+        """
+        self.tree = tree
+        self.stack = []
+
+    @property
+    def node(self) -> Optional[TreeNode]:
+        """ The node the cursor is positioned at, or None. """
+        return self.stack[-1] if self.stack else None
+
+    def is_valid(self) -> bool:
+        """ Checks whether the cursor is positioned at a node. """
+        return bool(self.stack)
+
+    def seek(self, key: K) -> Optional[TreeNode]:
+        """
+            Positions the cursor at the node with the smallest key >= key.
+            :complexity: O(CompK * D) where D is the depth of the tree
+            :returns: that node, or None (unpositioned) if every key is smaller
+        """
+        stack = self.stack
+        stack.clear()
+        found = 0
+        current = self.tree.root
+        while current is not None:
+            stack.append(current)
+            if current.key < key:
+                current = current.right
+            else:
+                found = len(stack)
+                if current.key == key:
+                    break
+                current = current.left
+        del stack[found:]
+        return self.skip_dead(forward=True)
+
+    def seek_rank(self, k: int) -> Optional[TreeNode]:
+        """
+            Positions the cursor at the node holding the kth smallest element (1-based).
+            :complexity: O(D) where D is the depth of the tree
+            :returns: that node, or None (unpositioned) if k is out of range
+        """
+        stack = self.stack
+        stack.clear()
+        current = self.tree.root
+        while current is not None:
+            stack.append(current)
+            left_size = current.left.subtree_size if current.left else 0
+            if k <= left_size:
+                current = current.left
+            elif k <= left_size + current.count:
+                return current
+            else:
+                k -= left_size + current.count
+                current = current.right
+        stack.clear()
+        return None
+
+    def seek_first(self) -> Optional[TreeNode]:
+        """
+            Positions the cursor at the smallest node.
+            :complexity: O(D) where D is the depth of the tree
+        """
+        self.stack.clear()
+        self.push_spine(self.tree.root, left=True)
+        return self.skip_dead(forward=True)
+
+    def seek_last(self) -> Optional[TreeNode]:
+        """
+            Positions the cursor at the largest node.
+            :complexity: O(D) where D is the depth of the tree
+        """
+        self.stack.clear()
+        self.push_spine(self.tree.root, left=False)
+        return self.skip_dead(forward=False)
+
+    def next(self) -> Optional[TreeNode]:
+        """
+            Moves the cursor to the in-order successor of its node.
+            :complexity: O(1) amortised, O(D) worst case
+            :returns: the new node, or None once the cursor steps past the largest key
+        """
+        self.successor()
+        return self.skip_dead(forward=True)
+
+    def successor(self) -> Optional[TreeNode]:
+        """
+            Moves the cursor to the in-order successor of its node, dead or alive.
+            :complexity: O(1) amortised, O(D) worst case
+        """
+        stack = self.stack
+        if not stack:
+            return None
+        current = stack[-1]
+        if current.right is not None:
+            self.push_spine(current.right, left=True)
+        else:
+            # climb until we leave a left subtree; ancestors with smaller keys were already visited
+            stack.pop()
+            while stack and stack[-1].key < current.key:
+                stack.pop()
+        return self.node
+
+    def prev(self) -> Optional[TreeNode]:
+        """
+            Moves the cursor to the in-order predecessor of its node.
+            :complexity: O(1) amortised, O(D) worst case
+            :returns: the new node, or None once the cursor steps past the smallest key
+        """
+        self.predecessor()
+        return self.skip_dead(forward=False)
+
+    def predecessor(self) -> Optional[TreeNode]:
+        """
+            Moves the cursor to the in-order predecessor of its node, dead or alive.
+            :complexity: O(1) amortised, O(D) worst case
+        """
+        stack = self.stack
+        if not stack:
             return None
+        current = stack[-1]
+        if current.left is not None:
+            self.push_spine(current.left, left=False)
+        else:
+            stack.pop()
+            while stack and current.key < stack[-1].key:
+                stack.pop()
+        return self.node
 
-        left_size = current.left.subtree_size if current.left else 0
+    def skip_dead(self, forward: bool) -> Optional[TreeNode]:
+        """
+            Steps on from a tombstone, forwards or backwards, until the cursor
+            is at a live node or unpositioned.
+            :complexity: O(1) when the node is live
+        """
+        node = self.node
+        while node is not None and node.count == 0:
+            node = self.successor() if forward else self.predecessor()
+        return node
 
-        if k == left_size + 1:  # current is the kth node
-            return current
-        elif k <= left_size:  # the kth node is in the left subtree
-            return self.kth_smallest(k, current.left)
-        else:  # the kth node is in the right subtree
-            return self.kth_smallest(k - left_size - 1, current.right)
+    def push_spine(self, current: Optional[TreeNode], left: bool) -> None:
+        """
+            Pushes current and its chain of left (or right) descendants.
+            :complexity: O(D) where D is the depth of the tree
+        """
+        while current is not None:
+            self.stack.append(current)
+            current = current.left if left else current.right
+
+    def __iter__(self) -> Iterator[K]:
+        """
+            Yields the key under the cursor and every larger key, each as many
+            times as its count, advancing the cursor as it goes.
+            :complexity: O(1) amortised per key
+        """
+        node = self.node
+        while node is not None:
+            for _ in range(node.count):
+                yield node.key
+            node = self.next()
@@ -0,0 +1,643 @@
+""" Order-statistic B+ tree ADT.
+    An alternative ordered map for Percentiles with the same contract as
+    bst.BinarySearchTree (__setitem__, __delitem__, __getitem__,
+    kth_smallest, rank, count_range, iter_range, cursor, ...).
+    Each node packs up to `fanout` keys into flat lists, so lookups chase
+    O(log_fanout n) references instead of O(log2 n) TreeNodes, and every
+    internal node keeps the size of each child for order statistics.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from typing import Generic, Iterable, Iterator, NamedTuple, Optional, TypeVar, Union
+
+
+K = TypeVar('K')
+I = TypeVar('I')
+
+
+class BTreeEntry(NamedTuple):
+    """ A key of a BTree with its item and count, as returned by kth_smallest. """
+
+    key: K
+    item: I
+    count: int = 1
+
+
+class BTreeLeaf:
+    """ Leaf node: sorted keys with their items and counts, linked to its neighbours. """
+
+    __slots__ = ('keys', 'items', 'counts', 'size', 'prev', 'next')
+
+    def __init__(self, keys: list = None, items: list = None, counts: list = None) -> None:
+        self.keys = keys if keys is not None else []
+        self.items = items if items is not None else []
+        self.counts = counts if counts is not None else []
+        self.size = sum(self.counts)
+        self.prev: Optional[BTreeLeaf] = None
+        self.next: Optional[BTreeLeaf] = None
+
+
+class BTreeInternal:
+    """
+        Internal node: children[i] holds the keys k with
+        keys[i-1] <= k < keys[i], and sizes[i] is its number of elements.
+    """
+
+    __slots__ = ('keys', 'children', 'sizes', 'size')
+
+    def __init__(self, keys: list, children: list, sizes: list) -> None:
+        self.keys = keys
+        self.children = children
+        self.sizes = sizes
+        self.size = sum(sizes)
+
+
+BTreeNode = Union[BTreeLeaf, BTreeInternal]
+
+
+class BTree(Generic[K, I]):
+    """
+        B+ tree keeping all entries in linked leaves.
+
+        Every node other than the root holds between fanout // 2 and fanout
+        entries (leaves) or children (internal nodes). Like BinarySearchTree,
+        a duplicate key raises ValueError unless the tree is in multiset
+        mode, where it increments the count of the key instead.
+    """
+
+    MIN_FANOUT = 4
+
+    def __init__(self, fanout: int = 64, multiset: bool = False) -> None:
+        """
+            Initialises an empty tree whose nodes hold up to fanout entries.
+            :complexity: O(1)
+            :raises ValueError: if fanout is smaller than MIN_FANOUT
+        """
+        if fanout < self.MIN_FANOUT:
+            raise ValueError('Fanout should be at least {0}.'.format(self.MIN_FANOUT))
+        self.fanout = fanout
+        self.min_fill = fanout // 2
+        self.multiset = multiset
+        self.root: BTreeNode = BTreeLeaf()
+        self.length = 0
+
+    @classmethod
+    def from_sorted(cls, pairs: Iterable[tuple[K, I]], fanout: int = 64) -> BTree[K, I]:
+        """
+            Builds a tree from (key, item) pairs in strictly increasing key order.
+            :complexity: O(N) where N is the number of pairs
+            :raises ValueError: if the keys are not strictly increasing
+        """
+        tree = cls(fanout)
+        tree.load_sorted(pairs)
+        return tree
+
+    def is_empty(self) -> bool:
+        """
+            Checks to see if the tree is empty
+            :complexity: O(1)
+        """
+        return self.length == 0
+
+    def __len__(self) -> int:
+        """ Returns the number of elements in the tree. """
+
+        return self.length
+
+    def __contains__(self, key: K) -> bool:
+        """
+            Checks to see if the key is in the tree
+            :complexity: O(log N)
+        """
+        try:
+            _ = self[key]
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def find_leaf(self, key: K) -> BTreeLeaf:
+        """
+            Returns the leaf that holds key, or would hold it.
+            :complexity: O(log N)
+        """
+        current = self.root
+        while type(current) is BTreeInternal:
+            current = current.children[bisect_right(current.keys, key)]
+        return current
+
+    def __getitem__(self, key: K) -> I:
+        """
+            Returns the item stored under key.
+            :complexity: O(log N)
+            :raises KeyError: if the key is not in the tree
+        """
+        leaf = self.find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i == len(leaf.keys) or leaf.keys[i] != key:
+            raise KeyError('Key not found: {0}'.format(key))
+        return leaf.items[i]
+
+    def __setitem__(self, key: K, item: I) -> None:
+        """
+            Inserts key, splitting full nodes on the way back up.
+            :complexity: O(fanout * log_fanout N)
+            :raises ValueError: if the key is already present (outside multiset mode)
+        """
+        split = self.insert_aux(self.root, key, item)
+        if split is not None:
+            separator, right = split
+            self.root = BTreeInternal([separator], [self.root, right], [self.root.size, right.size])
+        self.length += 1
+
+    def insert_aux(self, current: BTreeNode, key: K, item: I) -> Optional[tuple[K, BTreeNode]]:
+        """
+            Inserts key below current. Returns (separator, new right sibling)
+            if current overflowed and was split, otherwise None.
+            :complexity: O(fanout * log_fanout N)
+        """
+        if type(current) is BTreeLeaf:
+            i = bisect_left(current.keys, key)
+            if i < len(current.keys) and current.keys[i] == key:
+                if not self.multiset:
+                    raise ValueError('Inserting duplicate item')
+                current.counts[i] += 1
+            else:
+                current.keys.insert(i, key)
+                current.items.insert(i, item)
+                current.counts.insert(i, 1)
+            current.size += 1
+            if len(current.keys) > self.fanout:
+                return self.split_leaf(current)
+            return None
+
+        i = bisect_right(current.keys, key)
+        child = current.children[i]
+        split = self.insert_aux(child, key, item)
+        current.sizes[i] = child.size
+        current.size += 1
+        if split is not None:
+            separator, right = split
+            current.keys.insert(i, separator)
+            current.children.insert(i + 1, right)
+            current.sizes.insert(i + 1, right.size)
+            if len(current.children) > self.fanout:
+                return self.split_internal(current)
+        return None
+
+    def split_leaf(self, leaf: BTreeLeaf) -> tuple[K, BTreeLeaf]:
+        """
+            Moves the upper half of an overfull leaf into a new right sibling.
+            :complexity: O(fanout)
+        """
+        mid = len(leaf.keys) // 2
+        right = BTreeLeaf(leaf.keys[mid:], leaf.items[mid:], leaf.counts[mid:])
+        del leaf.keys[mid:], leaf.items[mid:], leaf.counts[mid:]
+        leaf.size -= right.size
+        right.next, right.prev = leaf.next, leaf
+        if leaf.next is not None:
+            leaf.next.prev = right
+        leaf.next = right
+        return right.keys[0], right
+
+    def split_internal(self, node: BTreeInternal) -> tuple[K, BTreeInternal]:
+        """
+            Moves the upper half of an overfull internal node into a new right
+            sibling; the middle separator moves up to the parent.
+            :complexity: O(fanout)
+        """
+        mid = len(node.children) // 2
+        separator = node.keys[mid - 1]
+        right = BTreeInternal(node.keys[mid:], node.children[mid:], node.sizes[mid:])
+        del node.keys[mid - 1:], node.children[mid:], node.sizes[mid:]
+        node.size -= right.size
+        return separator, right
+
+    def __delitem__(self, key: K) -> None:
+        """
+            Deletes key (one copy of it in multiset mode), refilling
+            underfull nodes on the way back up.
+            :complexity: O(fanout * log_fanout N)
+            :raises ValueError: if the key is not in the tree
+        """
+        self.delete_aux(self.root, key)
+        self.length -= 1
+        if type(self.root) is BTreeInternal and len(self.root.children) == 1:
+            self.root = self.root.children[0]
+
+    def delete_aux(self, current: BTreeNode, key: K) -> None:
+        """
+            Deletes key below current, leaving current possibly underfull.
+            :complexity: O(fanout * log_fanout N)
+        """
+        if type(current) is BTreeLeaf:
+            i = bisect_left(current.keys, key)
+            if i == len(current.keys) or current.keys[i] != key:
+                raise ValueError('Deleting non-existent item')
+            if current.counts[i] > 1:
+                current.counts[i] -= 1
+            else:
+                del current.keys[i], current.items[i], current.counts[i]
+            current.size -= 1
+            return
+
+        i = bisect_right(current.keys, key)
+        child = current.children[i]
+        self.delete_aux(child, key)
+        current.sizes[i] = child.size
+        current.size -= 1
+        if len(child.keys if type(child) is BTreeLeaf else child.children) < self.min_fill:
+            self.refill(current, i)
+
+    def refill(self, parent: BTreeInternal, i: int) -> None:
+        """
+            Fixes the underfull child i of parent by borrowing from a sibling
+            that can spare an entry, or else by merging with a sibling.
+            :complexity: O(fanout)
+        """
+        child = parent.children[i]
+        left = parent.children[i - 1] if i > 0 else None
+        right = parent.children[i + 1] if i + 1 < len(parent.children) else None
+
+        if type(child) is BTreeLeaf:
+            if left is not None and len(left.keys) > self.min_fill:
+                count = left.counts.pop()
+                child.keys.insert(0, left.keys.pop())
+                child.items.insert(0, left.items.pop())
+                child.counts.insert(0, count)
+                left.size -= count
+                child.size += count
+                parent.keys[i - 1] = child.keys[0]
+            elif right is not None and len(right.keys) > self.min_fill:
+                count = right.counts.pop(0)
+                child.keys.append(right.keys.pop(0))
+                child.items.append(right.items.pop(0))
+                child.counts.append(count)
+                right.size -= count
+                child.size += count
+                parent.keys[i] = right.keys[0]
+            else:
+                self.merge_children(parent, i - 1 if left is not None else i)
+                return
+        else:
+            if left is not None and len(left.children) > self.min_fill:
+                size = left.sizes.pop()
+                child.keys.insert(0, parent.keys[i - 1])
+                parent.keys[i - 1] = left.keys.pop()
+                child.children.insert(0, left.children.pop())
+                child.sizes.insert(0, size)
+                left.size -= size
+                child.size += size
+            elif right is not None and len(right.children) > self.min_fill:
+                size = right.sizes.pop(0)
+                child.keys.append(parent.keys[i])
+                parent.keys[i] = right.keys.pop(0)
+                child.children.append(right.children.pop(0))
+                child.sizes.append(size)
+                right.size -= size
+                child.size += size
+            else:
+                self.merge_children(parent, i - 1 if left is not None else i)
+                return
+
+        if left is not None:
+            parent.sizes[i - 1] = left.size
+        if right is not None:
+            parent.sizes[i + 1] = right.size
+        parent.sizes[i] = child.size
+
+    def merge_children(self, parent: BTreeInternal, i: int) -> None:
+        """
+            Merges child i + 1 of parent into child i.
+            :complexity: O(fanout)
+        """
+        left, right = parent.children[i], parent.children[i + 1]
+        if type(left) is BTreeLeaf:
+            left.keys += right.keys
+            left.items += right.items
+            left.counts += right.counts
+            left.next = right.next
+            if right.next is not None:
+                right.next.prev = left
+        else:
+            left.keys.append(parent.keys[i])
+            left.keys += right.keys
+            left.children += right.children
+            left.sizes += right.sizes
+        left.size += right.size
+        del parent.keys[i], parent.children[i + 1], parent.sizes[i + 1]
+        parent.sizes[i] = left.size
+
+    def kth_smallest(self, k: int, current: Optional[BTreeNode]) -> Optional[BTreeEntry]:
+        """
+            Finds the kth smallest element (1-based) in the subtree rooted at current.
+            :complexity: O(fanout * log_fanout N)
+            :returns: its entry, or None if k is out of range
+        """
+        if current is None or not 1 <= k <= current.size:
+            return None
+        while type(current) is BTreeInternal:
+            for i, size in enumerate(current.sizes):
+                if k <= size:
+                    break
+                k -= size
+            current = current.children[i]
+        i = self.leaf_index(current, k)
+        return BTreeEntry(current.keys[i], current.items[i], current.counts[i])
+
+    def leaf_index(self, leaf: BTreeLeaf, k: int) -> int:
+        """
+            Returns the position in leaf of its kth element (1-based).
+            :complexity: O(1) outside multiset mode, O(fanout) in it
+        """
+        if not self.multiset:
+            return k - 1
+        for i, count in enumerate(leaf.counts):
+            if k <= count:
+                return i
+            k -= count
+        return len(leaf.counts) - 1
+
+    def rank(self, key: K) -> int:
+        """
+            Returns the number of elements less than or equal to key.
+            :complexity: O(fanout * log_fanout N)
+        """
+        return self.rank_aux(key, inclusive=True)
+
+    def count_range(self, lo: K, hi: K) -> int:
+        """
+            Returns the number of elements k with lo <= k <= hi.
+            :complexity: O(fanout * log_fanout N)
+        """
+        if hi < lo:
+            return 0
+        return self.rank_aux(hi, inclusive=True) - self.rank_aux(lo, inclusive=False)
+
+    def rank_aux(self, key: K, inclusive: bool) -> int:
+        """
+            Counts the elements below key (and equal to it when inclusive) by
+            summing the sizes of the children passed on the way down.
+            :complexity: O(fanout * log_fanout N)
+        """
+        count = 0
+        current = self.root
+        while type(current) is BTreeInternal:
+            i = bisect_right(current.keys, key)
+            count += sum(current.sizes[:i])
+            current = current.children[i]
+        i = (bisect_right if inclusive else bisect_left)(current.keys, key)
+        return count + (i if not self.multiset else sum(current.counts[:i]))
+
+    def iter_range(self, lo: K, hi: K) -> Iterator[K]:
+        """
+            Lazily yields the keys k with lo <= k <= hi in increasing order,
+            each as many times as its count, walking the linked leaves.
+            :complexity: O(log N) to reach the first key, then O(1) amortised per key
+        """
+        leaf = self.find_leaf(lo)
+        i = bisect_left(leaf.keys, lo)
+        while leaf is not None:
+            keys, counts = leaf.keys, leaf.counts
+            while i < len(keys):
+                if hi < keys[i]:
+                    return
+                for _ in range(counts[i]):
+                    yield keys[i]
+                i += 1
+            leaf, i = leaf.next, 0
+
+    def in_order(self) -> Iterator[BTreeEntry]:
+        """
+            Yields every entry in increasing key order.
+            :complexity: O(N)
+        """
+        leaf = self.first_leaf()
+        while leaf is not None:
+            yield from map(BTreeEntry, leaf.keys, leaf.items, leaf.counts)
+            leaf = leaf.next
+
+    def iter_pairs(self) -> Iterator[tuple[K, I]]:
+        """
+            Yields (key, item) for every element in increasing key order,
+            repeating a key once per unit of its count.
+            :complexity: O(N)
+        """
+        for entry in self.in_order():
+            for _ in range(entry.count):
+                yield entry.key, entry.item
+
+    def first_leaf(self) -> BTreeLeaf:
+        """ Returns the leftmost leaf. """
+        current = self.root
+        while type(current) is BTreeInternal:
+            current = current.children[0]
+        return current
+
+    def last_leaf(self) -> BTreeLeaf:
+        """ Returns the rightmost leaf. """
+        current = self.root
+        while type(current) is BTreeInternal:
+            current = current.children[-1]
+        return current
+
+    def load_sorted(self, pairs: Iterable[tuple[K, I]]) -> None:
+        """
+            Replaces the contents with a tree built bottom-up from (key, item)
+            pairs in strictly increasing key order (non-decreasing in
+            multiset mode), packing nodes as evenly as possible.
+            :complexity: O(N) where N is the number of pairs
+            :raises ValueError: if the keys are not strictly increasing
+        """
+        keys, items, counts = [], [], []
+        for key, item in pairs:
+            if keys and not keys[-1] < key:
+                if not (self.multiset and keys[-1] == key):
+                    raise ValueError('Keys must be unique and sorted')
+                counts[-1] += 1
+                continue
+            keys.append(key)
+            items.append(item)
+            counts.append(1)
+
+        level = []
+        for lo, hi in self.chunks(len(keys)):
+            leaf = BTreeLeaf(keys[lo:hi], items[lo:hi], counts[lo:hi])
+            if level:
+                level[-1].next, leaf.prev = leaf, level[-1]
+            level.append(leaf)
+        firsts = [leaf.keys[0] for leaf in level]
+
+        while len(level) > 1:
+            parents, parent_firsts = [], []
+            for lo, hi in self.chunks(len(level)):
+                children = level[lo:hi]
+                parents.append(BTreeInternal(firsts[lo + 1:hi], children, [child.size for child in children]))
+                parent_firsts.append(firsts[lo])
+            level, firsts = parents, parent_firsts
+
+        self.root = level[0] if level else BTreeLeaf()
+        self.length = self.root.size
+
+    def chunks(self, n: int) -> list[tuple[int, int]]:
+        """
+            Splits range(n) into the fewest runs of at most fanout elements,
+            with sizes differing by at most one.
+            :complexity: O(n / fanout)
+        """
+        if n == 0:
+            return []
+        groups = -(-n // self.fanout)
+        base, extra = divmod(n, groups)
+        bounds, lo = [], 0
+        for g in range(groups):
+            hi = lo + base + (1 if g < extra else 0)
+            bounds.append((lo, hi))
+            lo = hi
+        return bounds
+
+    def snapshot(self) -> BTree[K, I]:
+        """
+            Returns an independent copy of the tree.
+            :complexity: O(N)
+        """
+        tree = BTree(self.fanout, self.multiset)
+        tree.load_sorted(self.iter_pairs())
+        return tree
+
+    def union(self, other: BTree[K, I]) -> None:
+        """
+            Merges every element of other into this tree by rebuilding it
+            from both sorted sequences, and leaves other empty. When both
+            trees hold a key, the item of this tree is kept (and in multiset
+            mode the counts are added).
+            :complexity: O(N + M)
+        """
+        pairs = merge(self.iter_pairs(), other.iter_pairs(), key=lambda pair: pair[0])
+        if not self.multiset:
+            pairs = self.unique(pairs)
+        self.load_sorted(pairs)
+        other.root, other.length = BTreeLeaf(), 0
+
+    @staticmethod
+    def unique(pairs: Iterable[tuple[K, I]]) -> Iterator[tuple[K, I]]:
+        """ Drops every pair whose key equals the key of the pair before it. """
+        last = None
+        for pair in pairs:
+            if last is None or last[0] < pair[0]:
+                yield pair
+                last = pair
+
+    def cursor(self) -> BTreeCursor[K, I]:
+        """
+            Returns an unpositioned in-order cursor over this tree.
+            :complexity: O(1)
+        """
+        return BTreeCursor(self)
+
+
+class BTreeCursor(Generic[K, I]):
+    """
+        Bidirectional cursor over a BTree, with the same interface as
+        bst.BSTCursor. It is a (leaf, position) pair and moves along the
+        leaf links, so next() and prev() are O(1).
+        Any mutation of the tree invalidates the cursor.
+    """
+
+    def __init__(self, tree: BTree[K, I]) -> None:
+        self.tree = tree
+        self.leaf: Optional[BTreeLeaf] = None
+        self.index = 0
+
+    @property
+    def node(self) -> Optional[BTreeEntry]:
+        """ The entry the cursor is positioned at, or None. """
+        if self.leaf is None:
+            return None
+        leaf, i = self.leaf, self.index
+        return BTreeEntry(leaf.keys[i], leaf.items[i], leaf.counts[i])
+
+    def is_valid(self) -> bool:
+        """ Checks whether the cursor is positioned at an entry. """
+        return self.leaf is not None
+
+    def settle(self, leaf: Optional[BTreeLeaf], i: int) -> Optional[BTreeEntry]:
+        """
+            Positions the cursor at position i of leaf, moving on to the
+            neighbouring leaves if i falls outside it.
+        """
+        while leaf is not None and i >= len(leaf.keys):
+            leaf, i = leaf.next, 0
+        while leaf is not None and i < 0:
+            leaf = leaf.prev
+            i = len(leaf.keys) - 1 if leaf is not None else 0
+        self.leaf, self.index = leaf, i
+        return self.node
+
+    def seek(self, key: K) -> Optional[BTreeEntry]:
+        """
+            Positions the cursor at the entry with the smallest key >= key.
+            :complexity: O(log N)
+        """
+        leaf = self.tree.find_leaf(key)
+        return self.settle(leaf, bisect_left(leaf.keys, key))
+
+    def seek_rank(self, k: int) -> Optional[BTreeEntry]:
+        """
+            Positions the cursor at the entry holding the kth smallest element (1-based).
+            :complexity: O(fanout * log_fanout N)
+        """
+        current = self.tree.root
+        if not 1 <= k <= current.size:
+            return self.settle(None, 0)
+        while type(current) is BTreeInternal:
+            for i, size in enumerate(current.sizes):
+                if k <= size:
+                    break
+                k -= size
+            current = current.children[i]
+        return self.settle(current, self.tree.leaf_index(current, k))
+
+    def seek_first(self) -> Optional[BTreeEntry]:
+        """ Positions the cursor at the smallest entry. """
+        return self.settle(self.tree.first_leaf(), 0)
+
+    def seek_last(self) -> Optional[BTreeEntry]:
+        """ Positions the cursor at the largest entry. """
+        leaf = self.tree.last_leaf()
+        return self.settle(leaf, len(leaf.keys) - 1)
+
+    def next(self) -> Optional[BTreeEntry]:
+        """
+            Moves the cursor to the next entry.
+            :complexity: O(1)
+        """
+        if self.leaf is None:
+            return None
+        return self.settle(self.leaf, self.index + 1)
+
+    def prev(self) -> Optional[BTreeEntry]:
+        """
+            Moves the cursor to the previous entry.
+            :complexity: O(1)
+        """
+        if self.leaf is None:
+            return None
+        return self.settle(self.leaf, self.index - 1)
+
+    def __iter__(self) -> Iterator[K]:
+        """
+            Yields the key under the cursor and every larger key, each as many
+            times as its count, advancing the cursor as it goes.
+            :complexity: O(1) amortised per key
+        """
+        node = self.node
+        while node is not None:
+            for _ in range(node.count):
+                yield node.key
+            node = self.next()
@@ -0,0 +1,374 @@
+""" Fenwick (binary indexed) tree store for Percentiles over a bounded key domain.
+    Instead of one node per point, the store keeps a flat array of counts,
+    one slot per key the domain allows: a range of integers such as
+    range(0, 10001), or any finite set of keys, which is sorted and
+    coordinate-compressed into slots. Add, remove, rank and select are
+    all O(log U) where U is the size of the domain, and the store has the
+    same contract as bst.BinarySearchTree for Percentiles.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+import copy
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import repeat
+from typing import Generic, Iterable, Iterator, Optional, Sequence, TypeVar
+
+from btree import BTreeEntry
+
+
+K = TypeVar('K')
+
+
+class FenwickTree(Generic[K]):
+    """
+        Multiset of keys drawn from a fixed domain, counted in a Fenwick tree.
+
+        counts[i] is how many times the ith smallest key of the domain is
+        held, and tree is the Fenwick tree over counts (1-based), so any
+        prefix of counts sums in O(log U). Points are their own items.
+        Like BinarySearchTree, a repeated key raises ValueError unless the
+        store is in multiset mode.
+    """
+
+    def __init__(self, domain: Iterable[K], multiset: bool = False) -> None:
+        """
+            Initialises an empty store over the given domain. A range is used
+            as it is; any other collection of keys is sorted and deduplicated.
+            :complexity: O(U) for a range, O(U log U) otherwise
+            :raises ValueError: if the domain is empty
+        """
+        self.keys: Sequence[K] = domain if isinstance(domain, range) and domain.step > 0 else sorted(set(domain))
+        if not self.keys:
+            raise ValueError('The domain must not be empty')
+        self.multiset = multiset
+        self.counts = array('q', [0]) * len(self.keys)
+        self.tree = array('q', [0]) * (len(self.keys) + 1)
+        self.length = 0
+        # the highest power of two not above U, where select starts its descent
+        self.top = 1 << (len(self.keys).bit_length() - 1)
+
+    def __len__(self) -> int:
+        """ Returns the number of points in the store. """
+
+        return self.length
+
+    def is_empty(self) -> bool:
+        """
+            Checks to see if the store is empty
+            :complexity: O(1)
+        """
+        return self.length == 0
+
+    @property
+    def root(self) -> Optional[array]:
+        """ The counts, or None when empty, standing in for a tree root in kth_smallest calls. """
+        return self.counts if self.length else None
+
+    def index(self, key: K) -> int:
+        """
+            Returns the slot of key in the domain.
+            :complexity: O(log U)
+            :raises ValueError: if key is not in the domain
+        """
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            raise ValueError('Key outside the domain: {0}'.format(key))
+        return i
+
+    def add(self, i: int, delta: int) -> None:
+        """
+            Adds delta to the count of slot i.
+            :complexity: O(log U)
+        """
+        self.counts[i] += delta
+        self.length += delta
+        tree = self.tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        """
+            Returns the sum of the counts of slots 0 to i - 1.
+            :complexity: O(log U)
+        """
+        total = 0
+        tree = self.tree
+        while i > 0:
+            total += tree[i]
+            i &= i - 1
+        return total
+
+    def select(self, k: int) -> int:
+        """
+            Returns the slot holding the kth smallest point (1-based) by
+            descending the implicit tree from its top power of two.
+            :pre: 1 <= k <= len(self)
+            :complexity: O(log U)
+        """
+        position = 0
+        step = self.top
+        tree = self.tree
+        while step:
+            if position + step < len(tree) and tree[position + step] < k:
+                position += step
+                k -= tree[position]
+            step >>= 1
+        return position
+
+    def __contains__(self, key: K) -> bool:
+        """
+            Checks to see if the key is in the store
+            :complexity: O(log U)
+        """
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key and self.counts[i] > 0
+
+    def __getitem__(self, key: K) -> K:
+        """
+            Returns the point equal to key.
+            :complexity: O(log U)
+            :raises KeyError: if the key is not in the store
+        """
+        if key not in self:
+            raise KeyError('Key not found: {0}'.format(key))
+        return key
+
+    def __setitem__(self, key: K, item: K) -> None:
+        """
+            Inserts one point; item is ignored, since the point is its own item.
+            :complexity: O(log U)
+            :raises ValueError: if the key is outside the domain, or already
+                held outside multiset mode
+        """
+        i = self.index(key)
+        if self.counts[i] and not self.multiset:
+            raise ValueError('Inserting duplicate item')
+        self.add(i, 1)
+
+    def __delitem__(self, key: K) -> None:
+        """
+            Removes one copy of a point.
+            :complexity: O(log U)
+            :raises ValueError: if the point is not held
+        """
+        if key not in self:
+            raise ValueError('Deleting non-existent item')
+        self.add(self.index(key), -1)
+
+    def entry(self, i: int) -> BTreeEntry:
+        """ Returns the entry for slot i. """
+        key = self.keys[i]
+        return BTreeEntry(key, key, self.counts[i])
+
+    def kth_smallest(self, k: int, current: Optional[array]) -> Optional[BTreeEntry]:
+        """
+            Finds the kth smallest point (1-based).
+            :complexity: O(log U)
+            :returns: its entry, or None if k is out of range
+        """
+        if current is None or not 1 <= k <= self.length:
+            return None
+        return self.entry(self.select(k))
+
+    def rank_aux(self, key: K, inclusive: bool) -> int:
+        """
+            Counts the points below key (and equal to it when inclusive).
+            key need not be in the domain.
+            :complexity: O(log U)
+        """
+        return self.prefix((bisect_right if inclusive else bisect_left)(self.keys, key))
+
+    def rank(self, key: K) -> int:
+        """
+            Returns the number of points less than or equal to key.
+            :complexity: O(log U)
+        """
+        return self.rank_aux(key, inclusive=True)
+
+    def count_range(self, lo: K, hi: K) -> int:
+        """
+            Returns the number of points k with lo <= k <= hi.
+            :complexity: O(log U)
+        """
+        if hi < lo:
+            return 0
+        return self.rank_aux(hi, inclusive=True) - self.rank_aux(lo, inclusive=False)
+
+    def iter_range(self, lo: K, hi: K) -> Iterator[K]:
+        """
+            Lazily yields the points k with lo <= k <= hi in increasing order,
+            each as many times as its count, hopping between held keys with select.
+            :complexity: O(log U) per distinct key
+        """
+        cursor = self.cursor()
+        node = cursor.seek(lo)
+        while node is not None and not hi < node.key:
+            for _ in range(node.count):
+                yield node.key
+            node = cursor.next()
+
+    def iter_pairs(self) -> Iterator[tuple[K, K]]:
+        """
+            Yields (point, point) for every point in increasing order.
+            :complexity: O(log U) per distinct key
+        """
+        cursor = self.cursor()
+        cursor.seek_first()
+        for point in cursor:
+            yield point, point
+
+    def load_sorted(self, pairs: Iterable[tuple[K, K]]) -> None:
+        """
+            Replaces the contents with the keys of (key, item) pairs in strictly
+            increasing key order (non-decreasing in multiset mode), building
+            the Fenwick tree bottom-up in one pass.
+            :complexity: O(U + N log U)
+            :raises ValueError: if the keys are not strictly increasing or
+                fall outside the domain
+        """
+        counts = array('q', [0]) * len(self.keys)
+        last = None
+        for key, _ in pairs:
+            if last is not None and not last < key:
+                if not (self.multiset and last == key):
+                    raise ValueError('Keys must be unique and sorted')
+            counts[self.index(key)] += 1
+            last = key
+
+        tree = array('q', [0]) + counts
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self.counts, self.tree, self.length = counts, tree, sum(counts)
+
+    def snapshot(self) -> FenwickTree[K]:
+        """
+            Returns an independent copy of the store.
+            :complexity: O(U)
+        """
+        store = copy.copy(self)
+        store.counts, store.tree = array('q', self.counts), array('q', self.tree)
+        return store
+
+    def union(self, other: FenwickTree[K]) -> None:
+        """
+            Adds every point of other to this store and leaves other empty.
+            Outside multiset mode a point held by both is kept once.
+            :complexity: O(M log U) where M is the number of distinct keys of other
+            :raises ValueError: if a point of other is outside this domain
+        """
+        cursor = other.cursor()
+        entry = cursor.seek_first()
+        while entry is not None:
+            if self.multiset:
+                self.add(self.index(entry.key), entry.count)
+            elif entry.key not in self:
+                self[entry.key] = entry.key
+            entry = cursor.next()
+        other.load_sorted(())
+
+    def cursor(self) -> FenwickCursor[K]:
+        """
+            Returns an unpositioned in-order cursor over this store.
+            :complexity: O(1)
+        """
+        return FenwickCursor(self)
+
+
+class FenwickCursor(Generic[K]):
+    """
+        Bidirectional cursor over a FenwickTree, with the same interface as
+        bst.BSTCursor. It holds the slot of the key it is positioned at and
+        steps to the neighbouring held key by scanning a few slots of counts,
+        which finds it at once in a dense domain, or else with prefix sums
+        and select.
+        Any mutation of the store invalidates the cursor.
+    """
+
+    # slots scanned linearly before falling back to prefix sums and select
+    SCAN = 16
+
+    def __init__(self, store: FenwickTree[K]) -> None:
+        self.store = store
+        self.slot: Optional[int] = None
+
+    @property
+    def node(self) -> Optional[BTreeEntry]:
+        """ The entry the cursor is positioned at, or None. """
+        if self.slot is None:
+            return None
+        return self.store.entry(self.slot)
+
+    def is_valid(self) -> bool:
+        """ Checks whether the cursor is positioned at an entry. """
+        return self.slot is not None
+
+    def seek_rank(self, k: int) -> Optional[BTreeEntry]:
+        """
+            Positions the cursor at the key holding the kth smallest point
+            (1-based), or unpositions it if k is out of range.
+            :complexity: O(log U)
+        """
+        self.slot = self.store.select(k) if 1 <= k <= len(self.store) else None
+        return self.node
+
+    def seek(self, key: K) -> Optional[BTreeEntry]:
+        """
+            Positions the cursor at the entry with the smallest key >= key.
+            :complexity: O(log U)
+        """
+        return self.seek_rank(self.store.rank_aux(key, inclusive=False) + 1)
+
+    def seek_first(self) -> Optional[BTreeEntry]:
+        """ Positions the cursor at the smallest entry. """
+        return self.seek_rank(1)
+
+    def seek_last(self) -> Optional[BTreeEntry]:
+        """ Positions the cursor at the largest entry. """
+        return self.seek_rank(len(self.store))
+
+    def next(self) -> Optional[BTreeEntry]:
+        """
+            Moves the cursor to the next entry.
+            :complexity: O(1) in a dense domain, O(log U) otherwise
+        """
+        if self.slot is None:
+            return None
+        counts = self.store.counts
+        for slot in range(self.slot + 1, min(self.slot + 1 + self.SCAN, len(counts))):
+            if counts[slot]:
+                self.slot = slot
+                return self.node
+        return self.seek_rank(self.store.prefix(self.slot + 1) + 1)
+
+    def prev(self) -> Optional[BTreeEntry]:
+        """
+            Moves the cursor to the previous entry.
+            :complexity: O(1) in a dense domain, O(log U) otherwise
+        """
+        if self.slot is None:
+            return None
+        counts = self.store.counts
+        for slot in range(self.slot - 1, max(self.slot - 1 - self.SCAN, -1), -1):
+            if counts[slot]:
+                self.slot = slot
+                return self.node
+        return self.seek_rank(self.store.prefix(self.slot))
+
+    def __iter__(self) -> Iterator[K]:
+        """
+            Yields the key under the cursor and every larger key, each as many
+            times as its count, advancing the cursor as it goes.
+            :complexity: O(log U) per distinct key
+        """
+        node = self.node
+        while node is not None:
+            yield from repeat(node.key, node.count)
+            node = self.next()
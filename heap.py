@@ -3,23 +3,70 @@ from __future__ import annotations
 __author__ = "Brendon Taylor, modified by Jackson Goerner"
 __docformat__ = 'reStructuredText'
 
-from typing import Generic
+from typing import Any, Callable, Generic, Iterable, Optional
 from referential_array import ArrayR, T
 
 
 class MaxHeap(Generic[T]):
     MIN_CAPACITY = 1
+    # starting capacity of a growable heap, below which it never shrinks
+    MIN_GROWABLE_CAPACITY = 8
 
-    def __init__(self, max_size: int) -> None:
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        """
+        Creates an empty heap. With a max_size the capacity is fixed and add
+        raises IndexError once it is reached; without one the heap is
+        growable, doubling its array when full and halving it when a
+        quarter full, so resizing costs amortised O(1) per operation.
+        :complexity: O(max_size)
+        """
         self.length = 0
+        self.growable = max_size is None
+        if self.growable:
+            max_size = self.MIN_GROWABLE_CAPACITY
         self.the_array = ArrayR(max(self.MIN_CAPACITY, max_size) + 1)
 
+    @classmethod
+    def from_items(cls, items: Iterable[T], max_size: int = 0) -> MaxHeap[T]:
+        """
+        Builds a heap holding items, with room for at least max_size elements.
+        :complexity: O(N) comparisons, where N is the number of items
+        """
+        items = list(items)
+        heap = cls(max(len(items), max_size))
+        heap.heapify(items)
+        return heap
+
     def __len__(self) -> int:
         return self.length
 
     def is_full(self) -> bool:
         return self.length + 1 == len(self.the_array)
 
+    def capacity(self) -> int:
+        """ Returns how many elements fit in the array before it must grow. """
+        return len(self.the_array) - 1
+
+    def resize(self, capacity: int) -> None:
+        """
+        Moves the elements into a new array with room for capacity elements.
+        :pre: self.length <= capacity
+        :complexity: O(capacity)
+        """
+        new_array = ArrayR(capacity + 1)
+        for k in range(1, self.length + 1):
+            new_array[k] = self.the_array[k]
+        self.the_array = new_array
+
+    def shrink(self) -> None:
+        """
+        Halves the array of a growable heap once it is a quarter full.
+        :complexity: O(1) amortised
+        """
+        if self.growable and self.length <= self.capacity() // 4 \
+                and self.capacity() // 2 >= self.MIN_GROWABLE_CAPACITY:
+            self.resize(self.capacity() // 2)
+
     def rise(self, k: int) -> None:
         """
         Rise element at index k to its correct position
@@ -34,9 +81,13 @@ class MaxHeap(Generic[T]):
     def add(self, element: T) -> bool:
         """
         Swaps elements while rising
+        :complexity: O(log N), amortised when the heap has to grow
+        :raises IndexError: if a fixed-capacity heap is full
         """
         if self.is_full():
-            raise IndexError
+            if not self.growable:
+                raise IndexError
+            self.resize(2 * self.capacity())
 
         self.length += 1
         self.the_array[self.length] = element
@@ -70,8 +121,34 @@ class MaxHeap(Generic[T]):
 
         self.the_array[k] = item
         
+    def heapify(self, items: Iterable[T]) -> None:
+        """
+        Replaces the contents of the heap with items, building it bottom-up:
+        the items are copied in as they are, then every internal node is
+        sunk, from the last one back to the root.
+        :complexity: O(N) comparisons, where N is the number of items,
+            against O(N log N) for N calls to add
+        :raises IndexError: if there are more items than a fixed-capacity
+            heap can hold
+        """
+        items = list(items)
+        if len(items) + 1 > len(self.the_array):
+            if not self.growable:
+                raise IndexError
+            self.length = 0
+            self.resize(len(items))
+
+        for k, item in enumerate(items, 1):
+            self.the_array[k] = item
+        self.length = len(items)
+        for k in range(self.length // 2, 0, -1):
+            self.sink(k)
+
     def get_max(self) -> T:
-        """ Remove (and return) the maximum element from the heap. """
+        """
+        Remove (and return) the maximum element from the heap.
+        :complexity: O(log N), amortised when a growable heap shrinks
+        """
         if self.length == 0:
             raise IndexError
 
@@ -80,8 +157,300 @@ class MaxHeap(Generic[T]):
         if self.length > 0:
             self.the_array[1] = self.the_array[self.length+1]
             self.sink(1)
+        self.the_array[self.length + 1] = None
+        self.shrink()
         return max_elt
 
+    def replace_max(self, element: T) -> T:
+        """
+        Remove (and return) the maximum element and add element in its
+        place, with a single sink from the root rather than the sink of
+        get_max followed by the rise of add.
+        :complexity: O(log N)
+        :raises IndexError: if the heap is empty
+        """
+        if self.length == 0:
+            raise IndexError
+
+        max_elt = self.the_array[1]
+        self.the_array[1] = element
+        self.sink(1)
+        return max_elt
+
+    def pushpop(self, element: T) -> T:
+        """
+        Add element, then remove (and return) the maximum element, which is
+        element itself when nothing in the heap is greater; the heap is then
+        left untouched.
+        :complexity: O(1) when element is returned, O(log N) otherwise
+        """
+        if self.length == 0 or not self.the_array[1] > element:
+            return element
+        return self.replace_max(element)
+
+
+class HeapHandle(Generic[T]):
+    """
+    Where an element of an IndexedMaxHeap lives: index is its current
+    position in the heap array, kept up to date as it rises and sinks,
+    and 0 once it has left the heap.
+    """
+    __slots__ = ('item', 'index')
+
+    def __init__(self, item: T, index: int) -> None:
+        self.item = item
+        self.index = index
+
+    def __repr__(self) -> str:
+        return 'HeapHandle({0!r}, {1})'.format(self.item, self.index)
+
+
+class IndexedMaxHeap(MaxHeap[T]):
+    """
+    Max heap whose elements can be found again: add returns a handle, and
+    the handle lets an element whose priority changed be moved into place
+    with update, or be taken out with remove, in O(log N).
+
+    Ordering goes by a cached key per element, kept in keys, an array
+    parallel to the array of handles. With a key function the key is
+    computed once when the element is added or updated, and rise and
+    sink compare only the cached keys; without one each element is its
+    own key.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, key: Optional[Callable[[T], Any]] = None) -> None:
+        """
+        Creates an empty heap ordered by key(element), or by the elements
+        themselves when key is None. max_size is as for MaxHeap.
+        :complexity: O(max_size)
+        """
+        super().__init__(max_size)
+        self.key = key
+        self.keys = ArrayR(len(self.the_array))
+
+    def priority(self, element: T) -> Any:
+        """ Returns the key element is ordered by. """
+        return element if self.key is None else self.key(element)
+
+    def resize(self, capacity: int) -> None:
+        """
+        Moves the handles and their keys into new arrays with room for
+        capacity elements.
+        :pre: self.length <= capacity
+        :complexity: O(capacity)
+        """
+        new_keys = ArrayR(capacity + 1)
+        for k in range(1, self.length + 1):
+            new_keys[k] = self.keys[k]
+        self.keys = new_keys
+        super().resize(capacity)
+
+    def rise(self, k: int) -> None:
+        """
+        Rise element at index k to its correct position, updating the
+        index of every handle it passes
+        :pre: 1 <= k <= self.length
+        """
+        handle, key = self.the_array[k], self.keys[k]
+        while k > 1 and key > self.keys[k // 2]:
+            parent = self.the_array[k // 2]
+            self.the_array[k], self.keys[k] = parent, self.keys[k // 2]
+            parent.index = k
+            k = k // 2
+        self.the_array[k], self.keys[k] = handle, key
+        handle.index = k
+
+    def add(self, element: T) -> HeapHandle[T]:
+        """
+        Swaps elements while rising
+        :complexity: O(log N), amortised when the heap has to grow
+        :returns: the handle of element
+        :raises IndexError: if a fixed-capacity heap is full
+        """
+        if self.is_full():
+            if not self.growable:
+                raise IndexError
+            self.resize(2 * self.capacity())
+
+        handle = HeapHandle(element, 0)
+        self.length += 1
+        self.the_array[self.length], self.keys[self.length] = handle, self.priority(element)
+        self.rise(self.length)
+        return handle
+
+    def largest_child(self, k: int) -> int:
+        """
+        Returns the index of k's child with greatest key.
+        :pre: 1 <= k <= self.length // 2
+        """
+        if 2 * k == self.length or self.keys[2 * k] > self.keys[2 * k + 1]:
+            return 2 * k
+        else:
+            return 2 * k + 1
+
+    def sink(self, k: int) -> None:
+        """ Make the element at index k sink to the correct position,
+            updating the index of every handle it passes.
+            :pre: 1 <= k <= self.length
+            :complexity: O(log N)
+        """
+        handle, key = self.the_array[k], self.keys[k]
+
+        while 2 * k <= self.length:
+            max_child = self.largest_child(k)
+            if self.keys[max_child] <= key:
+                break
+            child = self.the_array[max_child]
+            self.the_array[k], self.keys[k] = child, self.keys[max_child]
+            child.index = k
+            k = max_child
+
+        self.the_array[k], self.keys[k] = handle, key
+        handle.index = k
+
+    def heapify(self, items: Iterable[T]) -> list[HeapHandle[T]]:
+        """
+        Replaces the contents of the heap with items, building it bottom-up.
+        Handles given out before are invalidated.
+        :complexity: O(N) comparisons and key calls, where N is the number of items
+        :returns: the handles of items, in the order given
+        :raises IndexError: if there are more items than a fixed-capacity
+            heap can hold
+        """
+        items = list(items)
+        if len(items) + 1 > len(self.the_array):
+            if not self.growable:
+                raise IndexError
+            self.length = 0
+            self.resize(len(items))
+
+        for k in range(1, self.length + 1):
+            self.the_array[k].index = 0
+        handles = []
+        for k, item in enumerate(items, 1):
+            handle = HeapHandle(item, k)
+            self.the_array[k], self.keys[k] = handle, self.priority(item)
+            handles.append(handle)
+        self.length = len(items)
+        for k in range(self.length // 2, 0, -1):
+            self.sink(k)
+        return handles
+
+    def get_max(self) -> T:
+        """
+        Remove (and return) the maximum element from the heap.
+        :complexity: O(log N), amortised when a growable heap shrinks
+        """
+        if self.length == 0:
+            raise IndexError
+
+        handle = self.the_array[1]
+        self.length -= 1
+        if self.length > 0:
+            self.the_array[1] = self.the_array[self.length + 1]
+            self.keys[1] = self.keys[self.length + 1]
+            self.sink(1)
+        self.the_array[self.length + 1] = self.keys[self.length + 1] = None
+        handle.index = 0
+        self.shrink()
+        return handle.item
+
+    def replace_max(self, element: T) -> T:
+        """
+        Remove (and return) the maximum element and add element in its
+        place with a single sink. element takes over the handle of the
+        removed maximum, so a handle held for the maximum follows element.
+        :complexity: O(log N)
+        :raises IndexError: if the heap is empty
+        """
+        handle = self.peek()
+        max_elt = handle.item
+        handle.item = element
+        self.keys[1] = self.priority(element)
+        self.sink(1)
+        return max_elt
+
+    def pushpop(self, element: T) -> T:
+        """
+        Add element, then remove (and return) the maximum element, which is
+        element itself when no key in the heap is greater; otherwise element
+        takes over the handle of the removed maximum.
+        :complexity: O(1) when element is returned, O(log N) otherwise
+        """
+        if self.length == 0:
+            return element
+        key = self.priority(element)
+        if not self.keys[1] > key:
+            return element
+        handle = self.the_array[1]
+        max_elt = handle.item
+        handle.item = element
+        self.keys[1] = key
+        self.sink(1)
+        return max_elt
+
+    def peek(self) -> HeapHandle[T]:
+        """
+        Returns the handle of the maximum element, leaving it in the heap.
+        :complexity: O(1)
+        """
+        if self.length == 0:
+            raise IndexError
+        return self.the_array[1]
+
+    def max_key(self) -> Any:
+        """
+        Returns the cached key of the maximum element.
+        :complexity: O(1)
+        """
+        if self.length == 0:
+            raise IndexError
+        return self.keys[1]
+
+    def check(self, handle: HeapHandle[T]) -> None:
+        """
+        Checks that handle belongs to an element still in this heap.
+        :complexity: O(1)
+        :raises KeyError: if it does not
+        """
+        k = handle.index
+        if not 1 <= k <= self.length or self.the_array[k] is not handle:
+            raise KeyError('Handle not in heap: {0!r}'.format(handle))
+
+    def update(self, handle: HeapHandle[T]) -> None:
+        """
+        Recomputes the key of handle's element after its priority changed,
+        then moves it to its correct position, in whichever direction it
+        has to go.
+        :complexity: O(log N)
+        :raises KeyError: if the handle is not in this heap
+        """
+        self.check(handle)
+        self.keys[handle.index] = self.priority(handle.item)
+        self.rise(handle.index)
+        self.sink(handle.index)
+
+    def remove(self, handle: HeapHandle[T]) -> T:
+        """
+        Removes (and returns) the element of handle, whatever its position.
+        :complexity: O(log N), amortised when a growable heap shrinks
+        :raises KeyError: if the handle is not in this heap
+        """
+        self.check(handle)
+        k = handle.index
+        if k == 1:
+            return self.get_max()
+        last, last_key = self.the_array[self.length], self.keys[self.length]
+        self.the_array[self.length] = self.keys[self.length] = None
+        self.length -= 1
+        if k <= self.length:
+            self.the_array[k], self.keys[k] = last, last_key
+            self.rise(k)
+            self.sink(last.index)
+        handle.index = 0
+        self.shrink()
+        return handle.item
+
 if __name__ == '__main__':
     items = [ int(x) for x in input('Enter a list of numbers: ').strip().split() ]
     heap = MaxHeap(len(items))
@@ -21,10 +21,19 @@ class TreeNode(Generic[K, I]):
     right: TreeNode|None = None
     # This value should be maintained by yourself in bst.py
     subtree_size: int = 1
+    # Multiplicity of key; only a multiset tree ever sets it above 1
+    count: int = 1
 
     def set_subtree_size(self, subtree_size: int) -> None:
         self.subtree_size = subtree_size
 
+    def copy(self) -> TreeNode:
+        """
+            Returns a shallow copy sharing the same children
+            :complexity: O(1)
+        """
+        return TreeNode(self.key, self.item, self.left, self.right, self.subtree_size, self.count)
+
     def __str__(self):
         """
             Returns the string representation of a node
@@ -0,0 +1,444 @@
+""" Array-backed Binary Search Tree ADT.
+    Stores the nodes of a BinarySearchTree as parallel arrays (keys, items,
+    left index, right index, subtree size) instead of one TreeNode object per
+    key, with deleted slots recycled through a free list. Per-key overhead
+    drops from a full dataclass instance to five array cells.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+from array import array
+from heapq import merge
+from typing import Iterable, Iterator, Optional, TypeVar
+from bst import BinarySearchTree
+
+
+K = TypeVar('K')
+I = TypeVar('I')
+
+# Slot 0 is a sentinel standing in for None: it has size 0 and links to itself,
+# so size lookups never need to test for a missing child.
+NIL = 0
+
+
+class PoolNode:
+    """
+        Lightweight view of one slot of a PooledBinarySearchTree.
+        Exposes the same attributes as TreeNode, reading and writing the
+        pool arrays, so code written against TreeNode keeps working.
+    """
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree: PooledBinarySearchTree, index: int) -> None:
+        self.tree = tree
+        self.index = index
+
+    @property
+    def key(self) -> K:
+        return self.tree.keys[self.index]
+
+    @key.setter
+    def key(self, key: K) -> None:
+        self.tree.keys[self.index] = key
+
+    @property
+    def item(self) -> I:
+        return self.tree.items[self.index]
+
+    @item.setter
+    def item(self, item: I) -> None:
+        self.tree.items[self.index] = item
+
+    @property
+    def left(self) -> Optional[PoolNode]:
+        return self.tree.view(self.tree.lefts[self.index])
+
+    @left.setter
+    def left(self, node: Optional[PoolNode]) -> None:
+        self.tree.lefts[self.index] = NIL if node is None else node.index
+
+    @property
+    def right(self) -> Optional[PoolNode]:
+        return self.tree.view(self.tree.rights[self.index])
+
+    @right.setter
+    def right(self, node: Optional[PoolNode]) -> None:
+        self.tree.rights[self.index] = NIL if node is None else node.index
+
+    @property
+    def subtree_size(self) -> int:
+        return self.tree.sizes[self.index]
+
+    @subtree_size.setter
+    def subtree_size(self, subtree_size: int) -> None:
+        self.tree.sizes[self.index] = subtree_size
+
+    def set_subtree_size(self, subtree_size: int) -> None:
+        self.subtree_size = subtree_size
+
+    @property
+    def count(self) -> int:
+        # the pool does not support multiset mode, so every key occurs once
+        return 1
+
+    def __str__(self) -> str:
+        key = str(self.key) if type(self.key) != str else "'{0}'".format(self.key)
+        item = str(self.item) if type(self.item) != str else "'{0}'".format(self.item)
+        return '({0}, {1}, [{2}])'.format(key, item, self.subtree_size)
+
+
+class PooledBinarySearchTree(BinarySearchTree[K, I]):
+    """
+        Binary search tree whose nodes live in a pool of parallel arrays.
+
+        Node i is described by keys[i], items[i], lefts[i], rights[i] and
+        sizes[i]; children are slot indices and NIL marks a missing child.
+        Slots of deleted nodes are chained through lefts into a free list
+        and reused by later inserts. The hot paths work on indices directly;
+        root and every method returning a node hand out PoolNode views.
+        Indices and sizes are C ints, so a pool holds at most 2**31 - 1 nodes.
+    """
+
+    def __init__(self) -> None:
+        """
+            Initialises an empty pool holding only the NIL sentinel.
+            :complexity: O(1)
+        """
+        self.keys: list = [None]
+        self.items: list = [None]
+        self.lefts = array('i', [NIL])
+        self.rights = array('i', [NIL])
+        self.sizes = array('i', [0])
+        self.free = NIL
+        self.root_index = NIL
+        super().__init__()
+
+    @property
+    def root(self) -> Optional[PoolNode]:
+        return self.view(self.root_index)
+
+    @root.setter
+    def root(self, node: Optional[PoolNode]) -> None:
+        self.root_index = NIL if node is None else node.index
+
+    def view(self, index: int) -> Optional[PoolNode]:
+        """
+            Returns a PoolNode view of slot index, or None for NIL.
+            :complexity: O(1)
+        """
+        return None if index == NIL else PoolNode(self, index)
+
+    def allocate(self, key: K, item: I) -> int:
+        """
+            Takes a slot from the free list, or grows the arrays by one,
+            and initialises it as a leaf.
+            :complexity: O(1) amortised
+        """
+        index = self.free
+        if index != NIL:
+            self.free = self.lefts[index]
+            self.keys[index] = key
+            self.items[index] = item
+            self.lefts[index] = NIL
+            self.rights[index] = NIL
+            self.sizes[index] = 1
+        else:
+            index = len(self.keys)
+            self.keys.append(key)
+            self.items.append(item)
+            self.lefts.append(NIL)
+            self.rights.append(NIL)
+            self.sizes.append(1)
+        return index
+
+    def release(self, index: int) -> None:
+        """
+            Returns slot index to the free list, dropping its key and item.
+            :complexity: O(1)
+        """
+        self.keys[index] = None
+        self.items[index] = None
+        self.rights[index] = NIL
+        self.sizes[index] = 0
+        self.lefts[index] = self.free
+        self.free = index
+
+    def find(self, key: K) -> int:
+        """
+            Returns the slot holding key.
+            :complexity: O(CompK * D) where D is the depth of the tree
+            :raises KeyError: if the key is not in the tree
+        """
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        current = self.root_index
+        while current != NIL:
+            current_key = keys[current]
+            if key == current_key:
+                return current
+            elif key < current_key:
+                current = lefts[current]
+            else:
+                current = rights[current]
+        raise KeyError('Key not found: {0}'.format(key))
+
+    def __getitem__(self, key: K) -> I:
+        return self.items[self.find(key)]
+
+    def get_tree_node_by_key(self, key: K) -> PoolNode:
+        return PoolNode(self, self.find(key))
+
+    def __setitem__(self, key: K, item: I) -> None:
+        self.root_index = self.insert_at(self.root_index, key, item)
+
+    def insert_aux(self, current: Optional[PoolNode], key: K, item: I) -> PoolNode:
+        return self.view(self.insert_at(NIL if current is None else current.index, key, item))
+
+    def insert_at(self, current: int, key: K, item: I) -> int:
+        """
+            Inserts key below slot current and returns the new subtree root slot.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        path = []
+        while current != NIL:
+            path.append(current)
+            current_key = keys[current]
+            if key < current_key:
+                current = lefts[current]
+            elif key > current_key:
+                current = rights[current]
+            else:
+                raise ValueError('Inserting duplicate item')
+
+        self.length += 1
+        return self.relink_at(path, key, self.allocate(key, item))
+
+    def __delitem__(self, key: K) -> None:
+        self.root_index = self.delete_at(self.root_index, key)
+
+    def delete_aux(self, current: Optional[PoolNode], key: K) -> Optional[PoolNode]:
+        return self.view(self.delete_at(NIL if current is None else current.index, key))
+
+    def delete_at(self, current: int, key: K) -> int:
+        """
+            Deletes key below slot current and returns the new subtree root slot.
+            A slot with two children takes over the key and item of its
+            successor, whose slot is then released.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        path = []
+        while current != NIL and key != keys[current]:
+            path.append(current)
+            current = lefts[current] if key < keys[current] else rights[current]
+
+        if current == NIL:
+            raise ValueError('Deleting non-existent item')
+
+        self.length -= 1
+        if lefts[current] == NIL:
+            replacement = rights[current]
+            self.release(current)
+        elif rights[current] == NIL:
+            replacement = lefts[current]
+            self.release(current)
+        else:
+            succ_path = []
+            succ = rights[current]
+            while lefts[succ] != NIL:
+                succ_path.append(succ)
+                succ = lefts[succ]
+            keys[current] = keys[succ]
+            self.items[current] = self.items[succ]
+            rights[current] = self.relink_at(succ_path, keys[succ], rights[succ])
+            self.release(succ)
+            self.update_size_at(current)
+            replacement = current
+
+        return self.relink_at(path, key, replacement)
+
+    def relink_at(self, path: list[int], key: K, child: int) -> int:
+        """
+            Index-based counterpart of relink: hangs child back under the last
+            slot of the search path for key and refreshes the sizes upwards.
+            :complexity: O(D) where D is the length of the path
+        """
+        keys, lefts, rights, sizes = self.keys, self.lefts, self.rights, self.sizes
+        for index in reversed(path):
+            if key < keys[index]:
+                lefts[index] = child
+            else:
+                rights[index] = child
+            sizes[index] = 1 + sizes[lefts[index]] + sizes[rights[index]]
+            child = index
+        return child
+
+    def update_size_at(self, index: int) -> None:
+        """
+            Recomputes the size of slot index from its children.
+            :complexity: O(1)
+        """
+        self.sizes[index] = 1 + self.sizes[self.lefts[index]] + self.sizes[self.rights[index]]
+
+    def kth_smallest(self, k: int, current: Optional[PoolNode]) -> Optional[PoolNode]:
+        """
+            Finds the kth smallest node in the subtree rooted at current.
+            :complexity: O(D) where D is the depth of the tree
+        """
+        lefts, rights, sizes = self.lefts, self.rights, self.sizes
+        index = NIL if current is None else current.index
+        while index != NIL:
+            left_size = sizes[lefts[index]]
+            if k == left_size + 1:
+                return PoolNode(self, index)
+            elif k <= left_size:
+                index = lefts[index]
+            else:
+                k -= left_size + 1
+                index = rights[index]
+        return None
+
+    def rank_aux(self, key: K, inclusive: bool) -> int:
+        """
+            Index-based counterpart of BinarySearchTree.rank_aux.
+            :complexity: O(CompK * D) where D is the depth of the tree
+        """
+        keys, lefts, rights, sizes = self.keys, self.lefts, self.rights, self.sizes
+        count = 0
+        current = self.root_index
+        while current != NIL:
+            current_key = keys[current]
+            if key < current_key or (key == current_key and not inclusive):
+                current = lefts[current]
+            else:
+                count += sizes[lefts[current]] + 1
+                if key == current_key:
+                    break
+                current = rights[current]
+        return count
+
+    def iter_range(self, lo: K, hi: K) -> Iterator[K]:
+        """
+            Index-based counterpart of BinarySearchTree.iter_range.
+            :complexity: O(CompK * D) to reach the first key, then O(1) amortised per key
+        """
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        stack = []
+        current = self.root_index
+        while True:
+            while current != NIL:
+                if keys[current] < lo:
+                    current = rights[current]
+                else:
+                    stack.append(current)
+                    current = lefts[current]
+            if not stack:
+                return
+            current = stack.pop()
+            if hi < keys[current]:
+                return
+            yield keys[current]
+            current = rights[current]
+
+    def in_order(self) -> Iterator[PoolNode]:
+        """
+            Yields a view of every node in increasing key order.
+            :complexity: O(N) for the whole traversal, O(D) extra space
+        """
+        lefts, rights = self.lefts, self.rights
+        stack = []
+        current = self.root_index
+        while stack or current != NIL:
+            while current != NIL:
+                stack.append(current)
+                current = lefts[current]
+            current = stack.pop()
+            yield PoolNode(self, current)
+            current = rights[current]
+
+    def load_sorted(self, pairs: Iterable[tuple[K, I]]) -> None:
+        """
+            Replaces the contents of the pool with a perfectly balanced tree.
+            Slot i + 1 holds the ith smallest key, so the arrays are compact
+            and the free list is empty afterwards.
+            :complexity: O(N) where N is the number of pairs
+            :raises ValueError: if the keys are not strictly increasing
+        """
+        keys, items = [None], [None]
+        for key, item in pairs:
+            if len(keys) > 1 and not keys[-1] < key:
+                raise ValueError('Keys must be unique and sorted')
+            keys.append(key)
+            items.append(item)
+
+        n = len(keys) - 1
+        self.keys, self.items = keys, items
+        self.lefts = array('i', [NIL]) * (n + 1)
+        self.rights = array('i', [NIL]) * (n + 1)
+        self.sizes = array('i', [0]) * (n + 1)
+        self.free = NIL
+        self.root_index = self.build_at(1, n + 1)
+        self.length = n
+
+    def build_at(self, lo: int, hi: int) -> int:
+        """
+            Links slots lo..hi-1 into a perfectly balanced subtree and
+            returns its root slot.
+            :complexity: O(hi - lo)
+        """
+        if lo >= hi:
+            return NIL
+        mid = (lo + hi) // 2
+        self.lefts[mid] = self.build_at(lo, mid)
+        self.rights[mid] = self.build_at(mid + 1, hi)
+        self.sizes[mid] = hi - lo
+        return mid
+
+    def split(self, key: K) -> tuple[PooledBinarySearchTree[K, I], PooledBinarySearchTree[K, I]]:
+        """
+            Splits the tree into the keys smaller than key and the rest.
+            Slots cannot move between pools, so both halves are rebuilt
+            compactly from an in-order pass and this tree is left empty.
+            :complexity: O(N)
+        """
+        pairs = [(node.key, node.item) for node in self.in_order()]
+        cut = self.rank_aux(key, inclusive=False)
+        smaller, larger = type(self)(), type(self)()
+        smaller.load_sorted(pairs[:cut])
+        larger.load_sorted(pairs[cut:])
+        self.load_sorted(())
+        return smaller, larger
+
+    def join(self, other: BinarySearchTree[K, I]) -> None:
+        """
+            Appends every key of other (all larger than the keys of this
+            tree) by rebuilding the pool, and leaves other empty.
+            :complexity: O(N + M)
+            :raises ValueError: if the key ranges overlap
+        """
+        pairs = [(node.key, node.item) for node in self.in_order()]
+        pairs.extend((node.key, node.item) for node in other.in_order())
+        try:
+            self.load_sorted(pairs)
+        except ValueError:
+            raise ValueError('Joined trees must not overlap')
+        other.root, other.length = None, 0
+
+    def union(self, other: BinarySearchTree[K, I]) -> None:
+        """
+            Merges every key of other into this tree by rebuilding the pool,
+            and leaves other empty. When both trees hold a key, the item of
+            this tree is kept.
+            :complexity: O(N + M)
+        """
+        pairs = []
+        for key, item in merge(((node.key, node.item) for node in self.in_order()),
+                               ((node.key, node.item) for node in other.in_order()),
+                               key=lambda pair: pair[0]):
+            if not pairs or pairs[-1][0] < key:
+                pairs.append((key, item))
+        self.load_sorted(pairs)
+        other.root, other.length = None, 0
@@ -1,7 +1,13 @@
 from __future__ import annotations
-from typing import Generic, TypeVar
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Generic, Iterable, Iterator, TypeVar
+from heapq import merge
+from itertools import islice
 from math import ceil
-from bst import BinarySearchTree
+from bst import BinarySearchTree, BSTCursor
+from fenwick import FenwickTree
 
 
 T = TypeVar("T")
@@ -9,17 +15,56 @@ I = TypeVar("I")
 
 class Percentiles(Generic[T]):
 
-    def __init__(self) -> None:
+    # single-point writes patched into the flat snapshot before a read, beyond which it is dropped
+    FLAT_PATCH_LIMIT = 64
+
+    def __init__(self, store: BinarySearchTree | None = None, cache_size: int = 0,
+                 domain: Iterable[T] | None = None, flatten: bool = False) -> None:
         """
         Initialises an empty binary search tree as the percentile object
 
+        store can be any empty BinarySearchTree (for example a
+        WeightBalancedTree, which stays balanced under sorted input, or a
+        tree in multiset mode, which accepts repeated points);
+        a plain BinarySearchTree is used when it is omitted.
+        When every point comes from a known domain (e.g. range(0, 10001)),
+        pass domain instead to count the points in a FenwickTree over it.
+
+        With a cache_size, ratio keeps the results of the last cache_size
+        distinct (x, y) queries; the default of 0 leaves the cache off, since
+        every entry holds a full copy of its band. Every mutation bumps
+        version, which invalidates them, and hits and misses count the lookups.
+
+        With flatten, reads are served from a flat sorted list of the points,
+        built on the first read after a write. add_point and remove_point
+        patch it in place while reads keep coming; after FLAT_PATCH_LIMIT
+        writes without a read, or any batch write, it is rebuilt on the next
+        read instead. flat_rebuilds, flat_rebuild_seconds and flat_patches
+        report what it cost.
+
         Best Case - O(1), since initialisation of empty binary search tree is constant
 
         Worst Case - same as best case
         """
 
         # Using a binary search tree as the store for the points
-        self.items : BinarySearchTree = BinarySearchTree()
+        if store is not None and domain is not None:
+            raise ValueError('Pass either a store or a domain')
+        if domain is not None:
+            store = FenwickTree(domain)
+        self.items : BinarySearchTree = store if store is not None else BinarySearchTree()
+        self.version = 0
+        self.cache_size = cache_size
+        self.cache : OrderedDict[tuple, tuple[int, list[T]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.flatten = flatten
+        self.flat : list[T] | None = None
+        self.flat_version = -1
+        self.flat_pending = 0
+        self.flat_rebuilds = 0
+        self.flat_rebuild_seconds = 0.0
+        self.flat_patches = 0
     
     def add_point(self, item: T) -> None:
         """
@@ -35,7 +80,53 @@ class Percentiles(Generic[T]):
         """
         # The key, value pair is the same
         self.items[item] = item
+        self.version += 1
+        self.patch_flat(item, added=True)
     
+    def add_points(self, items: Iterable[T]) -> None:
+        """
+        Adding many points at once
+
+        The batch is sorted once and merged with the points already held,
+        then the tree is rebuilt perfectly balanced in a single pass. A batch
+        that is small next to the current size is inserted point by point
+        instead, since a full rebuild would cost more than it saves.
+
+        Best Case -  O(M*D) for a small batch of M points
+
+        Worst case - O(N + M log M) for the sort, merge and rebuild
+
+        where N is the number of points already held and D is the depth of the tree
+
+        """
+        batch = sorted(items)
+        if len(batch) * len(self.items).bit_length() < len(self.items):
+            for item in batch:
+                self.add_point(item)
+            return
+
+        self.version += 1
+        held = self.items.iter_pairs()
+        self.items.load_sorted(merge(held, ((item, item) for item in batch), key=lambda pair: pair[0]))
+
+    def merge(self, other: Percentiles[T]) -> None:
+        """
+        Merging the points of another Percentiles (e.g. another shard) into this one
+
+        The trees are combined with split/join rather than re-inserting
+        every point, and other is left empty. A point held by both is kept once.
+
+        Best Case -  O(M log(N/M + 1)) with a balanced store such as WeightBalancedTree
+
+        Worst case - same as best case
+
+        where M <= N are the sizes of the two stores
+
+        """
+        self.items.union(other.items)
+        self.version += 1
+        other.version += 1
+
     def remove_point(self, item: T) -> None:
         """
         Removing a point from the object
@@ -50,59 +141,429 @@ class Percentiles(Generic[T]):
         """
         # delete the node from the binary tree
         del self.items[item]
-    
+        self.version += 1
+        self.patch_flat(item, added=False)
+
+    def remove_points(self, items: Iterable[T]) -> None:
+        """
+        Removing many points at once
+
+        Like add_points, a small batch is removed point by point, and a
+        large one in a single sorted pass followed by a balanced rebuild.
+        A point of the batch that is not held raises ValueError.
+
+        Best Case -  O(M*D) for a small batch of M points
+
+        Worst case - O(N + M log M) for the sort, pass and rebuild
+
+        where N is the number of points held and D is the depth of the tree
+
+        """
+        batch = sorted(items)
+        if len(batch) * len(self.items).bit_length() < len(self.items):
+            for item in batch:
+                self.remove_point(item)
+            return
+
+        kept, i = [], 0
+        for pair in self.items.iter_pairs():
+            if i < len(batch) and batch[i] < pair[0]:
+                break
+            if i < len(batch) and batch[i] == pair[0]:
+                i += 1
+            else:
+                kept.append(pair)
+        if i < len(batch):
+            raise ValueError('Deleting non-existent item')
+        self.items.load_sorted(kept)
+        self.version += 1
+
+    def snapshot(self) -> Percentiles[T]:
+        """
+        Returns a read-only view of the current points for query threads
+
+        With a persistent store (e.g. BinarySearchTree(persistent=True)) the
+        snapshot shares the published tree, so ratio can run against it
+        while add_point and remove_point keep going without any lock.
+
+        Best Case -  O(1) with a persistent store
+
+        Worst case - O(N) otherwise, since the points are copied
+
+        """
+        snapshot = type(self)(self.items.snapshot(), self.cache_size)
+        snapshot.flatten = self.flatten
+        return snapshot
 
     def ratio(self, x, y) -> list[int]:
         """
         Returns a list that satisfies the ratio requirements
 
-        Best Case -  O(D)
+        Results are cached per (x, y) until the next mutation; the caller
+        always gets its own copy.
+
+        Best Case -  O(K) when the same query was answered since the last mutation
+            
+        Worst case - O(D + K)
+            
+        where D is the depth of the tree
+        K is the number of points returned
+
+        """
+        key = (x, y)
+        version = self.version
+        entry = self.cache.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return entry[1][:]
+
+        self.misses += 1
+        result = self.ratio_aux(x, y)
+        if self.cache_size <= 0:
+            return result
+        # stamped with the version read before computing, so a result that
+        # raced a mutation is never served
+        self.cache[key] = (version, result)
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result[:]
+
+    def ratio_aux(self, x, y) -> list[int]:
+        """
+        Computes ratio(x, y) from the store, bypassing the cache
+
+        Best Case -  O(D + K)
             
         Worst case - same as best case
             
         where D is the depth of the tree
-        CompK is the complexity of comparing the keys
+        K is the number of points returned
 
         """
-        # calculating the treshholds for x and y
-        
-        threshold_x_element : int = ceil((x/100)*(len(self.items)))    #O(1)
-        threshold_y_element : int = len(self.items)-1 -ceil((y/100)*(len(self.items)))   
-        
-        
-        #calcuting the kth smallest elements for the thresholds
-        """
-        remember that kth_smallest returns the node and not the item itself
-        """
-        threshold_x = self.items.kth_smallest(threshold_x_element+1, self.items.root) #O(D), D is depth
-        threshold_y = self.items.kth_smallest(threshold_y_element+1, self.items.root)
-        
-
-        
-        lst = []
-        if threshold_x is None or threshold_y is None:
+        return self.band_aux(*self.band_ranks(x, y))
+
+    def band_aux(self, first: int, last: int) -> list[T]:
+        """
+        Returns the points with 1-based ranks first to last inclusive,
+        or an empty result when first > last
+
+        :pre: 1 <= first and last <= len(self.items)
+
+        Best Case -  O(D + K)
+            
+        Worst case - same as best case
+            
+        where D is the depth of the tree
+        K is the number of points returned
+
+        """
+        if first > last:
             return []
-        final_list = self.aux_ratio(self.items.root, threshold_x.item, threshold_y.item, lst)
-        return final_list
-    
-    def aux_ratio(self, current_node, x, y, lst) -> list[int]:
-        if current_node is not None:
+        flat = self.sorted_points()
+        if flat is not None:
+            return flat[first - 1:last]
+        return list(self.iter_ranks(first, last))
+
+    def ratio_many(self, bands: Iterable[tuple], kind: str = 'list') -> list:
+        """
+        Answers ratio for every (x, y) in bands at once
+
+        kind chooses what is returned for each band: 'list' for the points
+        (the same as ratio), 'count' for their number (as ratio_count) or
+        'view' for a lazy PercentileView (as ratio_view). Lists are sliced
+        from one in-order pass over the span from the lowest to the highest
+        rank any band keeps, so the store is descended only once.
+
+        Best Case -  O(B) for counts or views
+
+        Worst case - O(D + S + K) for lists
+
+        where B is the number of bands
+        D is the depth of the tree
+        S is the number of points in the span
+        K is the number of points returned
+
+        """
+        ranks = [self.band_ranks(x, y) for x, y in bands]
+        if kind == 'count':
+            return [max(0, last - first + 1) for first, last in ranks]
+        if kind == 'view':
+            return [PercentileView(self, range(first, last + 1)) for first, last in ranks]
+        if kind != 'list':
+            raise ValueError("kind must be 'list', 'count' or 'view'")
+
+        live = [(first, last) for first, last in ranks if first <= last]
+        lo = min((first for first, _ in live), default=1)
+        hi = max((last for _, last in live), default=0)
+        span = self.band_aux(lo, hi)
+        return [span[first - lo:last - lo + 1] if first <= last else span[:0] for first, last in ranks]
+
+    def ratio_iter(self, x, y) -> Iterator[T]:
+        """
+        Lazily yields the points ratio(x, y) would return, in increasing order
+
+        Only the lower threshold is located up front; each further point is
+        one in-order step, so a caller that stops early pays for what it took.
+        Like a cursor, the iterator must not outlive the next add or remove,
+        except in flat mode, where the band is copied when it is created.
+
+        Best Case -  O(D) to position, then O(1) amortised per point
             
-            if (x <= current_node.key):
-                self.aux_ratio(current_node.left, x, y, lst)
-            if ((current_node.key >= x) and (current_node.key <= y)):
-                lst.append(current_node.key)
-            if (y > current_node.key):
-                self.aux_ratio(current_node.right, x, y, lst)                 
-        return lst
+        Worst case - same as best case
+            
+        where D is the depth of the tree
 
+        """
+        first, last = self.band_ranks(x, y)
+        if first > last:
+            return iter(())
+        return self.iter_ranks(first, last)
 
+    def ratio_view(self, x, y) -> PercentileView[T]:
+        """
+        Returns a lazy sequence over the points ratio(x, y) would return
 
+        The view only records the threshold ranks: len() is O(1), indexing
+        is one kth_smallest descent and slicing returns a narrower view.
+        It reads the live store, so it should not outlive the next
+        add_point or remove_point.
 
+        Best Case -  O(1)
+            
+        Worst case - same as best case
 
+        """
+        first, last = self.band_ranks(x, y)
+        return PercentileView(self, range(first, last + 1))
 
+    def ratio_count(self, x, y) -> int:
+        """
+        Returns how many points ratio(x, y) would return, without visiting them
+
+        Best Case -  O(1), only the threshold ranks are needed
+            
+        Worst case - same as best case
+
+        """
+        first, last = self.band_ranks(x, y)
+        return last - first + 1
 
+    def cursor(self, x) -> BSTCursor:
+        """
+        Returns a cursor positioned at the lowest point kept by ratio(x, y),
+        i.e. the first point above the bottom x percent. The cursor can then
+        step forwards or backwards without restarting from the root; it is
+        unpositioned if no such point exists.
+
+        Best Case -  O(D)
+            
+        Worst case - same as best case
+            
+        where D is the depth of the tree
+
+        """
+        first, _ = self.threshold_ranks(x, 0)
+        cursor = self.items.cursor()
+        cursor.seek_rank(first)
+        return cursor
+
+    def scan_from(self, x) -> Iterator[T]:
+        """
+        Lazily yields the points above the bottom x percent in increasing order
+
+        Best Case -  O(D) to position, then O(1) amortised per point
+            
+        Worst case - same as best case
+            
+        where D is the depth of the tree
+
+        """
+        first, _ = self.threshold_ranks(x, 0)
+        if not 1 <= first <= len(self.items):
+            return iter(())
+        return self.iter_ranks(first, len(self.items))
+
+    def iter_ranks(self, first: int, last: int) -> Iterator[T]:
+        """
+        Lazily yields the points with 1-based ranks first to last inclusive
+
+        Over the store this walks a cursor, which any add or remove
+        invalidates; over the flat snapshot the band is copied up front,
+        so later writes do not disturb it.
+
+        :pre: 1 <= first <= len(self.items)
+
+        Best Case -  O(D) to position, then O(1) amortised per point
+            
+        Worst case - same as best case
+            
+        where D is the depth of the tree
+
+        """
+        flat = self.sorted_points()
+        if flat is not None:
+            # a copy, since patch_flat edits the live list in place
+            return iter(flat[first - 1:last])
+        cursor = self.items.cursor()
+        node = cursor.seek_rank(first)
+        skip = 0
+        if self.items.multiset:
+            # the rank may fall among the copies of a point
+            skip = first - 1 - self.items.rank_aux(node.key, inclusive=False)
+        return islice(iter(cursor), skip, skip + max(0, last - first + 1))
+
+    def kth_smallest(self, k: int) -> T:
+        """
+        Returns the point with 1-based rank k
+
+        :pre: 1 <= k <= len(self.items)
+
+        Best Case -  O(1) from the flat snapshot
+
+        Worst case - O(D) from the store
+
+        where D is the depth of the tree
+
+        """
+        flat = self.sorted_points()
+        if flat is not None:
+            return flat[k - 1]
+        return self.items.kth_smallest(k, self.items.root).key
+
+    def sorted_points(self) -> list[T] | None:
+        """
+        Returns the flat sorted snapshot of the points, rebuilding it if a
+        write was not patched in, or None when flatten is off
+
+        Best Case -  O(1) when the snapshot is current
+
+        Worst case - O(N) to rebuild it
+
+        """
+        if not self.flatten:
+            return None
+        if self.flat is None or self.flat_version != self.version:
+            start = time.perf_counter()
+            self.flat = [point for point, _ in self.items.iter_pairs()]
+            self.flat_rebuild_seconds += time.perf_counter() - start
+            self.flat_rebuilds += 1
+            self.flat_version = self.version
+        self.flat_pending = 0
+        return self.flat
+
+    def patch_flat(self, item: T, added: bool) -> None:
+        """
+        Brings the flat snapshot up to date after one point was added or
+        removed, if it was current before that write
+
+        Best Case -  O(log N) when there is nothing to patch
+
+        Worst case - O(N) for the list insertion or deletion, done in C
+
+        """
+        if self.flat is None or self.flat_version != self.version - 1:
+            return
+        if self.flat_pending >= self.FLAT_PATCH_LIMIT:
+            # a write-heavy phase: stop paying for the patches until the next read
+            self.flat = None
+            return
+        if added:
+            insort(self.flat, item)
+        else:
+            del self.flat[bisect_left(self.flat, item)]
+        self.flat_version = self.version
+        self.flat_pending += 1
+        self.flat_patches += 1
+
+    def threshold_ranks(self, x, y) -> tuple[int, int]:
+        """
+        Returns the 1-based ranks of the lowest and highest points kept by ratio(x, y)
+
+        Best Case -  O(1)
+            
+        Worst case - same as best case
+
+        """
+        # calculating the treshholds for x and y
+        threshold_x_element : int = ceil((x/100)*(len(self.items)))
+        threshold_y_element : int = len(self.items)-1 -ceil((y/100)*(len(self.items)))
+        return threshold_x_element + 1, threshold_y_element + 1
+
+
+    def band_ranks(self, x, y) -> tuple[int, int]:
+        """
+        Returns the threshold ranks of ratio(x, y), or the empty band (1, 0)
+        when either of them falls outside the store, as when x + y > 100 or
+        a percentage is negative. Every result mode goes through this, so
+        ratio, ratio_many, ratio_iter, ratio_view and ratio_count agree.
+
+        Best Case -  O(1)
+
+        Worst case - same as best case
+
+        """
+        first, last = self.threshold_ranks(x, y)
+        n = len(self.items)
+        if not (1 <= first <= n and 1 <= last <= n) or first > last:
+            return 1, 0
+        return first, last
+
+class PercentileView(Generic[T]):
+    """
+    Read-only sequence over a band of ranks of a Percentiles object
+
+    Nothing is materialised: each access walks the store when it happens.
+    """
+
+    def __init__(self, percentiles: Percentiles[T], ranks: range) -> None:
+        """
+        Best Case - O(1)
+
+        Worst Case - same as best case
+        """
+        self.percentiles = percentiles
+        self.ranks = ranks
+
+    def __len__(self) -> int:
+        """
+        Best Case - O(1)
+
+        Worst Case - same as best case
+        """
+        return len(self.ranks)
+
+    def __getitem__(self, index: int | slice) -> T | PercentileView[T]:
+        """
+        Returns the point at index, or a narrower view for a slice
+
+        Best Case - O(1) for a slice
+
+        Worst Case - O(D) for an index, where D is the depth of the tree
+        """
+        if isinstance(index, slice):
+            return PercentileView(self.percentiles, self.ranks[index])
+        # range raises the IndexError for us and handles negative indices
+        return self.percentiles.kth_smallest(self.ranks[index])
+
+    def __iter__(self) -> Iterator[T]:
+        """
+        Best Case - O(D + K) for a forward view
+
+        Worst Case - O(K * D) for a view that steps backwards
+
+        where D is the depth of the tree
+        K is the number of points in the view
+        """
+        if not self.ranks:
+            return iter(())
+        if self.ranks.step < 0:
+            return (self[i] for i in range(len(self.ranks)))
+        return islice(self.percentiles.iter_ranks(self.ranks[0], self.ranks[-1]), 0, None, self.ranks.step)
 
+    def __repr__(self) -> str:
+        return f'PercentileView({list(self)!r})'
 
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+""" Bounded-memory quantile sketch (KLL) and an approximate Percentiles.
+    KLLSketch keeps a small, weighted sample of a stream: items live in
+    a stack of compactors, and an item at level h stands for 2**h points.
+    When the sketch outgrows its budget a level is sorted and every other
+    item is promoted, so memory stays O(k) however many points are added,
+    and two sketches built in different processes can be merged.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from math import ceil
+from typing import Generic, Iterable, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+class KLLSketch(Generic[T]):
+    """
+        KLL quantile sketch (Karnin, Lang and Liberty).
+
+        Level h may hold about k * C ** (H - 1 - h) items, where H is the
+        number of levels, so the top level holds k and lower ones shrink
+        geometrically. With the default C the normalised rank error is
+        roughly 1.7 / k.
+    """
+
+    C = 2 / 3
+    MIN_K = 8
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None) -> None:
+        """
+            Initialises an empty sketch whose top level holds k items.
+            :complexity: O(1)
+            :raises ValueError: if k is smaller than MIN_K
+        """
+        if k < self.MIN_K:
+            raise ValueError(f'k must be at least {self.MIN_K}')
+        self.k = k
+        self.n = 0
+        self.compactors: list[list[T]] = [[]]
+        self.size = 0
+        self.max_size = self.capacity(0)
+        self.random = random.Random(seed)
+        self.cdf: Optional[tuple[list[T], list[int]]] = None
+
+    @classmethod
+    def from_error(cls, epsilon: float, seed: Optional[int] = None) -> KLLSketch[T]:
+        """
+            Returns an empty sketch sized for a normalised rank error of about epsilon.
+            :complexity: O(1)
+        """
+        return cls(max(cls.MIN_K, ceil(1.7 / epsilon)), seed)
+
+    def __len__(self) -> int:
+        """
+            Returns the number of points summarised by the sketch.
+            :complexity: O(1)
+        """
+        return self.n
+
+    def capacity(self, level: int) -> int:
+        """
+            Returns how many items the given level may hold before it is compacted.
+            :complexity: O(1)
+        """
+        height = len(self.compactors)
+        return ceil(self.k * self.C ** (height - 1 - level)) + 1
+
+    def update(self, item: T) -> None:
+        """
+            Adds one point to the sketch.
+            :complexity: O(1) amortised, O(k log k) when a level is compacted
+        """
+        self.compactors[0].append(item)
+        self.n += 1
+        self.size += 1
+        self.cdf = None
+        if self.size >= self.max_size:
+            self.compress()
+
+    def compress(self) -> None:
+        """
+            Compacts levels from the bottom up until the sketch is within its budget.
+            Compacting a level sorts it and promotes every other item, picked
+            from a random offset, to the level above with double the weight.
+            An odd item out stays behind.
+            :complexity: O(k log k)
+        """
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) < self.capacity(level):
+                continue
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+            items.sort()
+            leftover = [items.pop()] if len(items) % 2 else []
+            self.compactors[level + 1].extend(items[self.random.randrange(2)::2])
+            self.compactors[level] = leftover
+            self.size = sum(map(len, self.compactors))
+            self.max_size = sum(self.capacity(h) for h in range(len(self.compactors)))
+            if self.size < self.max_size:
+                break
+
+    def merge(self, other: KLLSketch[T]) -> None:
+        """
+            Folds the points summarised by other into this sketch; other is left unchanged.
+            :complexity: O(k log k) for sketches of similar size
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self.size = sum(map(len, self.compactors))
+        self.max_size = sum(self.capacity(h) for h in range(len(self.compactors)))
+        self.cdf = None
+        while self.size >= self.max_size:
+            self.compress()
+
+    def weighted_items(self) -> tuple[list[T], list[int]]:
+        """
+            Returns the retained items in increasing order with the cumulative
+            weight up to and including each of them. Cached until the next update.
+            :complexity: O(k log k)
+        """
+        if self.cdf is None:
+            pairs = sorted((item, 1 << level) for level, items in enumerate(self.compactors) for item in items)
+            self.cdf = [item for item, _ in pairs], list(accumulate(weight for _, weight in pairs))
+        return self.cdf
+
+    def rank(self, item: T) -> int:
+        """
+            Returns the estimated number of points less than or equal to item.
+            :complexity: O(log k) once the cumulative weights are cached
+        """
+        items, cumulative = self.weighted_items()
+        position = bisect_right(items, item)
+        return cumulative[position - 1] if position else 0
+
+    def quantile(self, q: float) -> T:
+        """
+            Returns a retained item whose estimated rank is about q * n.
+            :complexity: O(log k) once the cumulative weights are cached
+            :raises IndexError: if the sketch is empty
+        """
+        if self.n == 0:
+            raise IndexError('Quantile of an empty sketch')
+        items, cumulative = self.weighted_items()
+        position = bisect_right(cumulative, q * self.n)
+        return items[min(position, len(items) - 1)]
+
+
+class ApproxPercentiles(Generic[T]):
+
+    def __init__(self, epsilon: float = 0.01, seed: Optional[int] = None) -> None:
+        """
+        Initialises an approximate percentile object backed by a KLL sketch
+
+        Unlike Percentiles only O(1/epsilon) points are kept, so the band
+        returned by ratio may be off by about epsilon * N ranks at each end
+        and only holds the points the sketch retained.
+
+        Best Case - O(1)
+
+        Worst Case - same as best case
+        """
+        self.items: KLLSketch[T] = KLLSketch.from_error(epsilon, seed)
+
+    def add_point(self, item: T) -> None:
+        """
+        Adding a point to the sketch
+
+        Best Case -  O(1) amortised
+
+        Worst case - O(K log K) when the sketch compacts a level
+
+        where K is the number of retained points
+
+        """
+        self.items.update(item)
+
+    def add_points(self, items: Iterable[T]) -> None:
+        """
+        Adding many points at once
+
+        Best Case -  O(M) amortised for M points
+
+        Worst case - same as best case
+
+        """
+        for item in items:
+            self.items.update(item)
+
+    def merge(self, other: ApproxPercentiles[T]) -> None:
+        """
+        Merging the sketch of another ApproxPercentiles (e.g. from another process) into this one
+
+        Sketches pickle as plain lists, so shards can be built anywhere and
+        merged here. other is left unchanged.
+
+        Best Case -  O(K log K)
+
+        Worst case - same as best case
+
+        where K is the number of retained points
+
+        """
+        self.items.merge(other.items)
+
+    def ratio(self, x, y) -> list[T]:
+        """
+        Returns the retained points whose estimated rank lies in the band
+        ratio(x, y) would keep on the exact tree
+
+        A retained point of weight w stands for w consecutive ranks and is
+        kept when the middle of them falls inside the band, so while the
+        sketch has not compacted yet the result is exact.
+
+        Best Case -  O(K) once the cumulative weights are cached
+
+        Worst case - O(K log K) after an update
+
+        where K is the number of retained points
+
+        """
+        first, last = self.threshold_ranks(x, y)
+        items, cumulative = self.items.weighted_items()
+        # the middle rank of item i is (cumulative[i - 1] + 1 + cumulative[i]) / 2
+        middles = [(below + 1 + upto) / 2 for below, upto in zip([0] + cumulative, cumulative)]
+        return items[bisect_right(middles, first - 1 / 2):bisect_right(middles, last)]
+
+    def ratio_count(self, x, y) -> int:
+        """
+        Returns how many of the N summarised points fall in the band
+
+        Best Case -  O(1)
+
+        Worst case - same as best case
+
+        """
+        first, last = self.threshold_ranks(x, y)
+        return max(0, last - first + 1)
+
+    def threshold_ranks(self, x, y) -> tuple[int, int]:
+        """
+        Returns the 1-based ranks of the lowest and highest points kept by ratio(x, y)
+
+        Best Case -  O(1)
+
+        Worst case - same as best case
+
+        """
+        n = len(self.items)
+        return ceil((x / 100) * n) + 1, n - ceil((y / 100) * n)
@@ -0,0 +1,497 @@
+""" Blocked sorted-array store for Percentiles, backed by NumPy.
+    The points are kept as a list of sorted NumPy blocks with their
+    running counts, so batches of points are added or removed with
+    vectorised merges and a percentile band is two index lookups plus a
+    slice. SortedBlocks satisfies the same store contract as
+    bst.BinarySearchTree, and ArrayPercentiles routes the batch methods
+    and ratio to the vectorised paths.
+"""
+
+from __future__ import annotations
+
+__docformat__ = 'reStructuredText'
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from btree import BTreeEntry
+from ratio import Percentiles
+
+
+class SortedBlocks:
+    """
+        Sorted points split into read-only NumPy blocks of about block_size.
+
+        Blocks are never written in place: every change builds new arrays,
+        so slices handed out by slice_ranks and snapshots can share them.
+        Points are their own items. Like BinarySearchTree, a repeated point
+        raises ValueError unless the store is in multiset mode.
+    """
+
+    def __init__(self, block_size: int = 4096, multiset: bool = False, dtype=np.float64) -> None:
+        """
+            Initialises an empty store of the given NumPy dtype.
+            :complexity: O(1)
+            :raises ValueError: if block_size is smaller than 2
+        """
+        if block_size < 2:
+            raise ValueError('block_size must be at least 2')
+        self.block_size = block_size
+        self.multiset = multiset
+        self.dtype = np.dtype(dtype)
+        self.blocks: list[np.ndarray] = []
+        self.maxes: list = []
+        self.offsets: list[int] = [0]
+
+    def __len__(self) -> int:
+        """ Returns the number of points in the store. """
+
+        return self.offsets[-1]
+
+    def is_empty(self) -> bool:
+        """
+            Checks to see if the store is empty
+            :complexity: O(1)
+        """
+        return len(self) == 0
+
+    @property
+    def root(self) -> Optional[list[np.ndarray]]:
+        """ The blocks, or None when empty, standing in for a tree root in kth_smallest calls. """
+        return self.blocks or None
+
+    def reindex(self) -> None:
+        """
+            Refreshes the block maxima and running counts after the blocks changed.
+            :complexity: O(B) where B is the number of blocks
+        """
+        for block in self.blocks:
+            block.flags.writeable = False
+        self.maxes = [block[-1].item() for block in self.blocks]
+        self.offsets = [0, *accumulate(len(block) for block in self.blocks)]
+
+    def flat(self) -> np.ndarray:
+        """
+            Returns every point as one sorted array.
+            :complexity: O(N)
+        """
+        if not self.blocks:
+            return np.empty(0, self.dtype)
+        return np.concatenate(self.blocks)
+
+    def load_array(self, points: np.ndarray) -> None:
+        """
+            Replaces the contents with an already sorted array, cut into
+            block_size views of it without copying.
+            :complexity: O(N / block_size)
+        """
+        self.blocks = [points[lo:lo + self.block_size] for lo in range(0, len(points), self.block_size)]
+        self.reindex()
+
+    def load_sorted(self, pairs: Iterable[tuple]) -> None:
+        """
+            Replaces the contents with the keys of (key, item) pairs in strictly
+            increasing key order (non-decreasing in multiset mode).
+            :complexity: O(N)
+            :raises ValueError: if the keys are not strictly increasing
+        """
+        points = np.fromiter((key for key, _ in pairs), self.dtype)
+        steps = np.diff(points)
+        if np.any(steps < 0) or (not self.multiset and np.any(steps == 0)):
+            raise ValueError('Keys must be unique and sorted')
+        self.load_array(points)
+
+    def locate(self, k: int) -> tuple[int, int]:
+        """
+            Returns the block and the position in it of the point with 0-based rank k.
+            :pre: 0 <= k < len(self)
+            :complexity: O(log B)
+        """
+        i = bisect_right(self.offsets, k) - 1
+        return i, k - self.offsets[i]
+
+    def rank_aux(self, key, inclusive: bool) -> int:
+        """
+            Counts the points below key (and equal to it when inclusive):
+            whole blocks are counted from the running counts, and only one
+            block is searched.
+            :complexity: O(log B + log block_size)
+        """
+        i = (bisect_right if inclusive else bisect_left)(self.maxes, key)
+        if i == len(self.blocks):
+            return len(self)
+        side = 'right' if inclusive else 'left'
+        return self.offsets[i] + int(np.searchsorted(self.blocks[i], key, side))
+
+    def rank(self, key) -> int:
+        """
+            Returns the number of points less than or equal to key.
+            :complexity: O(log B + log block_size)
+        """
+        return self.rank_aux(key, inclusive=True)
+
+    def count_range(self, lo, hi) -> int:
+        """
+            Returns the number of points k with lo <= k <= hi.
+            :complexity: O(log B + log block_size)
+        """
+        if hi < lo:
+            return 0
+        return self.rank_aux(hi, inclusive=True) - self.rank_aux(lo, inclusive=False)
+
+    def count(self, key) -> int:
+        """
+            Returns how many times key is held (at most one outside multiset mode).
+            :complexity: O(log B + log block_size)
+        """
+        return self.rank_aux(key, inclusive=True) - self.rank_aux(key, inclusive=False)
+
+    def __contains__(self, key) -> bool:
+        """
+            Checks to see if the key is in the store
+            :complexity: O(log B + log block_size)
+        """
+        return self.count(key) > 0
+
+    def __getitem__(self, key):
+        """
+            Returns the point equal to key.
+            :complexity: O(log B + log block_size)
+            :raises KeyError: if the key is not in the store
+        """
+        if key not in self:
+            raise KeyError('Key not found')
+        return self.dtype.type(key).item()
+
+    def kth_smallest(self, k: int, current: Optional[list[np.ndarray]]) -> Optional[BTreeEntry]:
+        """
+            Finds the kth smallest point (1-based).
+            :complexity: O(log B), plus O(log N) in multiset mode for the count
+            :returns: its entry, or None if k is out of range
+        """
+        if current is None or not 1 <= k <= len(self):
+            return None
+        i, j = self.locate(k - 1)
+        key = self.blocks[i][j].item()
+        return BTreeEntry(key, key, self.count(key) if self.multiset else 1)
+
+    def __setitem__(self, key, item) -> None:
+        """
+            Inserts one point; item is ignored, since the point is its own item.
+            :complexity: O(block_size + B)
+            :raises ValueError: if the point is already held outside multiset mode
+        """
+        if not self.multiset and key in self:
+            raise ValueError('Inserting duplicate item')
+        if not self.blocks:
+            self.load_array(np.array([key], self.dtype))
+            return
+        i = min(bisect_left(self.maxes, key), len(self.blocks) - 1)
+        block = self.blocks[i]
+        block = np.insert(block, int(np.searchsorted(block, key, 'right')), key)
+        if len(block) > 2 * self.block_size:
+            half = len(block) // 2
+            self.blocks[i:i + 1] = [block[:half], block[half:]]
+        else:
+            self.blocks[i] = block
+        self.reindex()
+
+    def __delitem__(self, key) -> None:
+        """
+            Removes one copy of a point. A block left nearly empty is merged
+            with a neighbour so the number of blocks stays O(N / block_size).
+            :complexity: O(block_size + B)
+            :raises ValueError: if the point is not held
+        """
+        if key not in self:
+            raise ValueError('Deleting non-existent item')
+        i = bisect_left(self.maxes, key)
+        block = self.blocks[i]
+        block = np.delete(block, int(np.searchsorted(block, key, 'left')))
+        self.blocks[i] = block
+        if len(block) < self.block_size // 4 and len(self.blocks) > 1:
+            lo = i - 1 if i > 0 else i
+            merged = np.concatenate(self.blocks[lo:lo + 2])
+            if len(merged) > 2 * self.block_size:
+                half = len(merged) // 2
+                self.blocks[lo:lo + 2] = [merged[:half], merged[half:]]
+            else:
+                self.blocks[lo:lo + 2] = [merged]
+        elif len(block) == 0:
+            del self.blocks[i]
+        self.reindex()
+
+    def add_array(self, points) -> None:
+        """
+            Adds a batch of points with one vectorised merge: the batch is
+            sorted, its slots in the merged order are found with a single
+            searchsorted, and both sides are scattered into place.
+            :complexity: O(N + M log N) where M is the size of the batch
+            :raises ValueError: if a point would be repeated outside multiset mode
+        """
+        batch = np.sort(np.asarray(points, self.dtype).ravel())
+        held = self.flat()
+        slots = np.searchsorted(held, batch, 'right')
+        if not self.multiset:
+            clash = slots > 0
+            if np.any(batch[1:] == batch[:-1]) or np.any(held[slots[clash] - 1] == batch[clash]):
+                raise ValueError('Inserting duplicate item')
+        slots += np.arange(len(batch))
+        merged = np.empty(len(held) + len(batch), self.dtype)
+        kept = np.ones(len(merged), bool)
+        kept[slots] = False
+        merged[slots] = batch
+        merged[kept] = held
+        self.load_array(merged)
+
+    def remove_array(self, points) -> None:
+        """
+            Removes a batch of points with one vectorised pass. Repeated
+            points in the batch remove that many copies. Nothing is removed
+            if any of them is missing.
+            :complexity: O(N + M log N) where M is the size of the batch
+            :raises ValueError: if a point of the batch is not held
+        """
+        batch = np.sort(np.asarray(points, self.dtype).ravel())
+        held = self.flat()
+        # the i-th copy of a value in the batch removes the i-th copy held
+        copy = np.arange(len(batch)) - np.searchsorted(batch, batch, 'left')
+        slots = np.searchsorted(held, batch, 'left') + copy
+        if np.any(slots >= len(held)) or np.any(held[np.minimum(slots, len(held) - 1)] != batch):
+            raise ValueError('Deleting non-existent item')
+        self.load_array(np.delete(held, slots))
+
+    def slice_ranks(self, start: int, stop: int) -> np.ndarray:
+        """
+            Returns the points with 0-based ranks start to stop - 1 as an
+            array. A band inside one block is a read-only view of it; a
+            wider band is concatenated from the blocks it spans.
+            :complexity: O(log B) for a view, O(stop - start) otherwise
+        """
+        if stop <= start:
+            return np.empty(0, self.dtype)
+        first, lo = self.locate(start)
+        last, hi = self.locate(stop - 1)
+        if first == last:
+            return self.blocks[first][lo:hi + 1]
+        parts = [self.blocks[first][lo:], *self.blocks[first + 1:last], self.blocks[last][:hi + 1]]
+        return np.concatenate(parts)
+
+    def iter_ranks(self, start: int) -> Iterator:
+        """
+            Lazily yields the points from 0-based rank start onwards as Python scalars.
+            :complexity: O(log B) to position, then O(1) amortised per point
+        """
+        if start >= len(self):
+            return
+        i, j = self.locate(start)
+        yield from self.blocks[i][j:].tolist()
+        for block in self.blocks[i + 1:]:
+            yield from block.tolist()
+
+    def iter_range(self, lo, hi) -> Iterator:
+        """
+            Lazily yields the points k with lo <= k <= hi in increasing order.
+            :complexity: O(log B + log block_size) to position, then O(1) amortised per point
+        """
+        start = self.rank_aux(lo, inclusive=False)
+        stop = self.rank_aux(hi, inclusive=True)
+        for point in self.iter_ranks(start):
+            if start == stop:
+                return
+            start += 1
+            yield point
+
+    def iter_pairs(self) -> Iterator[tuple]:
+        """
+            Yields (point, point) for every point in increasing order.
+            :complexity: O(N)
+        """
+        for point in self.iter_ranks(0):
+            yield point, point
+
+    def snapshot(self) -> SortedBlocks:
+        """
+            Returns an independent store holding the same points. Since
+            blocks are never written in place, it shares them.
+            :complexity: O(B)
+        """
+        store = SortedBlocks(self.block_size, self.multiset, self.dtype)
+        store.blocks = list(self.blocks)
+        store.reindex()
+        return store
+
+    def union(self, other: SortedBlocks) -> None:
+        """
+            Merges every point of other into this store and leaves other
+            empty. Outside multiset mode a point held by both is kept once.
+            :complexity: O(N + M log N)
+        """
+        points = other.flat()
+        if not self.multiset:
+            points = np.setdiff1d(points, self.flat(), assume_unique=True)
+        self.add_array(points)
+        other.load_array(np.empty(0, other.dtype))
+
+    def cursor(self) -> SortedBlocksCursor:
+        """
+            Returns an unpositioned in-order cursor over this store.
+            :complexity: O(1)
+        """
+        return SortedBlocksCursor(self)
+
+
+class SortedBlocksCursor:
+    """
+        Bidirectional cursor over a SortedBlocks, with the same interface as
+        bst.BSTCursor. It holds the 0-based rank of the first copy of the
+        point it is positioned at. Any mutation of the store invalidates the cursor.
+    """
+
+    def __init__(self, store: SortedBlocks) -> None:
+        self.store = store
+        self.position: Optional[int] = None
+
+    @property
+    def node(self) -> Optional[BTreeEntry]:
+        """ The entry the cursor is positioned at, or None. """
+        if self.position is None:
+            return None
+        return self.store.kth_smallest(self.position + 1, self.store.root)
+
+    def is_valid(self) -> bool:
+        """ Checks whether the cursor is positioned at an entry. """
+        return self.position is not None
+
+    def settle(self, k: int) -> Optional[BTreeEntry]:
+        """
+            Positions the cursor at the first copy of the point with 0-based
+            rank k, or unpositions it if k is out of range.
+        """
+        if not 0 <= k < len(self.store):
+            self.position = None
+            return None
+        if self.store.multiset:
+            i, j = self.store.locate(k)
+            k = self.store.rank_aux(self.store.blocks[i][j].item(), inclusive=False)
+        self.position = k
+        return self.node
+
+    def seek(self, key) -> Optional[BTreeEntry]:
+        """
+            Positions the cursor at the entry with the smallest key >= key.
+            :complexity: O(log N)
+        """
+        return self.settle(self.store.rank_aux(key, inclusive=False))
+
+    def seek_rank(self, k: int) -> Optional[BTreeEntry]:
+        """
+            Positions the cursor at the entry holding the kth smallest point (1-based).
+            :complexity: O(log N)
+        """
+        return self.settle(k - 1)
+
+    def seek_first(self) -> Optional[BTreeEntry]:
+        """ Positions the cursor at the smallest entry. """
+        return self.settle(0)
+
+    def seek_last(self) -> Optional[BTreeEntry]:
+        """ Positions the cursor at the largest entry. """
+        return self.settle(len(self.store) - 1)
+
+    def next(self) -> Optional[BTreeEntry]:
+        """
+            Moves the cursor to the next entry.
+            :complexity: O(log N)
+        """
+        if self.position is None:
+            return None
+        return self.settle(self.position + self.node.count)
+
+    def prev(self) -> Optional[BTreeEntry]:
+        """
+            Moves the cursor to the previous entry.
+            :complexity: O(log N)
+        """
+        if self.position is None:
+            return None
+        return self.settle(self.position - 1)
+
+    def __iter__(self) -> Iterator:
+        """
+            Yields the point under the cursor and every larger point, each
+            copy once, advancing the cursor as it goes.
+            :complexity: O(1) amortised per point
+        """
+        if self.position is None:
+            return
+        for point in self.store.iter_ranks(self.position):
+            yield point
+            self.position += 1
+        self.position = None
+
+
+class ArrayPercentiles(Percentiles):
+    """
+        Percentiles over a SortedBlocks store: add_points and remove_points
+        are vectorised merges, and ratio returns a read-only NumPy array, a view into
+        the store when the band fits in one block.
+    """
+
+    def __init__(self, store: SortedBlocks | None = None, cache_size: int = 0) -> None:
+        """
+        Initialises an empty percentile object over a SortedBlocks store
+
+        Best Case - O(1)
+
+        Worst Case - same as best case
+        """
+        super().__init__(store if store is not None else SortedBlocks(), cache_size)
+
+    def add_points(self, items) -> None:
+        """
+        Adding a batch of points (any array-like) with one vectorised merge
+
+        Best Case -  O(N + M log N)
+
+        Worst case - same as best case
+
+        where N is the number of points already held and M the size of the batch
+
+        """
+        self.items.add_array(items)
+        self.version += 1
+
+    def remove_points(self, items) -> None:
+        """
+        Removing a batch of points (any array-like) with one vectorised pass
+
+        Best Case -  O(N + M log N)
+
+        Worst case - same as best case
+
+        where N is the number of points already held and M the size of the batch
+
+        """
+        self.items.remove_array(items)
+        self.version += 1
+
+    def band_aux(self, first: int, last: int) -> np.ndarray:
+        """
+        Returns the points with 1-based ranks first to last inclusive as a
+        read-only array, so a cached band can be handed out again without
+        copying; ratio and ratio_many slice their results from it
+
+        Best Case -  O(log N), a view into one block
+
+        Worst case - O(K) when the band spans several blocks
+
+        where K is the number of points returned
+
+        """
+        band = self.items.slice_ranks(first - 1, last)
+        band.flags.writeable = False
+        return band
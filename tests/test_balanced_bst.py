@@ -0,0 +1,136 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from balanced_bst import WeightBalancedTree
+from ratio import Percentiles
+
+
+def height(node):
+    if node is None:
+        return 0
+    return 1 + max(height(node.left), height(node.right))
+
+
+class WeightBalancedTreeTest(unittest.TestCase):
+
+    @timeout()
+    @number("6.1")
+    def test_sorted_insert(self):
+        tree = WeightBalancedTree()
+        for key in range(5000):
+            tree[key] = -key
+
+        self.assertEqual(len(tree), 5000)
+        self.assertEqual(tree.root.subtree_size, 5000)
+        self.assertTrue(tree.is_balanced(tree.root))
+        # log_{4/3}(5000) is roughly 30
+        self.assertLessEqual(height(tree.root), 30)
+        for k in (1, 17, 2500, 5000):
+            self.assertEqual(tree.kth_smallest(k, tree.root).key, k - 1)
+        self.assertEqual(tree[1234], -1234)
+        with self.assertRaises(ValueError):
+            tree[10] = 0
+
+    @timeout()
+    @number("6.2")
+    def test_delete(self):
+        random.seed(4029384)
+        keys = list(range(3000))
+        random.shuffle(keys)
+        tree = WeightBalancedTree()
+        for key in sorted(keys):
+            tree[key] = key
+        for key in keys[:2000]:
+            del tree[key]
+            self.assertNotIn(key, tree)
+
+        remaining = sorted(keys[2000:])
+        self.assertEqual(len(tree), 1000)
+        self.assertTrue(tree.is_balanced(tree.root))
+        for k, key in enumerate(remaining, start=1):
+            self.assertEqual(tree.kth_smallest(k, tree.root).key, key)
+
+    @timeout()
+    @number("6.3")
+    def test_percentiles(self):
+        p = Percentiles(WeightBalancedTree())
+        for point in range(1, 101):
+            p.add_point(point)
+        self.assertTrue(p.items.is_balanced(p.items.root))
+        self.assertEqual(p.ratio(10, 10), list(range(11, 91)))
+
+    @timeout()
+    @number("6.4")
+    def test_split_join(self):
+        tree = WeightBalancedTree()
+        for key in range(1000):
+            tree[key] = key
+
+        smaller, larger = tree.split(400)
+        self.assertEqual(len(tree), 0)
+        self.assertEqual((len(smaller), len(larger)), (400, 600))
+        self.assertTrue(smaller.is_balanced(smaller.root))
+        self.assertTrue(larger.is_balanced(larger.root))
+        self.assertEqual(larger.kth_smallest(1, larger.root).key, 400)
+        self.assertIsInstance(larger, WeightBalancedTree)
+
+        # joining a tiny tree onto a large one must rebalance along the spine
+        tiny = WeightBalancedTree()
+        tiny[5000] = 5000
+        larger.join(tiny)
+        larger.join(WeightBalancedTree())
+        self.assertEqual(len(tiny), 0)
+        self.assertTrue(larger.is_balanced(larger.root))
+        smaller.join(larger)
+        self.assertEqual(len(smaller), 1001)
+        self.assertTrue(smaller.is_balanced(smaller.root))
+        self.assertEqual([node.key for node in smaller.in_order()], list(range(1000)) + [5000])
+
+        with self.assertRaises(ValueError):
+            smaller.join(WeightBalancedTree.from_sorted([(10, 10)]))
+
+    @timeout()
+    @number("6.5")
+    def test_union(self):
+        random.seed(3495802)
+        first = random.sample(range(20000), 3000)
+        second = random.sample(range(20000), 40)
+        tree, other = WeightBalancedTree(), WeightBalancedTree()
+        for key in first:
+            tree[key] = 'first'
+        for key in second:
+            other[key] = 'second'
+
+        tree.union(other)
+        expected = sorted(set(first) | set(second))
+        self.assertEqual(len(other), 0)
+        self.assertEqual(len(tree), len(expected))
+        self.assertTrue(tree.is_balanced(tree.root))
+        self.assertEqual([node.key for node in tree.in_order()], expected)
+        for key in second:
+            self.assertEqual(tree[key], 'first' if key in first else 'second')
+
+    @timeout()
+    @number("6.6")
+    def test_persistent(self):
+        random.seed(98123)
+        tree = WeightBalancedTree(persistent=True)
+        expected, snapshots = set(), []
+        for step in range(2000):
+            key = random.randrange(1000)
+            if key in expected:
+                del tree[key]
+                expected.remove(key)
+            else:
+                tree[key] = key
+                expected.add(key)
+            if step % 250 == 0:
+                snapshots.append((tree.snapshot(), sorted(expected)))
+
+        smaller, larger = tree.split(500)
+        smaller.union(larger)
+        for snapshot, keys in snapshots:
+            self.assertTrue(snapshot.is_balanced(snapshot.root))
+            self.assertEqual([node.key for node in snapshot.in_order()], keys)
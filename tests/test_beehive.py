@@ -1,3 +1,4 @@
+import random
 import unittest
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
@@ -47,3 +48,61 @@ class TestBeehiveSelector(unittest.TestCase):
         for actual, ex in zip(all_emeralds, expected):
             self.assertAlmostEqual(actual, ex, 0)
         
+
+    @timeout()
+    @number("5.2")
+    def test_set_all_beehives(self):
+        random.seed(9012)
+        stats = [(random.randint(1, 50), random.randint(1, 20), random.randint(0, 100)) for _ in range(300)]
+        hives = [Beehive(i, i, i, capacity=c, nutrient_factor=n, volume=v) for i, (c, n, v) in enumerate(stats)]
+        s, t = BeehiveSelector(300), BeehiveSelector(300)
+        s.add_beehive(hives[0])
+        s.set_all_beehives(hives)
+        for i, (c, n, v) in enumerate(stats):
+            t.add_beehive(Beehive(i, i, i, capacity=c, nutrient_factor=n, volume=v))
+        self.assertEqual(len(s.store), 300)
+        self.assertEqual([s.harvest_best_beehive() for _ in range(500)], [t.harvest_best_beehive() for _ in range(500)])
+
+    @timeout()
+    @number("5.3")
+    def test_update_and_remove(self):
+        s = BeehiveSelector()
+        b1, b2, b3 = (
+            Beehive(1, 1, 1, capacity=10, nutrient_factor=2, volume=10),
+            Beehive(2, 2, 2, capacity=10, nutrient_factor=3, volume=10),
+            Beehive(3, 3, 3, capacity=10, nutrient_factor=4, volume=10),
+        )
+        s.set_all_beehives([b1, b2, b3])
+        b1.volume = 100
+        b1.nutrient_factor = 5
+        s.update_beehive(b1)
+        s.remove_beehive(b3)
+        self.assertEqual(s.harvest_best_beehive(), 50)
+        b2.volume = 0
+        s.update_beehive(b2)
+        self.assertEqual([s.harvest_best_beehive() for _ in range(10)], [50] * 9 + [0])
+        with self.assertRaises(ValueError):
+            s.remove_beehive(b3)
+        with self.assertRaises(ValueError):
+            s.update_beehive(b3)
+        with self.assertRaises(ValueError):
+            s.add_beehive(b1)
+        with self.assertRaises(ValueError):
+            BeehiveSelector().set_all_beehives([b3, b3])
+
+    @timeout()
+    @number("5.4")
+    def test_harvest_many(self):
+        random.seed(4417)
+        stats = [(random.randint(1, 30), random.randint(1, 10), random.randint(0, 300)) for _ in range(100)]
+        single, batched, summed = (
+            BeehiveSelector(), BeehiveSelector(100), BeehiveSelector()
+        )
+        for selector in (single, batched, summed):
+            selector.set_all_beehives([Beehive(i, i, i, capacity=c, nutrient_factor=n, volume=v)
+                                       for i, (c, n, v) in enumerate(stats)])
+        expected = [single.harvest_best_beehive() for _ in range(2500)]
+        self.assertEqual(batched.harvest_many(1200) + batched.harvest_many(1300), expected)
+        self.assertEqual(summed.harvest_many(2500, total=True), sum(expected))
+        self.assertEqual(expected[-1], 0)
+        self.assertEqual(batched.harvest_many(0), [])
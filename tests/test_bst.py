@@ -2,7 +2,9 @@ import unittest
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
+from balanced_bst import WeightBalancedTree
 from bst import BinarySearchTree
+from node import TreeNode
 
 class BSTTest(unittest.TestCase):
 
@@ -79,3 +81,255 @@ class BSTTest(unittest.TestCase):
         kth = BST.kth_smallest(5, BST.root)
         self.assertEqual(kth.key, 95)
         self.assertEqual(kth.item, 1)
+
+    @timeout()
+    @number("1.4")
+    def test_degenerate(self):
+        # Sorted input builds a 2000-deep chain, well past the recursion limit.
+        BST = BinarySearchTree()
+        for key in range(2000):
+            BST[key] = str(key)
+
+        self.assertEqual(BST.root.subtree_size, 2000)
+        self.assertEqual(BST[1999], '1999')
+        self.assertEqual(BST.kth_smallest(1234, BST.root).key, 1233)
+        with self.assertRaises(ValueError):
+            BST[1000] = 'again'
+
+        del BST[0]
+        del BST[1999]
+        del BST[1000]
+        self.assertEqual(len(BST), 1997)
+        self.assertEqual(BST.root.subtree_size, 1997)
+        self.assertNotIn(1000, BST)
+        self.assertEqual(BST.kth_smallest(1000, BST.root).key, 1001)
+        with self.assertRaises(ValueError):
+            del BST[1000]
+
+    @timeout()
+    @number("1.5")
+    def test_delete_two_children(self):
+        BST = BinarySearchTree()
+        for key in [95, 73, 99, 50, 85, 80, 90]:
+            BST[key] = key
+
+        del BST[73]
+        self.assertEqual(BST.root.left.key, 80)
+        self.assertEqual(BST.root.left.subtree_size, 4)
+        self.assertEqual(BST.root.left.right.subtree_size, 2)
+        self.assertEqual(BST.root.subtree_size, 6)
+
+    @timeout()
+    @number("1.6")
+    def test_bulk_load(self):
+        BST = BinarySearchTree.from_sorted((key, str(key)) for key in range(1, 16))
+        self.assertEqual(len(BST), 15)
+        self.assertEqual(BST.root.key, 8)
+        self.assertEqual(BST.root.subtree_size, 15)
+        self.assertEqual(BST.root.left.subtree_size, 7)
+        self.assertEqual(BST.root.right.left.key, 10)
+        self.assertEqual(BST.kth_smallest(11, BST.root).item, '11')
+        self.assertEqual([node.key for node in BST.in_order()], list(range(1, 16)))
+
+        BST = BinarySearchTree.from_iterable([(3, 'c'), (1, 'a'), (2, 'b')])
+        self.assertEqual(BST.root.key, 2)
+        self.assertEqual(BST[1], 'a')
+        BST[4] = 'd'
+        self.assertEqual(BST.root.subtree_size, 4)
+
+        with self.assertRaises(ValueError):
+            BinarySearchTree.from_sorted([(2, 'b'), (1, 'a')])
+        with self.assertRaises(ValueError):
+            BinarySearchTree.from_iterable([(1, 'a'), (1, 'b')])
+
+    @timeout()
+    @number("1.7")
+    def test_rank_and_range(self):
+        BST = BinarySearchTree()
+        for key in [95, 73, 99, 50, 85, 80]:
+            BST[key] = key
+
+        for k, key in enumerate([50, 73, 80, 85, 95, 99], start=1):
+            self.assertEqual(BST.rank(key), k)
+            self.assertEqual(BST.kth_smallest(BST.rank(key), BST.root).key, key)
+        self.assertEqual(BST.rank(10), 0)
+        self.assertEqual(BST.rank(90), 4)
+        self.assertEqual(BST.rank(1000), 6)
+
+        self.assertEqual(BST.count_range(73, 95), 4)
+        self.assertEqual(BST.count_range(74, 94), 2)
+        self.assertEqual(BST.count_range(0, 1000), 6)
+        self.assertEqual(BST.count_range(96, 98), 0)
+        self.assertEqual(BST.count_range(95, 73), 0)
+
+        self.assertEqual(list(BST.iter_range(73, 95)), [73, 80, 85, 95])
+        self.assertEqual(list(BST.iter_range(74, 94)), [80, 85])
+        self.assertEqual(list(BST.iter_range(96, 98)), [])
+        keys = BST.iter_range(0, 1000)
+        self.assertEqual(next(keys), 50)
+        self.assertEqual(next(keys), 73)
+
+    @timeout()
+    @number("1.8")
+    def test_cursor(self):
+        BST = BinarySearchTree()
+        for key in [95, 73, 99, 50, 85, 80]:
+            BST[key] = key
+
+        cursor = BST.cursor()
+        self.assertFalse(cursor.is_valid())
+        self.assertEqual(cursor.seek(74).key, 80)
+        self.assertEqual(cursor.next().key, 85)
+        self.assertEqual(cursor.next().key, 95)
+        self.assertEqual(cursor.prev().key, 85)
+        self.assertEqual(list(cursor), [85, 95, 99])
+        self.assertFalse(cursor.is_valid())
+        self.assertIsNone(cursor.next())
+
+        self.assertEqual(cursor.seek(73).key, 73)
+        self.assertEqual(cursor.prev().key, 50)
+        self.assertIsNone(cursor.prev())
+        self.assertIsNone(cursor.seek(100))
+
+        self.assertEqual(cursor.seek_rank(4).key, 85)
+        self.assertEqual(cursor.seek_last().key, 99)
+        self.assertEqual(cursor.seek_first().key, 50)
+        self.assertEqual(list(cursor), [50, 73, 80, 85, 95, 99])
+
+    @timeout()
+    @number("1.9")
+    def test_persistent_snapshot(self):
+        BST = BinarySearchTree(persistent=True)
+        for key in [95, 73, 99, 50, 85, 80]:
+            BST[key] = key
+        root = BST.root
+        snapshot = BST.snapshot()
+        self.assertIs(snapshot.root, root)
+
+        BST[90] = 90
+        del BST[73]
+        del BST[95]
+        self.assertIsNot(BST.root, root)
+        self.assertEqual([node.key for node in BST.in_order()], [50, 80, 85, 90, 99])
+        self.assertEqual([node.key for node in snapshot.in_order()], [50, 73, 80, 85, 95, 99])
+        self.assertEqual(len(snapshot), 6)
+        self.assertEqual(snapshot.root.left.right.subtree_size, 2)
+        self.assertEqual(snapshot.kth_smallest(5, snapshot.root).key, 95)
+
+        copied = BinarySearchTree()
+        copied[1] = 'a'
+        detached = copied.snapshot()
+        del copied[1]
+        self.assertEqual(detached[1], 'a')
+
+    @timeout()
+    @number("1.10")
+    def test_multiset(self):
+        BST = BinarySearchTree(multiset=True)
+        for key in [50, 20, 50, 70, 20, 50]:
+            BST[key] = key
+
+        self.assertEqual(len(BST), 6)
+        self.assertEqual(BST.root.key, 50)
+        self.assertEqual(BST.root.count, 3)
+        self.assertEqual(BST.root.subtree_size, 6)
+        self.assertEqual(BST.root.left.subtree_size, 2)
+        self.assertEqual([BST.kth_smallest(k, BST.root).key for k in range(1, 7)], [20, 20, 50, 50, 50, 70])
+        self.assertEqual(BST.rank(50), 5)
+        self.assertEqual(BST.count_range(20, 50), 5)
+        self.assertEqual(list(BST.iter_range(21, 80)), [50, 50, 50, 70])
+
+        del BST[50]
+        del BST[20]
+        self.assertEqual(BST.root.subtree_size, 4)
+        self.assertEqual(list(BST.iter_range(0, 100)), [20, 50, 50, 70])
+        del BST[20]
+        self.assertNotIn(20, BST)
+        with self.assertRaises(ValueError):
+            del BST[20]
+
+        BST = BinarySearchTree(multiset=True)
+        BST.load_sorted([(1, 1), (3, 3), (3, 3)])
+        self.assertEqual(BST.root.key, 3)
+        self.assertEqual(BST.root.count, 2)
+        self.assertEqual(len(BST), 3)
+        with self.assertRaises(ValueError):
+            BinarySearchTree().load_sorted([(1, 1), (3, 3), (3, 3)])
+
+    @timeout()
+    @number("1.11")
+    def test_tombstones(self):
+        BST = BinarySearchTree(tombstones=True)
+        BST.load_sorted((key, str(key)) for key in range(100))
+        for key in range(0, 40, 2):
+            del BST[key]
+        # 20 dead nodes out of 100 is still below MAX_DEAD_FRACTION
+        self.assertEqual(BST.dead, 20)
+        self.assertEqual(len(BST), 80)
+        self.assertEqual(BST.root.subtree_size, 80)
+        self.assertNotIn(10, BST)
+        with self.assertRaises(ValueError):
+            del BST[10]
+        self.assertEqual(BST.kth_smallest(1, BST.root).key, 1)
+        self.assertEqual(BST.rank(39), 20)
+        self.assertEqual(list(BST.iter_range(5, 12)), [5, 7, 9, 11])
+        self.assertEqual([node.key for node in BST.in_order()][:3], [1, 3, 5])
+
+        cursor = BST.cursor()
+        self.assertEqual(cursor.seek(10).key, 11)
+        self.assertEqual(cursor.prev().key, 9)
+        self.assertEqual(cursor.seek_first().key, 1)
+        self.assertIsNone(cursor.prev())
+
+        BST[10] = 'again'
+        self.assertEqual((BST.dead, len(BST), BST[10]), (19, 81, 'again'))
+
+        for key in range(40, 72):
+            del BST[key]
+        # the 51st tombstone of 100 nodes tips the tree over MAX_DEAD_FRACTION and it is rebuilt
+        self.assertEqual(BST.dead, 0)
+        self.assertEqual(len(BST), 49)
+        self.assertEqual(BST.root.subtree_size, 49)
+        self.assertEqual([node.key for node in BST.in_order()], [1, 3, 5, 7, 9, 10] + list(range(11, 40, 2)) + list(range(72, 100)))
+
+        # in multiset mode dead nodes are weighed against nodes, not elements:
+        # 6 dead nodes of 10 tip the tree although 12 of its 30 elements remain
+        BST = WeightBalancedTree(multiset=True, tombstones=True)
+        BST.load_sorted((key, key) for key in range(10) for _ in range(3))
+        for key in range(5):
+            for _ in range(3):
+                del BST[key]
+        self.assertEqual((BST.dead, len(BST)), (5, 15))
+        for _ in range(3):
+            del BST[5]
+        self.assertEqual((BST.dead, len(BST), BST.node_count()), (0, 12, 4))
+
+        # churn that leaves one side dead does not count against the balance
+        BST = WeightBalancedTree(tombstones=True)
+        BST.load_sorted((key, key) for key in range(100))
+        for key in range(46):
+            del BST[key]
+        self.assertEqual(BST.dead, 46)
+        self.assertTrue(BST.is_balanced(BST.root))
+
+    @timeout()
+    @number("1.12")
+    def test_split_union_sorted_input(self):
+        def chain(keys):
+            # the right-leaning chain that inserting keys in sorted order builds
+            BST, root = BinarySearchTree(), None
+            for size, key in enumerate(reversed(keys), 1):
+                root = TreeNode(key, item=key, right=root, subtree_size=size)
+            BST.root, BST.length = root, len(keys)
+            return BST
+
+        BST = chain(range(3000))
+        smaller, larger = BST.split(2500)
+        self.assertEqual((len(smaller), len(larger)), (2500, 500))
+        self.assertEqual(larger.get_minimal(larger.root).key, 2500)
+        smaller.join(larger)
+        self.assertEqual([node.key for node in smaller.in_order()], list(range(3000)))
+
+        smaller.union(chain(range(1500, 4500)))
+        self.assertEqual(len(smaller), 4500)
+        self.assertEqual([node.key for node in smaller.in_order()], list(range(4500)))
@@ -0,0 +1,91 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from btree import BTree, BTreeInternal
+from ratio import Percentiles
+
+
+def depth(node):
+    if type(node) is BTreeInternal:
+        return 1 + depth(node.children[0])
+    return 1
+
+
+class BTreeTest(unittest.TestCase):
+
+    @timeout()
+    @number("8.1")
+    def test_map(self):
+        random.seed(203948)
+        keys = random.sample(range(100000), 5000)
+        tree = BTree(fanout=8)
+        for key in keys:
+            tree[key] = str(key)
+
+        self.assertEqual(len(tree), 5000)
+        self.assertEqual(tree.root.size, 5000)
+        self.assertLessEqual(depth(tree.root), 6)
+        self.assertEqual(tree[keys[10]], str(keys[10]))
+        self.assertIn(keys[20], tree)
+        with self.assertRaises(ValueError):
+            tree[keys[0]] = 'again'
+        with self.assertRaises(KeyError):
+            tree[-1]
+
+        ordered = sorted(keys)
+        self.assertEqual(tree.kth_smallest(1, tree.root).key, ordered[0])
+        self.assertEqual(tree.kth_smallest(4321, tree.root).item, str(ordered[4320]))
+        self.assertIsNone(tree.kth_smallest(5001, tree.root))
+        self.assertEqual(tree.rank(ordered[99]), 100)
+        self.assertEqual(tree.count_range(ordered[10], ordered[19]), 10)
+        self.assertEqual(list(tree.iter_range(ordered[10], ordered[19])), ordered[10:20])
+
+        random.shuffle(keys)
+        for key in keys[:4000]:
+            del tree[key]
+        with self.assertRaises(ValueError):
+            del tree[keys[0]]
+        ordered = sorted(keys[4000:])
+        self.assertEqual(len(tree), 1000)
+        self.assertEqual([entry.key for entry in tree.in_order()], ordered)
+        self.assertEqual(tree.kth_smallest(500, tree.root).key, ordered[499])
+
+    @timeout()
+    @number("8.2")
+    def test_cursor_and_bulk_load(self):
+        tree = BTree.from_sorted(((key, key) for key in range(0, 200, 2)), fanout=4)
+        self.assertEqual(len(tree), 100)
+        cursor = tree.cursor()
+        self.assertEqual(cursor.seek(51).key, 52)
+        self.assertEqual(cursor.prev().key, 50)
+        self.assertEqual(cursor.next().key, 52)
+        self.assertEqual(cursor.seek_rank(100).key, 198)
+        self.assertIsNone(cursor.next())
+        self.assertEqual(cursor.seek_first().key, 0)
+        self.assertIsNone(cursor.prev())
+        with self.assertRaises(ValueError):
+            BTree(fanout=3)
+
+    @timeout()
+    @number("8.3")
+    def test_percentiles(self):
+        random.seed(1293810293)
+        p = Percentiles(BTree(fanout=4))
+        points = [4, 9, 14, 15, 16, 82, 87, 91, 92, 99]
+        random.shuffle(points)
+        for point in points:
+            p.add_point(point)
+        self.assertEqual(p.ratio(13, 10), [14, 15, 16, 82, 87, 91, 92])
+        p.remove_point(82)
+        self.assertEqual(p.ratio(13, 10), [14, 15, 16, 87, 91, 92])
+        self.assertEqual(list(p.scan_from(50)), [87, 91, 92, 99])
+
+        repeated = Percentiles(BTree(fanout=4, multiset=True))
+        repeated.add_points([5, 1, 5, 3, 5, 1])
+        other = Percentiles(BTree(fanout=4, multiset=True))
+        other.add_points([5, 7])
+        repeated.merge(other)
+        self.assertEqual(repeated.ratio(0, 0), [1, 1, 3, 5, 5, 5, 5, 7])
+        self.assertEqual(repeated.ratio(30, 30), [5, 5])
@@ -0,0 +1,68 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from balanced_bst import WeightBalancedTree
+from fenwick import FenwickTree
+from ratio import Percentiles
+
+
+class FenwickTreeTest(unittest.TestCase):
+
+    @timeout()
+    @number("12.1")
+    def test_matches_bst(self):
+        random.seed(5512)
+        points = random.sample(range(10001), 3000)
+        exact = Percentiles(WeightBalancedTree())
+        counted = Percentiles(domain=range(0, 10001))
+        for point in points:
+            exact.add_point(point)
+            counted.add_point(point)
+        for point in points[:1000]:
+            exact.remove_point(point)
+            counted.remove_point(point)
+        counted.add_points(points[:500])
+        exact.add_points(points[:500])
+
+        for x, y in [(0, 0), (13, 10), (0, 42), (50, 49.5), (99, 0), (100, 0)]:
+            self.assertEqual(counted.ratio(x, y), exact.ratio(x, y))
+            self.assertEqual(list(counted.scan_from(x)), list(exact.scan_from(x)))
+        with self.assertRaises(ValueError):
+            counted.add_point(points[-1])
+        with self.assertRaises(ValueError):
+            counted.add_point(10001)
+        with self.assertRaises(ValueError):
+            counted.remove_point(points[600])
+        with self.assertRaises(ValueError):
+            Percentiles(WeightBalancedTree(), domain=range(10))
+
+    @timeout()
+    @number("12.2")
+    def test_compressed_domain(self):
+        domain = [0.5, 2.25, -7.0, 1e9, 3.0, 2.25]
+        store = FenwickTree(domain, multiset=True)
+        for key in [3.0, -7.0, 3.0, 1e9, 0.5, 3.0]:
+            store[key] = key
+        self.assertEqual(store.keys, [-7.0, 0.5, 2.25, 3.0, 1e9])
+        self.assertEqual(len(store), 6)
+        self.assertEqual(store.kth_smallest(4, store.root).key, 3.0)
+        self.assertEqual(store.rank(2.5), 2)
+        self.assertEqual(store.count_range(0, 5), 4)
+        self.assertEqual(list(store.iter_range(0, 5)), [0.5, 3.0, 3.0, 3.0])
+
+        cursor = store.cursor()
+        self.assertEqual(cursor.seek(1).key, 3.0)
+        self.assertEqual(cursor.node.count, 3)
+        self.assertEqual(cursor.prev().key, 0.5)
+        self.assertEqual(cursor.seek_last().key, 1e9)
+        self.assertIsNone(cursor.next())
+
+        p = Percentiles(store)
+        self.assertEqual(p.ratio(20, 20), [3.0, 3.0])
+        other = Percentiles(FenwickTree(domain, multiset=True))
+        other.add_points([2.25, 3.0])
+        p.merge(other)
+        self.assertEqual(p.ratio(0, 0), [-7.0, 0.5, 2.25, 3.0, 3.0, 3.0, 3.0, 1e9])
+        self.assertEqual(len(other.items), 0)
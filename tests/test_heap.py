@@ -0,0 +1,123 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from heap import IndexedMaxHeap, MaxHeap
+
+
+class MaxHeapTest(unittest.TestCase):
+
+    @timeout()
+    @number("13.1")
+    def test_heapify(self):
+        random.seed(20431)
+        items = [random.randrange(1000) for _ in range(2000)]
+        heap = MaxHeap.from_items(items)
+        self.assertEqual(len(heap), 2000)
+        self.assertTrue(heap.is_full())
+        self.assertEqual([heap.get_max() for _ in range(2000)], sorted(items, reverse=True))
+
+        heap = MaxHeap(10)
+        heap.add(5)
+        heap.heapify([3, 9, 1])
+        heap.add(4)
+        self.assertEqual([heap.get_max() for _ in range(4)], [9, 4, 3, 1])
+        with self.assertRaises(IndexError):
+            heap.heapify(range(11))
+        self.assertEqual(len(MaxHeap.from_items([], max_size=3).the_array), 4)
+
+    @timeout()
+    @number("13.2")
+    def test_growable(self):
+        random.seed(7730)
+        heap = MaxHeap()
+        items = [random.randrange(10000) for _ in range(1000)]
+        for item in items:
+            heap.add(item)
+        self.assertEqual(len(heap), 1000)
+        self.assertEqual(heap.capacity(), 1024)
+        drained = [heap.get_max() for _ in range(990)]
+        self.assertEqual(drained, sorted(items, reverse=True)[:990])
+        # halved each time it fell to a quarter full
+        self.assertEqual(heap.capacity(), 32)
+        heap.heapify(items)
+        self.assertEqual(len(heap), 1000)
+        self.assertEqual(heap.get_max(), max(items))
+
+        fixed = MaxHeap(3)
+        for item in [1, 2, 3]:
+            fixed.add(item)
+        with self.assertRaises(IndexError):
+            fixed.add(4)
+        fixed.get_max(), fixed.get_max()
+        self.assertEqual(fixed.capacity(), 3)
+
+    @timeout()
+    @number("13.3")
+    def test_indexed(self):
+        random.seed(5512)
+        heap = IndexedMaxHeap()
+        cells = [[random.randrange(1000)] for _ in range(500)]
+        handles = [heap.add(cell) for cell in cells]
+        for _ in range(300):
+            handle = random.choice(handles)
+            if handle.index and random.random() < 0.3:
+                heap.remove(handle)
+            elif handle.index:
+                handle.item[0] = random.randrange(1000)
+                heap.update(handle)
+        for k in range(1, len(heap) + 1):
+            self.assertEqual(heap.the_array[k].index, k)
+        live = sorted((handle.item for handle in handles if handle.index), reverse=True)
+        self.assertEqual(len(live), len(heap))
+        self.assertEqual([heap.get_max() for _ in range(len(heap))], live)
+        with self.assertRaises(KeyError):
+            heap.update(handles[0])
+
+    @timeout()
+    @number("13.4")
+    def test_key(self):
+        random.seed(3391)
+        calls = []
+
+        def key(cell):
+            calls.append(cell)
+            return -cell[0]
+
+        heap = IndexedMaxHeap(key=key)
+        cells = [[random.randrange(1000)] for _ in range(200)]
+        handles = heap.heapify(cells[:100])
+        for cell in cells[100:]:
+            handles.append(heap.add(cell))
+        self.assertEqual(len(calls), 200)
+        cells[7][0] = -1
+        heap.update(handles[7])
+        self.assertEqual(len(calls), 201)
+        self.assertIs(heap.peek(), handles[7])
+        self.assertEqual(heap.max_key(), 1)
+        self.assertEqual([heap.get_max()[0] for _ in range(200)], sorted(cell[0] for cell in cells))
+        self.assertEqual(len(calls), 201)
+
+    @timeout()
+    @number("13.5")
+    def test_replace_and_pushpop(self):
+        heap = MaxHeap.from_items([5, 1, 8, 3])
+        self.assertEqual(heap.replace_max(2), 8)
+        self.assertEqual(heap.pushpop(9), 9)
+        self.assertEqual(heap.pushpop(4), 5)
+        self.assertEqual([heap.get_max() for _ in range(4)], [4, 3, 2, 1])
+        self.assertEqual(heap.pushpop(7), 7)
+        with self.assertRaises(IndexError):
+            heap.replace_max(1)
+
+        indexed = IndexedMaxHeap(key=lambda cell: cell[0])
+        cells = [[5], [1], [8], [3]]
+        handles = indexed.heapify(cells)
+        self.assertEqual(indexed.replace_max([2]), [8])
+        self.assertEqual(handles[2].item, [2])
+        self.assertEqual(indexed.pushpop([4]), [5])
+        self.assertEqual(indexed.pushpop([9]), [9])
+        for k in range(1, len(indexed) + 1):
+            self.assertEqual(indexed.the_array[k].index, k)
+        self.assertEqual([indexed.get_max()[0] for _ in range(4)], [4, 3, 2, 1])
@@ -0,0 +1,93 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from bst import BinarySearchTree
+from pooled_bst import PooledBinarySearchTree
+from ratio import Percentiles
+
+
+class PooledBSTTest(unittest.TestCase):
+
+    @timeout()
+    @number("7.1")
+    def test_same_shape(self):
+        BST = PooledBinarySearchTree()
+        BST[95] = 1
+        BST[73] = 2
+        BST[99] = 3
+        BST[50] = 4
+        BST[85] = 5
+        BST[80] = 6
+
+        self.assertEqual(BST.root.subtree_size, 6)
+        self.assertEqual(BST.root.left.subtree_size, 4)
+        self.assertEqual(BST.root.left.right.left.key, 80)
+        self.assertEqual(BST.get_successor(BST.root.left).item, 6)
+        self.assertEqual(BST.kth_smallest(3, BST.root).key, 80)
+        self.assertEqual(BST.kth_smallest(2, BST.root.left.right).key, 85)
+        self.assertEqual(BST.rank(85), 4)
+        self.assertEqual(BST.count_range(60, 96), 4)
+        self.assertEqual(list(BST.iter_range(60, 96)), [73, 80, 85, 95])
+        self.assertEqual(BST[85], 5)
+        self.assertIn(99, BST)
+        self.assertNotIn(98, BST)
+        with self.assertRaises(ValueError):
+            BST[50] = 0
+
+    @timeout()
+    @number("7.2")
+    def test_matches_linked_tree(self):
+        random.seed(1029384)
+        keys = random.sample(range(10000), 1500)
+        pooled, linked = PooledBinarySearchTree(), BinarySearchTree()
+        for key in keys:
+            pooled[key] = str(key)
+            linked[key] = str(key)
+
+        random.shuffle(keys)
+        for key in keys[:1000]:
+            del pooled[key]
+            del linked[key]
+        for key in keys[:300]:
+            pooled[key] = str(key)
+            linked[key] = str(key)
+
+        # freed slots are recycled rather than growing the arrays
+        self.assertEqual(len(pooled.keys), 1501)
+        self.assertEqual(len(pooled), len(linked))
+        self.assertEqual([(n.key, n.item, n.subtree_size) for n in pooled.in_order()],
+                         [(n.key, n.item, n.subtree_size) for n in linked.in_order()])
+        with self.assertRaises(ValueError):
+            del pooled[keys[500]]
+
+    @timeout()
+    @number("7.3")
+    def test_percentiles(self):
+        p = Percentiles(PooledBinarySearchTree())
+        p.add_points(range(0, 200, 2))
+        p.add_point(7)
+        p.remove_point(0)
+        self.assertEqual(len(p.items), 100)
+        self.assertEqual(p.ratio(0, 95), [2, 4, 6, 7, 8])
+        self.assertEqual(p.ratio_count(0, 95), 5)
+
+    @timeout()
+    @number("7.4")
+    def test_split_join_union(self):
+        BST = PooledBinarySearchTree.from_sorted((key, 'a') for key in range(0, 20, 2))
+        other = PooledBinarySearchTree.from_sorted((key, 'b') for key in range(0, 30, 3))
+        BST.union(other)
+        self.assertEqual(len(other), 0)
+        self.assertEqual(list(BST.iter_range(0, 10)), [0, 2, 3, 4, 6, 8, 9, 10])
+        self.assertEqual((BST[6], BST[9]), ('a', 'b'))
+
+        smaller, larger = BST.split(9)
+        self.assertEqual(len(BST), 0)
+        self.assertEqual(list(smaller.iter_range(0, 30)), [0, 2, 3, 4, 6, 8])
+        self.assertEqual(larger.kth_smallest(1, larger.root).key, 9)
+        smaller.join(larger)
+        self.assertEqual(len(smaller), 16)
+        with self.assertRaises(ValueError):
+            smaller.join(PooledBinarySearchTree.from_sorted([(1, 'c')]))
@@ -1,9 +1,15 @@
 import random
+import threading
 import unittest
+from itertools import islice
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
 
 from ratio import Percentiles
+from balanced_bst import WeightBalancedTree
+from bst import BinarySearchTree
+from btree import BTree
+from pooled_bst import PooledBinarySearchTree
 
 class RatioTest(unittest.TestCase):
 
@@ -39,4 +45,243 @@ class RatioTest(unittest.TestCase):
 
         p.remove_point(82)
         res = p.ratio(13, 10)
-        self.assertSetEqual(set(res), {14, 15, 16, 87, 91})
\ No newline at end of file
+        self.assertSetEqual(set(res), {14, 15, 16, 87, 91})
+
+    @timeout()
+    @number("2.3")
+    def test_add_points(self):
+        random.seed(5920184)
+        points = list(range(0, 2000, 2))
+        random.shuffle(points)
+        p = Percentiles()
+        p.add_points(points[:900])
+        p.add_points(points[900:])
+        p.add_points([1, 3])
+        self.assertEqual(len(p.items), 1002)
+        self.assertEqual(p.items.root.subtree_size, 1002)
+        self.assertEqual(p.ratio(0, 99), [0, 1, 2, 3, 4, 6, 8, 10, 12, 14])
+
+        p.add_points(range(5, 1000, 2))
+        self.assertEqual(len(p.items), 1500)
+        self.assertEqual(p.ratio(50, 0), list(range(750, 1000)) + list(range(1000, 2000, 2)))
+        with self.assertRaises(ValueError):
+            p.add_points([5000, 7])
+        self.assertNotIn(5000, p.items)
+
+    @timeout()
+    @number("2.4")
+    def test_ratio_count(self):
+        random.seed(8472910)
+        points = random.sample(range(1000), 57)
+        p = Percentiles()
+        for point in points:
+            p.add_point(point)
+
+        ordered = sorted(points)
+        for x, y in [(0, 0), (13, 10), (0, 42), (50, 49), (50, 50), (99, 0), (100, 0)]:
+            res = p.ratio(x, y)
+            self.assertEqual(p.ratio_count(x, y), len(res))
+            first, last = p.threshold_ranks(x, y)
+            self.assertEqual(res, ordered[first - 1:last])
+
+    @timeout()
+    @number("2.5")
+    def test_scan_from(self):
+        random.seed(1293810293)
+        p = Percentiles()
+        points = [4, 9, 14, 15, 16, 82, 87, 91, 92, 99]
+        random.shuffle(points)
+        for point in points:
+            p.add_point(point)
+
+        self.assertEqual(list(p.scan_from(13)), [14, 15, 16, 82, 87, 91, 92, 99])
+        cursor = p.cursor(50)
+        self.assertEqual(cursor.node.key, 82)
+        self.assertEqual(cursor.prev().key, 16)
+        self.assertEqual(list(p.scan_from(100)), [])
+
+    @timeout()
+    @number("2.6")
+    def test_merge(self):
+        shards = [Percentiles(WeightBalancedTree()) for _ in range(4)]
+        for point in range(400):
+            shards[point % 4].add_point(point)
+
+        p = shards[0]
+        for shard in shards[1:]:
+            p.merge(shard)
+            self.assertEqual(len(shard.items), 0)
+        self.assertEqual(len(p.items), 400)
+        self.assertTrue(p.items.is_balanced(p.items.root))
+        self.assertEqual(p.ratio(25, 25), list(range(100, 300)))
+
+    @timeout()
+    @number("2.7")
+    def test_snapshot_readers(self):
+        p = Percentiles(WeightBalancedTree(persistent=True))
+        p.add_points(range(0, 2000, 2))
+
+        def writer():
+            for point in range(1, 2000, 2):
+                p.add_point(point)
+                p.remove_point(point - 1)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while thread.is_alive():
+            snapshot = p.snapshot()
+            res = snapshot.ratio(0, 0)
+            self.assertEqual(len(res), len(snapshot.items))
+            self.assertEqual(res, sorted(res))
+        thread.join()
+        self.assertEqual(p.ratio(0, 0), list(range(1, 2000, 2)))
+
+    @timeout()
+    @number("2.8")
+    def test_repeated_points(self):
+        random.seed(50329)
+        points = [random.randrange(20) for _ in range(500)]
+        p = Percentiles(WeightBalancedTree(multiset=True))
+        p.add_points(points[:250])
+        for point in points[250:]:
+            p.add_point(point)
+        p.remove_point(points[0])
+        points.remove(points[0])
+
+        ordered = sorted(points)
+        self.assertEqual(len(p.items), 499)
+        self.assertEqual(p.items.root.subtree_size, 499)
+        for x, y in [(0, 0), (13, 10), (0, 42), (50, 49), (33, 33)]:
+            first, last = p.threshold_ranks(x, y)
+            self.assertEqual(p.ratio(x, y), ordered[first - 1:last])
+            self.assertEqual(p.ratio_count(x, y), last - first + 1)
+            self.assertEqual(list(p.scan_from(x)), ordered[first - 1:])
+
+    @timeout()
+    @number("2.9")
+    def test_lazy_results(self):
+        random.seed(7731)
+        points = [random.randrange(60) for _ in range(300)]
+        for store in (BinarySearchTree(), PooledBinarySearchTree(), BTree(8), WeightBalancedTree(multiset=True)):
+            p = Percentiles(store)
+            held = points if store.multiset else sorted(set(points))
+            p.add_points(held)
+            ordered = sorted(held)
+            for x, y in [(0, 0), (13, 10), (40, 59), (50, 50), (100, 0)]:
+                expected = p.ratio(x, y)
+                first, last = p.threshold_ranks(x, y)
+                self.assertEqual(expected, ordered[first - 1:last] if last >= first else [])
+                self.assertEqual(list(islice(p.ratio_iter(x, y), 5)), expected[:5])
+                view = p.ratio_view(x, y)
+                self.assertEqual(len(view), len(expected))
+                self.assertEqual(list(view), expected)
+                self.assertEqual(list(view[3:-2:3]), expected[3:-2:3])
+                self.assertEqual(list(view[::-2]), expected[::-2])
+                if expected:
+                    self.assertEqual((view[0], view[-1]), (expected[0], expected[-1]))
+                self.assertRaises(IndexError, lambda: view[len(expected)])
+
+    @timeout()
+    @number("2.10")
+    def test_remove_points(self):
+        p = Percentiles(WeightBalancedTree(multiset=True))
+        p.add_points([3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5])
+        p.remove_points([5, 1, 5, 9, 3, 2])
+        self.assertEqual(p.ratio(0, 0), [1, 3, 4, 5, 6])
+        p.remove_points([4])
+        self.assertEqual(p.ratio(0, 0), [1, 3, 5, 6])
+        with self.assertRaises(ValueError):
+            p.remove_points([1, 2, 3])
+
+    @timeout()
+    @number("2.11")
+    def test_ratio_cache(self):
+        p = Percentiles(cache_size=2)
+        p.add_points([4, 9, 14, 15, 16, 82, 87, 91, 92, 99])
+        first = p.ratio(13, 10)
+        first.append(-1)
+        self.assertEqual(p.ratio(13, 10), [14, 15, 16, 82, 87, 91, 92])
+        self.assertEqual((p.hits, p.misses), (1, 1))
+
+        p.ratio(0, 42)
+        p.ratio(13, 10)
+        p.ratio(50, 0)
+        # (0, 42) was the least recently used and has been evicted
+        p.ratio(0, 42)
+        self.assertEqual((p.hits, p.misses), (2, 4))
+
+        p.remove_point(82)
+        self.assertEqual(p.ratio(13, 10), [14, 15, 16, 87, 91, 92])
+        p.add_point(82)
+        self.assertEqual(p.ratio(13, 10), [14, 15, 16, 82, 87, 91, 92])
+        self.assertEqual((p.hits, p.misses), (2, 6))
+
+    @timeout()
+    @number("2.12")
+    def test_ratio_many(self):
+        random.seed(31337)
+        p = Percentiles(WeightBalancedTree(), cache_size=0)
+        p.add_points(random.sample(range(10000), 1000))
+        bands = [(random.uniform(0, 60), random.uniform(0, 60)) for _ in range(50)] + [(100, 0), (70, 70)]
+        self.assertEqual(p.ratio_many(bands), [p.ratio(x, y) for x, y in bands])
+        self.assertEqual(p.ratio_many(bands, kind='count'), [p.ratio_count(x, y) for x, y in bands])
+        self.assertEqual([list(view) for view in p.ratio_many(bands, kind='view')], [p.ratio(x, y) for x, y in bands])
+        self.assertEqual(p.ratio_many([]), [])
+        with self.assertRaises(ValueError):
+            p.ratio_many(bands, kind='set')
+
+    @timeout()
+    @number("2.13")
+    def test_flat_snapshot(self):
+        random.seed(6620)
+        points = random.sample(range(5000), 1000)
+        p = Percentiles(WeightBalancedTree(), cache_size=0, flatten=True)
+        plain = Percentiles(WeightBalancedTree(), cache_size=0)
+        p.add_points(points)
+        plain.add_points(points)
+        self.assertEqual(p.ratio(13, 10), plain.ratio(13, 10))
+        self.assertEqual((p.flat_rebuilds, p.flat_patches), (1, 0))
+
+        # single writes between reads are patched in
+        for point in range(5000, 5010):
+            p.add_point(point)
+            plain.add_point(point)
+            p.remove_point(points[point - 5000])
+            plain.remove_point(points[point - 5000])
+            self.assertEqual(p.ratio(20, 30), plain.ratio(20, 30))
+        self.assertEqual((p.flat_rebuilds, p.flat_patches), (1, 20))
+        self.assertEqual(p.kth_smallest(500), plain.kth_smallest(500))
+        self.assertEqual(list(p.ratio_view(5, 5)[::7]), plain.ratio(5, 5)[::7])
+        # a band being consumed in flat mode is unaffected by patches
+        band = p.ratio_iter(0, 0)
+        first, expected = next(band), plain.ratio(0, 0)
+        p.remove_point(expected[5])
+        self.assertEqual([first] + list(band), expected)
+        p.add_point(expected[5])
+
+        # a write-heavy phase drops the snapshot, and the next read rebuilds it
+        for point in range(6000, 6100):
+            p.add_point(point)
+            plain.add_point(point)
+        self.assertEqual(p.flat_patches, 20 + Percentiles.FLAT_PATCH_LIMIT)
+        self.assertEqual(list(p.scan_from(50)), list(plain.scan_from(50)))
+        self.assertEqual(p.flat_rebuilds, 2)
+        self.assertGreater(p.flat_rebuild_seconds, 0)
+
+    @timeout()
+    @number("2.14")
+    def test_out_of_range_bands(self):
+        for flatten in (False, True):
+            p = Percentiles(WeightBalancedTree(), flatten=flatten)
+            p.add_points(range(10))
+            # x + y > 100, a negative percentage, and a threshold past the end
+            bands = [(60, 50), (-10, 0), (0, -10), (100, 0)]
+            for x, y in bands:
+                self.assertEqual(p.ratio(x, y), [])
+                self.assertEqual(list(p.ratio_iter(x, y)), [])
+                self.assertEqual(len(p.ratio_view(x, y)), 0)
+                self.assertEqual(p.ratio_count(x, y), 0)
+            self.assertEqual(p.ratio_many(bands), [[]] * 4)
+            self.assertEqual(p.ratio_many(bands, 'count'), [0] * 4)
+            self.assertEqual([len(view) for view in p.ratio_many(bands, 'view')], [0] * 4)
+            self.assertEqual(p.ratio_many([(60, 50), (20, 30)]), [[], [2, 3, 4, 5, 6]])
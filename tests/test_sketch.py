@@ -0,0 +1,53 @@
+import pickle
+import random
+import unittest
+from bisect import bisect_left, bisect_right
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from ratio import Percentiles
+from sketch import ApproxPercentiles, KLLSketch
+
+
+class SketchTest(unittest.TestCase):
+
+    @timeout()
+    @number("9.1")
+    def test_small_stream_is_exact(self):
+        random.seed(1293810293)
+        points = [4, 9, 14, 15, 16, 82, 87, 91, 92, 99]
+        random.shuffle(points)
+        exact = Percentiles()
+        approx = ApproxPercentiles()
+        for point in points:
+            exact.add_point(point)
+            approx.add_point(point)
+        for x, y in [(0, 0), (13, 10), (0, 42), (50, 50)]:
+            self.assertEqual(approx.ratio(x, y), exact.ratio(x, y))
+            self.assertEqual(approx.ratio_count(x, y), exact.ratio_count(x, y))
+        with self.assertRaises(ValueError):
+            KLLSketch(k=4)
+
+    @timeout()
+    @number("9.2")
+    def test_error_bound_and_merge(self):
+        random.seed(99120)
+        points = [random.gauss(0, 1) for _ in range(40000)]
+        shards = [ApproxPercentiles(epsilon=0.02, seed=shard) for shard in range(4)]
+        for i, point in enumerate(points):
+            shards[i % 4].add_point(point)
+        # shards travel between processes pickled
+        p = shards[0]
+        for shard in shards[1:]:
+            p.merge(pickle.loads(pickle.dumps(shard)))
+
+        n = len(points)
+        ordered = sorted(points)
+        self.assertEqual(len(p.items), n)
+        self.assertLess(p.items.size, 400)
+        for q in ordered[::1000]:
+            self.assertLessEqual(abs(p.items.rank(q) - bisect_right(ordered, q)), 0.02 * n)
+        band = p.ratio(10, 25)
+        self.assertEqual(band, sorted(band))
+        self.assertLessEqual(abs(bisect_left(ordered, band[0]) - 0.10 * n), 0.02 * n)
+        self.assertLessEqual(abs(bisect_left(ordered, band[-1]) - 0.75 * n), 0.02 * n)
@@ -0,0 +1,65 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+try:
+    import numpy as np
+    from sorted_blocks import ArrayPercentiles, SortedBlocks
+except ImportError:
+    np = None
+
+
+@unittest.skipUnless(np, 'numpy is not installed')
+class SortedBlocksTest(unittest.TestCase):
+
+    @timeout()
+    @number("10.1")
+    def test_example(self):
+        random.seed(1293810293)
+        p = ArrayPercentiles(SortedBlocks(block_size=4, dtype=np.int64))
+        points = [4, 9, 14, 15, 16, 82, 87, 91, 92, 99]
+        random.shuffle(points)
+        for point in points:
+            p.add_point(point)
+        self.assertEqual(p.ratio(15, 66).tolist(), [14])
+        self.assertEqual(p.ratio(0, 42).tolist(), [4, 9, 14, 15, 16])
+        self.assertEqual(list(p.ratio_iter(13, 10)), [14, 15, 16, 82, 87, 91, 92])
+        self.assertEqual(list(p.scan_from(50)), [82, 87, 91, 92, 99])
+        with self.assertRaises(ValueError):
+            p.add_point(82)
+        p.remove_point(82)
+        self.assertEqual(p.ratio(13, 10).tolist(), [14, 15, 16, 87, 91, 92])
+        self.assertEqual(p.ratio(100, 0).tolist(), [])
+
+    @timeout()
+    @number("10.2")
+    def test_batches(self):
+        rng = np.random.default_rng(4471)
+        p = ArrayPercentiles(SortedBlocks(block_size=64, multiset=True, dtype=np.int64))
+        held = np.empty(0, np.int64)
+        for _ in range(5):
+            batch = rng.integers(0, 500, 1000)
+            p.add_points(batch)
+            held = np.sort(np.concatenate([held, batch]))
+            drop = rng.choice(held, 300, replace=False)
+            p.remove_points(drop)
+            for point in drop:
+                held = np.delete(held, np.searchsorted(held, point))
+            self.assertEqual(len(p.items), len(held))
+        with self.assertRaises(ValueError):
+            p.remove_points([500])
+
+        for x, y in [(0, 0), (13, 10), (40, 59), (50, 50)]:
+            first, last = p.threshold_ranks(x, y)
+            self.assertTrue(np.array_equal(p.ratio(x, y), held[first - 1:last]))
+            self.assertEqual(list(p.ratio_view(x, y)), held[first - 1:last].tolist())
+        # a band inside one block is handed out without copying
+        band = p.ratio(50, 49.9)
+        self.assertIs(np.shares_memory(band, p.items.blocks[p.items.locate(len(held) // 2)[0]]), True)
+        self.assertFalse(band.flags.writeable)
+
+        snapshot = p.snapshot()
+        p.remove_points(held[:100])
+        self.assertEqual(len(snapshot.items), len(held))
+        self.assertEqual(list(snapshot.ratio_iter(0, 0)), held.tolist())
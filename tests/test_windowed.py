@@ -0,0 +1,65 @@
+import random
+import unittest
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from windowed import WindowedPercentiles
+
+
+class WindowedPercentilesTest(unittest.TestCase):
+
+    @timeout()
+    @number("11.1")
+    def test_time_window(self):
+        now = [0.0]
+        p = WindowedPercentiles(max_age=10, clock=lambda: now[0])
+        for second in range(30):
+            now[0] = second
+            p.add_point(second % 7)
+        # the window is inclusive: seconds 19 to 29 are at most 10 seconds old
+        expected = sorted(second % 7 for second in range(19, 30))
+        self.assertEqual(p.ratio(0, 0), expected)
+        now[0] = 35
+        self.assertEqual(p.ratio(0, 0), sorted(second % 7 for second in range(25, 30)))
+        self.assertEqual(p.ratio_count(0, 0), 5)
+        now[0] = 100
+        self.assertEqual(p.ratio(0, 0), [])
+        self.assertEqual(len(p.window), 0)
+        with self.assertRaises(ValueError):
+            WindowedPercentiles()
+        p.add_point(1)
+        with self.assertRaises(ValueError):
+            p.add_point(2, timestamp=50)
+
+    @timeout()
+    @number("11.2")
+    def test_count_window(self):
+        random.seed(8812)
+        points = [random.randrange(100) for _ in range(5000)]
+        p = WindowedPercentiles(max_points=200, clock=lambda: 0)
+        for i, point in enumerate(points):
+            p.add_point(point)
+            if i % 500 == 499:
+                window = points[i - 199:i + 1]
+                self.assertEqual(p.ratio(0, 0), sorted(window))
+        self.assertEqual(len(p.window), 200)
+
+        # a point removed by hand is skipped when its entry expires
+        p.remove_point(points[-200])
+        p.add_point(-1)
+        self.assertEqual(p.ratio(0, 0), sorted(points[-199:] + [-1]))
+        p.add_points([-2, -3])
+        self.assertEqual(p.ratio(0, 0), sorted(points[-197:] + [-1, -2, -3]))
+
+        # in a time window, removal first drops the copies that aged out
+        now = [0.0]
+        p = WindowedPercentiles(max_age=5, clock=lambda: now[0])
+        p.add_point(7, timestamp=0)
+        now[0] = 3
+        p.add_point(7)
+        now[0] = 7
+        p.remove_point(7)
+        self.assertEqual(p.ratio(0, 0), [])
+        with self.assertRaises(ValueError):
+            p.remove_point(7)
+        self.assertEqual(len(p.window), 0)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+from collections import Counter, deque
+from heapq import merge
+from typing import Callable, Iterable, Iterator, TypeVar
+import time
+from balanced_bst import WeightBalancedTree
+from bst import BinarySearchTree, BSTCursor
+from ratio import Percentiles, PercentileView
+
+
+T = TypeVar("T")
+
+class WindowedPercentiles(Percentiles[T]):
+
+    def __init__(self, max_age: float | None = None, max_points: int | None = None,
+                 store: BinarySearchTree | None = None, cache_size: int = 0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialises a percentile object over a sliding window of timestamped points
+
+        A point leaves the window once it is more than max_age older than
+        the clock, or once max_points newer points have arrived; at least
+        one of the two bounds must be given, and timestamps are read on the
+        scale of clock. The store defaults to a WeightBalancedTree in
+        multiset mode, since repeated readings are common in a stream.
+
+        Best Case - O(1)
+
+        Worst Case - same as best case
+        """
+        if max_age is None and max_points is None:
+            raise ValueError('A window needs max_age or max_points')
+        super().__init__(store if store is not None else WeightBalancedTree(multiset=True), cache_size)
+        self.max_age = max_age
+        self.max_points = max_points
+        self.clock = clock
+        # (timestamp, point) in arrival order, oldest on the left
+        self.window : deque[tuple[float, T]] = deque()
+        # points removed by hand, whose oldest window entries expiry should skip
+        self.removed : Counter[T] = Counter()
+
+    def add_point(self, item: T, timestamp: float | None = None) -> None:
+        """
+        Adding a point stamped with timestamp (the clock when omitted), then
+        expiring the points that fell out of the window
+
+        Best Case -  O(log N) amortised, with a balanced store
+
+        Worst case - same as best case, since each point expires at most once
+
+        where N is the number of points in the window
+
+        """
+        self.add_points((item,), timestamp)
+
+    def add_points(self, items: Iterable[T], timestamp: float | None = None) -> None:
+        """
+        Adding many points with the same timestamp
+
+        Best Case -  O(M log N) amortised for M points
+
+        Worst case - same as best case
+
+        """
+        timestamp = self.clock() if timestamp is None else timestamp
+        if self.window and timestamp < self.window[-1][0]:
+            raise ValueError('Timestamps must not decrease')
+        add_point = super().add_point
+        for item in items:
+            add_point(item)
+            self.window.append((timestamp, item))
+        self.expire(timestamp)
+
+    def remove_point(self, item: T) -> None:
+        """
+        Removing the oldest copy of a point before it expires
+
+        Its window entry is left behind and skipped when it reaches the front.
+        The window is expired first, so an out-of-date copy is never the one
+        removed, and a point whose every copy has expired raises ValueError.
+
+        Best Case -  O(log N) with a balanced store
+
+        Worst case - O(E log N) for E expired points, as in expire
+
+        """
+        self.expire()
+        super().remove_point(item)
+        self.removed[item] += 1
+
+    def remove_points(self, items: Iterable[T]) -> None:
+        """
+        Removing many points before they expire
+
+        Best Case -  O(M log N) for M points
+
+        Worst case - same as best case
+
+        """
+        for item in items:
+            self.remove_point(item)
+
+    def merge(self, other: WindowedPercentiles[T]) -> None:
+        """
+        Merging the window of another WindowedPercentiles into this one
+
+        The windows are interleaved by timestamp and other is left empty.
+
+        :pre: the stores are in multiset mode or have no point in common
+
+        Best Case -  O(N + M) for the windows, plus the cost of Percentiles.merge
+
+        Worst case - same as best case
+
+        """
+        self.window = deque(merge(self.window, other.window, key=lambda entry: entry[0]))
+        self.removed += other.removed
+        super().merge(other)
+        other.window.clear()
+        other.removed.clear()
+        if self.window:
+            self.expire(self.window[-1][0])
+
+    def expire(self, now: float | None = None) -> None:
+        """
+        Removing every point that is older than max_age at time now (the
+        clock when omitted) or beyond the newest max_points
+
+        Best Case -  O(1) when nothing has expired
+
+        Worst case - O(E log N) for E expired points, amortised O(log N) per point
+
+        """
+        now = self.clock() if now is None else now
+        remove_point = super().remove_point
+        while self.window:
+            timestamp, item = self.window[0]
+            too_many = self.max_points is not None and len(self.items) > self.max_points
+            too_old = self.max_age is not None and timestamp < now - self.max_age
+            if not (too_many or too_old or self.removed[item]):
+                return
+            self.window.popleft()
+            if self.removed[item]:
+                # this entry is the copy remove_point already took out
+                self.removed[item] -= 1
+                if not self.removed[item]:
+                    del self.removed[item]
+            else:
+                remove_point(item)
+
+    def snapshot(self) -> Percentiles[T]:
+        """
+        Returns a read-only Percentiles over the current window, which stays
+        frozen while points keep arriving and expiring
+
+        Best Case -  O(1) with a persistent store
+
+        Worst case - O(N) otherwise
+
+        """
+        self.expire()
+        snapshot = Percentiles(self.items.snapshot(), self.cache_size)
+        snapshot.flatten = self.flatten
+        return snapshot
+
+    def ratio(self, x, y) -> list[T]:
+        """
+        Returns ratio(x, y) over the current window
+
+        Best Case -  O(K) for a cached query
+
+        Worst case - O(D + K) plus any expiry
+
+        """
+        self.expire()
+        return super().ratio(x, y)
+
+    def ratio_many(self, bands: Iterable[tuple], kind: str = 'list') -> list:
+        """ Answers ratio for every (x, y) in bands over the current window; see Percentiles.ratio_many. """
+        self.expire()
+        return super().ratio_many(bands, kind)
+
+    def ratio_iter(self, x, y) -> Iterator[T]:
+        """ Lazily yields ratio(x, y) over the current window; see Percentiles.ratio_iter. """
+        self.expire()
+        return super().ratio_iter(x, y)
+
+    def ratio_view(self, x, y) -> PercentileView[T]:
+        """ Returns a lazy view of ratio(x, y) over the current window; see Percentiles.ratio_view. """
+        self.expire()
+        return super().ratio_view(x, y)
+
+    def ratio_count(self, x, y) -> int:
+        """ Returns how many points ratio(x, y) would return over the current window. """
+        self.expire()
+        return super().ratio_count(x, y)
+
+    def cursor(self, x) -> BSTCursor:
+        """ Returns a cursor at the lowest point kept by ratio(x, y) over the current window. """
+        self.expire()
+        return super().cursor(x)
+
+    def scan_from(self, x) -> Iterator[T]:
+        """ Lazily yields the points of the current window above the bottom x percent. """
+        self.expire()
+        return super().scan_from(x)